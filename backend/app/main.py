@@ -1,11 +1,28 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
+import time
 import os
+import asyncio
 from dotenv import load_dotenv
 from app.routes import trace
 
-from app.routes import upload, score, explain, block, blockchain, report, verify
+from app.routes import upload, score, explain, block, blockchain, report, verify, export, dashboard, analytics, metrics, admin
+from app.middleware.metrics import MetricsMiddleware
+from app.middleware.profiling import RequestProfileMiddleware
+from app.middleware.admission import AdmissionMiddleware
+from app.middleware.warmup import WarmupGateMiddleware
+from app.services.container import container, SERVICE_WARMUP
+from app.services.audit_ledger import audit_ledger
+from app.services.blockchain import blockchain_logger
+from app.services.explanation_cache import explanation_cache
+from app.services.explanation_precompute import explanation_precomputer
+from app.services.report_jobs import report_jobs
+from app.services.dashboard_aggregator import dashboard_aggregator
+from app.services.geo_aggregator import geo_aggregator
+from app.services.metrics import metrics as metrics_registry
+from app.services.loop_monitor import loop_monitor
+from app.services.bulkhead import BulkheadFullError, shutdown_bulkheads
 
 # Load environment variables
 load_dotenv()
@@ -18,6 +35,12 @@ app = FastAPI(
     redoc_url="/redoc"
 )
 
+# Innermost, so shed responses still get CORS headers and are counted in metrics
+app.add_middleware(AdmissionMiddleware)
+
+# Outside admission, so requests waiting for the warmup do not hold class slots
+app.add_middleware(WarmupGateMiddleware)
+
 # CORS middleware for React frontend
 app.add_middleware(
     CORSMiddleware,
@@ -27,6 +50,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Opt-in per-request cProfile (X-Profile header plus admin token)
+app.add_middleware(RequestProfileMiddleware)
+
+# Outermost, so recorded latency covers every other middleware
+app.add_middleware(MetricsMiddleware)
+
 # Include all route modules
 app.include_router(upload.router, prefix="/api", tags=["Upload"])
 app.include_router(score.router, prefix="/api", tags=["Scoring"])
@@ -36,6 +65,11 @@ app.include_router(blockchain.router, prefix="/api", tags=["Blockchain"])
 app.include_router(report.router, prefix="/api", tags=["Reports"])
 app.include_router(verify.router, prefix="/api", tags=["Verification"])
 app.include_router(trace.router, prefix="/api", tags=["Trace"])
+app.include_router(export.router, prefix="/api", tags=["Export"])
+app.include_router(dashboard.router, prefix="/api", tags=["Dashboard"])
+app.include_router(analytics.router, prefix="/api", tags=["Analytics"])
+app.include_router(metrics.router, tags=["Metrics"])
+app.include_router(admin.router, prefix="/api", tags=["Admin"])
 
 @app.get("/")
 async def root():
@@ -45,6 +79,81 @@ async def root():
 async def health_check():
     return {"status": "healthy", "environment": os.getenv("ENVIRONMENT", "development")}
 
+@app.get("/health/ready")
+async def readiness_check():
+    """503 until the startup warmup has built the services, so load balancers hold traffic until then"""
+    status_code = 200 if container.warmed_up else 503
+    return JSONResponse(
+        status_code=status_code,
+        content={"status": "ready" if container.warmed_up else "warming", "services": container.stats()}
+    )
+
+async def anchor_ledger_periodically(interval: float):
+    """Anchor the audit ledger head on-chain at a fixed interval"""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await audit_ledger.anchor(blockchain_logger)
+        except Exception as e:
+            print(f"Ledger anchoring error: {e}")
+
+async def after_warmup(job):
+    """Start a background job once the warmup has built the clients it needs"""
+    await asyncio.shield(app.state.warmup_task)
+    await job()
+
+async def warm_services():
+    started = time.perf_counter()
+    await container.warmup(container.names(SERVICE_WARMUP))
+    print(f"Services warmed up in {time.perf_counter() - started:.2f}s")
+
+@app.on_event("startup")
+async def start_background_tasks():
+    if loop_monitor.enabled:
+        app.state.loop_monitor_task = asyncio.create_task(loop_monitor.run())
+
+    # Build clients and load the model off the event loop; the app already accepts requests
+    app.state.warmup_task = asyncio.create_task(warm_services())
+
+    anchor_interval = float(os.getenv("AUDIT_LEDGER_ANCHOR_INTERVAL", 0))
+    if anchor_interval > 0:
+        app.state.anchor_task = asyncio.create_task(anchor_ledger_periodically(anchor_interval))
+    
+    app.state.report_janitor_task = asyncio.create_task(report_jobs.run_janitor())
+    app.state.dashboard_reconcile_task = asyncio.create_task(after_warmup(dashboard_aggregator.run_reconciler))
+    app.state.geo_reconcile_task = asyncio.create_task(after_warmup(geo_aggregator.run_reconciler))
+    app.state.metrics_flush_task = asyncio.create_task(metrics_registry.run_flusher())
+
+@app.on_event("shutdown")
+async def stop_background_tasks():
+    anchor_task = getattr(app.state, "anchor_task", None)
+    if anchor_task:
+        anchor_task.cancel()
+    app.state.warmup_task.cancel()
+    loop_monitor_task = getattr(app.state, "loop_monitor_task", None)
+    if loop_monitor_task:
+        loop_monitor_task.cancel()
+    app.state.report_janitor_task.cancel()
+    app.state.dashboard_reconcile_task.cancel()
+    app.state.geo_reconcile_task.cancel()
+    app.state.metrics_flush_task.cancel()
+    
+    # Drain write-behind buffers before the process exits
+    await explanation_precomputer.stop()
+    await explanation_cache.flush()
+    audit_ledger.close()
+    report_jobs.shutdown()
+    shutdown_bulkheads()
+
+@app.exception_handler(BulkheadFullError)
+async def bulkhead_full_handler(request, exc):
+    # Shed load fast instead of queueing behind a saturated dependency
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": "1"}
+    )
+
 # Global exception handler
 @app.exception_handler(Exception)
 async def global_exception_handler(request, exc):
@@ -0,0 +1,50 @@
+import json
+import time
+
+from app.services.admission import admission_controller, AdmissionRejected
+
+class AdmissionMiddleware:
+    """Pure ASGI middleware admitting requests through the admission controller.
+
+    A request holds its class slot until the response (including a
+    streamed body) is complete. Shed requests get a JSON error with
+    Retry-After without reaching the router.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not admission_controller.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        route_class = admission_controller.classify(scope["path"])
+        if route_class is None:
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            await admission_controller.acquire(route_class)
+        except AdmissionRejected as e:
+            await self._reject(send, e)
+            return
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            admission_controller.release(route_class, time.perf_counter() - started)
+
+    async def _reject(self, send, rejection: AdmissionRejected):
+        body = json.dumps({"detail": rejection.detail}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": rejection.status_code,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(rejection.retry_after).encode())
+            ]
+        })
+        await send({"type": "http.response.body", "body": body})
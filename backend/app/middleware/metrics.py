@@ -0,0 +1,53 @@
+import time
+from typing import Dict, Any
+
+from app.services.metrics import HTTP_REQUESTS, HTTP_REQUEST_DURATION, HTTP_REQUESTS_IN_FLIGHT
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording request count, latency and in-flight requests.
+
+    Requests are labelled with the matched route template (``/api/report/{report_id}``)
+    rather than the raw path, so label cardinality stays bounded.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._route_paths: Dict[Any, str] = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = {"code": 500}
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        HTTP_REQUESTS_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            HTTP_REQUESTS_IN_FLIGHT.dec()
+            route = self._route_path(scope)
+            HTTP_REQUESTS.inc(scope["method"], route, str(status["code"]))
+            HTTP_REQUEST_DURATION.observe(time.perf_counter() - started, scope["method"], route)
+
+    def _route_path(self, scope) -> str:
+        # The router records the matched endpoint in the shared scope
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "unmatched"
+
+        path = self._route_paths.get(endpoint)
+        if path is None:
+            path = "unmatched"
+            for route in getattr(scope.get("app"), "routes", []):
+                if getattr(route, "endpoint", None) is endpoint:
+                    path = route.path
+                    break
+            self._route_paths[endpoint] = path
+        return path
@@ -0,0 +1,57 @@
+import hmac
+import os
+import time
+
+from app.services.profiler import request_profiles
+
+PROFILE_HEADER = b"x-profile"
+TOKEN_HEADER = b"x-admin-token"
+
+class RequestProfileMiddleware:
+    """Pure ASGI middleware running cProfile for requests that ask for it.
+
+    A request sending ``X-Profile: 1`` together with a valid
+    ``X-Admin-Token`` is profiled until its response body completes. The
+    response carries ``X-Profile-Id``, and the breakdown is served by
+    GET /api/admin/profiles/{id}. If another request is already being
+    profiled the header is ``busy`` instead. Other requests only pay for
+    a scan of their headers.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._wants_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = request_profiles.begin()
+        header = (b"x-profile-id", (profile_id or "busy").encode())
+        started = time.perf_counter()
+        status = {"code": 500}
+
+        async def send_with_profile(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                message = {**message, "headers": list(message.get("headers", [])) + [header]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_profile)
+        finally:
+            if profile_id is not None:
+                request_profiles.end(profile_id, scope["method"], scope["path"], status["code"], time.perf_counter() - started)
+
+    def _wants_profile(self, scope) -> bool:
+        wants, token = False, None
+        for name, value in scope["headers"]:
+            if name == PROFILE_HEADER:
+                wants = value in (b"1", b"true")
+            elif name == TOKEN_HEADER:
+                token = value
+        if not wants:
+            return False
+
+        admin_token = os.getenv("ADMIN_TOKEN")
+        return bool(admin_token and token and hmac.compare_digest(token, admin_token.encode()))
@@ -0,0 +1,43 @@
+import os
+import json
+
+from app.services.container import container
+
+WARMUP_WAIT_SECONDS = float(os.getenv("WARMUP_WAIT_SECONDS", 10.0))
+WARMUP_GATED_PREFIX = "/api/"
+
+class WarmupGateMiddleware:
+    """Pure ASGI middleware holding API requests until the startup warmup is done.
+
+    Without it a request arriving during warmup would build its service on
+    the event loop thread, or block the loop on the service's build lock.
+    Requests wait up to WARMUP_WAIT_SECONDS and then get a 503 with
+    Retry-After, matching /health/ready. Health and metrics are not gated.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or container.warmed_up or not scope["path"].startswith(WARMUP_GATED_PREFIX):
+            await self.app(scope, receive, send)
+            return
+
+        if not await container.wait_until_warm(WARMUP_WAIT_SECONDS):
+            await self._reject(send)
+            return
+
+        await self.app(scope, receive, send)
+
+    async def _reject(self, send):
+        body = json.dumps({"detail": "Service is warming up"}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", b"1")
+            ]
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -63,6 +63,15 @@ class ExplanationResponse(BaseModel):
     recommendations: List[str]
     generated_at: datetime
 
+class AnalystQuestionRequest(BaseModel):
+    question: str
+    context: Optional[Dict[str, Any]] = None
+
+class AnalystQuestionResponse(BaseModel):
+    question: str
+    answer: str
+    generated_at: datetime
+
 # Blocklist Models
 class BlockUserRequest(BaseModel):
     user_id: str
@@ -117,11 +126,40 @@ class ReportResponse(BaseModel):
     file_size: str
     expires_at: datetime
 
+class ReportJobResponse(BaseModel):
+    job_id: str
+    report_id: str
+    status: str  # queued, fetching_data, rendering, completed, failed
+    cache_hit: bool = False
+    status_url: str
+    download_url: str
+    submitted_at: datetime
+    expires_at: datetime
+
+class ReportJobStatus(BaseModel):
+    job_id: str
+    report_type: str
+    status: str
+    progress: float
+    period_start: datetime
+    period_end: datetime
+    submitted_at: datetime
+    started_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+    fetch_ms: Optional[float] = None
+    render_ms: Optional[float] = None
+    file_size_bytes: Optional[int] = None
+    error: Optional[str] = None
+    download_url: str
+    expires_at: datetime
+
 # Verification Models
 class VerifyReceiptRequest(BaseModel):
     receipt_hash: Optional[str] = None
     transaction_id: Optional[str] = None
     qr_data: Optional[str] = None
+    verify_mode: str = "online"  # online, offline (signature only)
+    check_revocation: bool = False
 
 class VerifyReceiptResponse(BaseModel):
     is_valid: bool
@@ -133,6 +171,19 @@ class VerifyReceiptResponse(BaseModel):
     status: str
     confirmations: int
 
+class IssueReceiptRequest(BaseModel):
+    transaction_id: str
+    store: str
+    # Amount and timestamp are signed from the stored transaction; a sent amount must match it
+    amount: Optional[float] = None
+
+class IssueReceiptResponse(BaseModel):
+    qr_data: str
+    receipt_hash: str
+    key_id: str
+    signature: str
+    issued_at: datetime
+
 # General Response Models
 class ErrorResponse(BaseModel):
     error: str
@@ -0,0 +1,145 @@
+from fastapi import APIRouter, HTTPException, Header, Depends
+from fastapi.responses import PlainTextResponse
+from typing import Optional
+import asyncio
+import hmac
+import os
+
+from app.services.loop_monitor import loop_monitor
+from app.services.bulkhead import bulkheads
+from app.services.admission import admission_controller
+from app.services.profiler import (
+    sampling_profiler, allocation_tracker, request_profiles, format_collapsed, ProfilerBusyError
+)
+
+GROUP_BY = ("lineno", "filename", "traceback")
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """Admin endpoints need ADMIN_TOKEN to be set and sent as X-Admin-Token"""
+    admin_token = os.getenv("ADMIN_TOKEN")
+    if not admin_token:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled (ADMIN_TOKEN is not set)")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token, admin_token):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+@router.get("/admin/loop-stalls")
+async def get_loop_stalls(limit: int = 20):
+    """
+    Event-loop stalls aggregated by the call site that blocked the loop (this worker only)
+    """
+    return loop_monitor.report(limit=limit)
+
+@router.delete("/admin/loop-stalls")
+async def reset_loop_stalls():
+    """
+    Clear the recorded stalls, e.g. before reproducing a latency spike
+    """
+    loop_monitor.reset()
+    return {"message": "Loop stall statistics reset"}
+
+@router.get("/admin/bulkheads")
+async def get_bulkheads():
+    """
+    Limit, load, queue and rejection counters of each bulkhead thread pool (this worker only)
+    """
+    return {name: bulkhead.stats() for name, bulkhead in bulkheads.items()}
+
+@router.get("/admin/admission")
+async def get_admission():
+    """
+    Limits, in-flight and queued requests, and shed counts per route class (this worker only)
+    """
+    return admission_controller.stats()
+
+@router.get("/admin/profile/cpu", response_class=PlainTextResponse)
+async def capture_cpu_profile(seconds: float = 10, interval_ms: Optional[float] = None, include_idle: bool = False):
+    """
+    Sample every thread of this worker for the given seconds and return collapsed stacks
+    (input for flamegraph.pl or speedscope). Parked threads are left out unless include_idle is set
+    """
+    loop = asyncio.get_running_loop()
+    try:
+        result = await loop.run_in_executor(None, sampling_profiler.capture, seconds, interval_ms, include_idle)
+    except ProfilerBusyError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    return PlainTextResponse(
+        format_collapsed(result["stacks"]),
+        headers={
+            "X-Profile-Samples": str(result["samples"]),
+            "X-Profile-Seconds": str(result["seconds"]),
+            "X-Profile-Worker": str(result["worker_id"])
+        }
+    )
+
+@router.get("/admin/profiles")
+async def list_request_profiles():
+    """
+    Requests profiled via the X-Profile header, newest first
+    """
+    return {"profiles": request_profiles.list()}
+
+@router.get("/admin/profiles/{profile_id}")
+async def get_request_profile(profile_id: str, format: str = "json"):
+    """
+    cProfile breakdown of one request, as JSON rows or pstats text (format=text)
+    """
+    profile = request_profiles.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found on this worker")
+    if format == "text":
+        return PlainTextResponse(profile["text"])
+    return profile
+
+@router.get("/admin/tracemalloc")
+async def get_tracemalloc_status():
+    """
+    Whether allocation tracing is on, traced memory and the stored snapshots
+    """
+    return allocation_tracker.status()
+
+@router.post("/admin/tracemalloc/start")
+async def start_tracemalloc(frames: int = 10):
+    """
+    Start tracing allocations; this slows every allocation down until stopped
+    """
+    return allocation_tracker.start(min(max(frames, 1), 50))
+
+@router.delete("/admin/tracemalloc")
+async def stop_tracemalloc():
+    """
+    Stop tracing and discard the snapshots
+    """
+    allocation_tracker.stop()
+    return {"message": "Allocation tracing stopped"}
+
+@router.post("/admin/tracemalloc/snapshots")
+async def take_tracemalloc_snapshot(limit: int = 10, group_by: str = "lineno"):
+    """
+    Take a snapshot and return its largest allocation sites
+    """
+    if group_by not in GROUP_BY:
+        raise HTTPException(status_code=400, detail=f"group_by must be one of {', '.join(GROUP_BY)}")
+    loop = asyncio.get_running_loop()
+    try:
+        snapshot = await loop.run_in_executor(None, allocation_tracker.snapshot)
+        top = await loop.run_in_executor(None, allocation_tracker.top, snapshot["id"], group_by, limit)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return {**snapshot, "top": top}
+
+@router.get("/admin/tracemalloc/diff")
+async def diff_tracemalloc_snapshots(base: int, current: int, limit: int = 25, group_by: str = "lineno"):
+    """
+    Allocation growth between two snapshots, largest change first
+    """
+    if group_by not in GROUP_BY:
+        raise HTTPException(status_code=400, detail=f"group_by must be one of {', '.join(GROUP_BY)}")
+    loop = asyncio.get_running_loop()
+    try:
+        differences = await loop.run_in_executor(None, allocation_tracker.diff, base, current, group_by, limit)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e.args[0]))
+    return {"base": base, "current": current, "group_by": group_by, "differences": differences}
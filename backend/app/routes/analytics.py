@@ -0,0 +1,49 @@
+from fastapi import APIRouter, HTTPException
+from datetime import datetime, timedelta
+from typing import Optional
+
+from app.services.geo_aggregator import geo_aggregator
+from app.utils.dates import as_utc, utc_now
+
+router = APIRouter()
+
+@router.get("/analytics/geo")
+async def get_geo_risk(
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    level: str = "location",
+    min_transactions: int = 1
+):
+    """
+    Per-store/region transaction counts, fraud counts and mean risk for the map heatmap
+    """
+    if level not in ("location", "region"):
+        raise HTTPException(status_code=400, detail="level must be 'location' or 'region'")
+    
+    # Naive bounds are taken as UTC, so they compare with aware ones
+    end_date = as_utc(end_date) if end_date else utc_now()
+    start_date = as_utc(start_date) if start_date else end_date - timedelta(hours=24)
+    
+    if start_date > end_date:
+        raise HTTPException(status_code=400, detail="start_date must not be after end_date")
+    
+    try:
+        rows, cache_hit = geo_aggregator.query(start_date, end_date, level=level)
+        
+        return {
+            "level": level,
+            "start_date": start_date.isoformat(),
+            "end_date": end_date.isoformat(),
+            "locations": [row for row in rows if row["transactions"] >= min_transactions],
+            "cache_hit": cache_hit
+        }
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Geo analytics failed: {str(e)}")
+
+@router.get("/analytics/geo/stats")
+async def get_geo_stats():
+    """
+    Geo aggregate size and cache statistics
+    """
+    return geo_aggregator.stats()
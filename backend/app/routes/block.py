@@ -4,6 +4,8 @@ from typing import List
 
 from app.models.schemas import BlockUserRequest, BlockUserResponse, BlockedUser
 from app.services.supabase_client import add_to_blocklist, get_blocklist, remove_from_blocklist
+from app.services.retrieval_index import index_blocked_user, retrieval_index
+from app.services.dashboard_aggregator import dashboard_aggregator
 
 router = APIRouter()
 
@@ -15,6 +17,8 @@ async def block_user(request: BlockUserRequest):
     try:
         # Add to Supabase blocklist
         block_record = await add_to_blocklist(request)
+        index_blocked_user(request.user_id, request.reason, request.risk_score, request.blocked_by)
+        dashboard_aggregator.record_block()
         
         response = BlockUserResponse(
             success=True,
@@ -60,6 +64,8 @@ async def unblock_user(user_id: str, reason: str = "Manual review completed"):
         success = await remove_from_blocklist(user_id, reason)
         
         if success:
+            retrieval_index.remove(f"block:{user_id}")
+            dashboard_aggregator.record_unblock()
             return {"message": f"User {user_id} successfully unblocked", "success": True}
         else:
             raise HTTPException(status_code=404, detail="User not found in blocklist")
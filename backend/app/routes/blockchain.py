@@ -3,13 +3,12 @@ from datetime import datetime
 from typing import List, Optional
 
 from app.models.schemas import BlockchainLogRequest, BlockchainLogResponse
-from app.services.blockchain import BlockchainLogger
+from app.services.blockchain import blockchain_logger
+from app.services.audit_ledger import audit_ledger
+from app.services.bulkhead import render_bulkhead, BulkheadFullError
 
 router = APIRouter()
 
-# Initialize blockchain service
-blockchain_logger = BlockchainLogger()
-
 @router.post("/log-to-blockchain", response_model=BlockchainLogResponse)
 async def log_fraud_event(request: BlockchainLogRequest):
     """
@@ -44,7 +43,7 @@ async def get_blockchain_logs(
     action_filter: Optional[str] = None
 ):
     """
-    Retrieve fraud events from blockchain
+    Retrieve fraud events from the audit ledger
     """
     try:
         logs = await blockchain_logger.get_fraud_logs(
@@ -60,6 +59,8 @@ async def get_blockchain_logs(
             "network": "Polygon Mumbai"
         }
         
+    except BulkheadFullError:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Log retrieval failed: {str(e)}")
 
@@ -121,4 +122,52 @@ async def verify_blockchain_event(tx_hash: str, expected_data: dict):
         }
         
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Event verification failed: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Event verification failed: {str(e)}")
+
+@router.get("/ledger/head")
+async def get_ledger_head():
+    """
+    Get this worker's ledger head and the head of every worker's chain
+    """
+    try:
+        return await render_bulkhead.run(audit_ledger.head)
+        
+    except BulkheadFullError:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Ledger head retrieval failed: {str(e)}")
+
+@router.get("/ledger/verify")
+async def verify_ledger(start_seq: Optional[int] = None, end_seq: Optional[int] = None):
+    """
+    Verify every worker's audit ledger chain, optionally restricted to a sequence range
+    """
+    try:
+        if start_seq is not None and end_seq is not None and start_seq > end_seq:
+            raise HTTPException(status_code=400, detail="start_seq must not exceed end_seq")
+        
+        # Verification hashes whole segments, keep it off the event loop
+        return await render_bulkhead.run(audit_ledger.verify, start_seq, end_seq)
+        
+    except (HTTPException, BulkheadFullError):
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Ledger verification failed: {str(e)}")
+
+@router.post("/ledger/anchor")
+async def anchor_ledger():
+    """
+    Anchor the current ledger head hash on the blockchain
+    """
+    try:
+        anchor = await audit_ledger.anchor(blockchain_logger)
+        
+        if not anchor:
+            raise HTTPException(status_code=409, detail="Nothing to anchor or blockchain not configured")
+        
+        return anchor
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Ledger anchoring failed: {str(e)}")
\ No newline at end of file
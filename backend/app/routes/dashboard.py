@@ -0,0 +1,127 @@
+from fastapi import APIRouter, HTTPException
+from datetime import datetime
+from typing import Dict, Any, Callable, Awaitable
+import asyncio
+import time
+import os
+
+from app.services.dashboard_aggregator import dashboard_aggregator
+from app.services.supabase_client import get_blocklist
+from app.services.blockchain import blockchain_logger
+from app.services.audit_ledger import audit_ledger
+from app.routes.score import MODEL_INFO
+
+router = APIRouter()
+
+DEFAULT_WIDGET_TIMEOUT_MS = float(os.getenv("DASHBOARD_WIDGET_TIMEOUT_MS", 400))
+DASHBOARD_LIST_LIMIT = int(os.getenv("DASHBOARD_LIST_LIMIT", 10))
+
+async def fetch_summary() -> Dict[str, Any]:
+    return dashboard_aggregator.summary()
+
+async def fetch_blocklist() -> Any:
+    blocked_users = await get_blocklist(limit=DASHBOARD_LIST_LIMIT, status="active")
+    return [
+        {
+            "user_id": user.user_id,
+            "reason": user.reason,
+            "risk_score": user.risk_score,
+            "blocked_at": user.blocked_at.isoformat()
+        }
+        for user in blocked_users
+    ]
+
+async def fetch_blockchain_logs() -> Any:
+    logs = await blockchain_logger.get_fraud_logs(limit=DASHBOARD_LIST_LIMIT)
+    return {"logs": logs, "contract_address": blockchain_logger.contract_address}
+
+async def fetch_ledger_head() -> Dict[str, Any]:
+    loop = asyncio.get_event_loop()
+    return await loop.run_in_executor(None, audit_ledger.head)
+
+async def fetch_model_info() -> Dict[str, Any]:
+    return MODEL_INFO
+
+# name -> (fetcher, default deadline in ms)
+WIDGETS: Dict[str, tuple] = {
+    "summary": (fetch_summary, DEFAULT_WIDGET_TIMEOUT_MS),
+    "blocklist": (fetch_blocklist, DEFAULT_WIDGET_TIMEOUT_MS),
+    "blockchain_logs": (fetch_blockchain_logs, DEFAULT_WIDGET_TIMEOUT_MS * 2),
+    "ledger": (fetch_ledger_head, DEFAULT_WIDGET_TIMEOUT_MS),
+    "model_info": (fetch_model_info, DEFAULT_WIDGET_TIMEOUT_MS)
+}
+
+class WidgetCache:
+    """Last good value per widget plus at most one in-flight refresh.
+
+    A refresh that misses its deadline keeps running in the background and
+    updates the cache when it finishes, so the next dashboard load gets a
+    fresh value without piling up duplicate calls to a slow dependency.
+    """
+
+    def __init__(self):
+        self._values: Dict[str, tuple] = {}
+        self._refreshing: Dict[str, asyncio.Task] = {}
+
+    def refresh(self, name: str, fetcher: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+        task = self._refreshing.get(name)
+        if task is None or task.done():
+            task = asyncio.get_event_loop().create_task(self._fetch(name, fetcher))
+            # Failures are reported by load_widget; mark them retrieved here
+            # in case the caller already gave up on this refresh
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            self._refreshing[name] = task
+        return task
+
+    async def _fetch(self, name: str, fetcher: Callable[[], Awaitable[Any]]) -> Any:
+        value = await fetcher()
+        self._values[name] = (value, time.time())
+        return value
+
+    def last(self, name: str):
+        return self._values.get(name)
+
+widget_cache = WidgetCache()
+
+async def load_widget(name: str, fetcher: Callable[[], Awaitable[Any]], timeout_ms: float) -> tuple:
+    """Return (value, meta) for one widget, falling back to its last good value"""
+    started = time.perf_counter()
+    task = widget_cache.refresh(name, fetcher)
+
+    try:
+        value = await asyncio.wait_for(asyncio.shield(task), timeout=timeout_ms / 1000)
+        status, error = "fresh", None
+    except Exception as e:
+        error = "timeout" if isinstance(e, asyncio.TimeoutError) else str(e)
+        cached = widget_cache.last(name)
+        if cached:
+            value, cached_at = cached
+            status = "stale"
+        else:
+            value, status = None, "unavailable"
+
+    meta = {"status": status, "ms": round((time.perf_counter() - started) * 1000, 1)}
+    if status == "stale":
+        meta["age_seconds"] = round(time.time() - cached_at, 1)
+    if error:
+        meta["error"] = error
+    return value, meta
+
+@router.get("/dashboard")
+async def get_dashboard():
+    """
+    Load every dashboard widget in one round trip; slow widgets return stale or partial data
+    """
+    try:
+        results = await asyncio.gather(*[
+            load_widget(name, fetcher, timeout_ms) for name, (fetcher, timeout_ms) in WIDGETS.items()
+        ])
+
+        return {
+            "widgets": {name: value for name, (value, _) in zip(WIDGETS, results)},
+            "meta": {name: meta for name, (_, meta) in zip(WIDGETS, results)},
+            "generated_at": datetime.now().isoformat()
+        }
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Dashboard loading failed: {str(e)}")
@@ -1,15 +1,32 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from datetime import datetime
+from typing import Dict, List
+import asyncio
+import json
+import os
 
-from app.models.schemas import ExplanationRequest, ExplanationResponse
-from app.services.groq_client import GroqExplainer
-from app.services.ml_engine import FraudMLEngine
+from app.models.schemas import (
+    ExplanationRequest, ExplanationResponse,
+    AnalystQuestionRequest, AnalystQuestionResponse
+)
+from app.services.explanation_cache import ExplanationCache
+from app.services.explanation_service import explanation_service
+from app.services.explanation_precompute import explanation_precomputer
+from app.services.retrieval_index import retrieval_index, bootstrap_retrieval_index, index_explanation
 
 router = APIRouter()
 
-# Initialize services
-groq_explainer = GroqExplainer()
-ml_engine = FraudMLEngine()
+# Shared with background precomputation
+explanation_cache = explanation_service.cache
+groq_explainer = explanation_service.groq_explainer
+ml_engine = explanation_service.ml_engine
+
+# Below this risk score the deterministic template is good enough
+LLM_RISK_THRESHOLD = float(os.getenv("EXPLAIN_LLM_RISK_THRESHOLD", 0.8))
+BATCH_LLM_CONCURRENCY = int(os.getenv("EXPLAIN_BATCH_LLM_CONCURRENCY", 4))
+BATCH_SHAP_CHUNK = int(os.getenv("EXPLAIN_BATCH_SHAP_CHUNK", 32))
+RETRIEVAL_TOP_K = int(os.getenv("ANALYST_RETRIEVAL_TOP_K", 5))
 
 @router.post("/explain", response_model=ExplanationResponse)
 async def explain_fraud_decision(request: ExplanationRequest):
@@ -17,36 +34,202 @@ async def explain_fraud_decision(request: ExplanationRequest):
     Generate AI-powered explanation for fraud detection decision
     """
     try:
-        # Get SHAP values for feature importance
-        shap_explanation = ml_engine.get_shap_explanation(request.transaction_data)
+        entry = await explanation_service.explain(request)
+        return build_explanation_response(request.transaction_id, entry)
         
-        # Generate human-readable explanation using Groq
-        ai_explanation = await groq_explainer.generate_explanation(
-            transaction_id=request.transaction_id,
-            risk_score=request.risk_score,
-            flags=request.flags,
-            shap_values=shap_explanation,
-            transaction_data=request.transaction_data
-        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Explanation generation failed: {str(e)}")
+
+@router.post("/explain/batch")
+async def explain_fraud_decisions_batch(requests: List[ExplanationRequest]):
+    """
+    Explain many transactions at once, streaming NDJSON results as they complete
+    """
+    return StreamingResponse(stream_batch_explanations(requests), media_type="application/x-ndjson")
+
+async def stream_batch_explanations(requests: List[ExplanationRequest]):
+    """
+    Explain a batch with each transaction_id and each risk signature computed once. Requests are
+    grouped by transaction_id; cached groups are served first. SHAP runs in bulk, one llm bulkhead
+    call per chunk of BATCH_SHAP_CHUNK groups, and every group of a chunk starts as soon as its
+    SHAP is ready, so later chunks overlap LLM calls for earlier ones. Text is then shared by risk
+    signature: a template below LLM_RISK_THRESHOLD, otherwise one LLM call per signature. Each
+    group's result is fanned out to all of its lines; a failed group gets error lines instead of
+    ending the stream
+    """
+    llm_semaphore = asyncio.Semaphore(BATCH_LLM_CONCURRENCY)
+    signature_texts: Dict[tuple, asyncio.Task] = {}
+    results: asyncio.Queue = asyncio.Queue()
+    
+    # transaction_id -> its requests, in first-seen order; the first one is explained for all
+    groups: Dict[str, List[ExplanationRequest]] = {}
+    for request in requests:
+        groups.setdefault(request.transaction_id, []).append(request)
+    
+    async def text_for(request: ExplanationRequest, shap_explanation: dict, signature: str, use_llm: bool):
+        async def generate():
+            if not use_llm:
+                return await explanation_service.signature_text(request, shap_explanation, signature, use_llm=False)
+            async with llm_semaphore:
+                return await explanation_service.signature_text(request, shap_explanation, signature)
+        
+        key = (signature, use_llm)
+        if key not in signature_texts:
+            signature_texts[key] = asyncio.ensure_future(generate())
+        # Shielded so one waiting group going away does not cancel the text for the others
+        return await asyncio.shield(signature_texts[key])
+    
+    async def explain_group(transaction_id: str, shap_explanation: dict) -> str:
+        request = groups[transaction_id][0]
+        try:
+            signature = ExplanationCache.risk_signature(request.risk_score, request.flags, shap_explanation)
+            use_llm = request.risk_score >= LLM_RISK_THRESHOLD
+            explanation, generated_by = await text_for(request, shap_explanation, signature, use_llm)
+            
+            entry = explanation_service.build_entry(request, shap_explanation, explanation, generated_by)
+            index_explanation(transaction_id, request.risk_score, explanation, entry["key_factors"])
+            explanation_cache.put(transaction_id, signature, entry, risk_score=request.risk_score)
+            return _batch_line(transaction_id, entry, "llm" if use_llm else "template") * len(groups[transaction_id])
         
-        # Extract key factors from SHAP analysis
-        key_factors = ml_engine.get_top_risk_factors(shap_explanation)
+        except Exception as e:
+            return _error_line(transaction_id, e) * len(groups[transaction_id])
+    
+    async def explain_chunk(transaction_ids: List[str]):
+        try:
+            shap_explanations = await explanation_service.compute_shap_batch(
+                [groups[transaction_id][0].transaction_data for transaction_id in transaction_ids]
+            )
+        except Exception as e:
+            for transaction_id in transaction_ids:
+                results.put_nowait(_error_line(transaction_id, e) * len(groups[transaction_id]))
+            return
         
-        # Generate recommendations
-        recommendations = generate_recommendations(request.risk_score, request.flags)
+        for next_done in asyncio.as_completed([
+            explain_group(transaction_id, shap_explanation)
+            for transaction_id, shap_explanation in zip(transaction_ids, shap_explanations)
+        ]):
+            results.put_nowait(await next_done)
+    
+    cached_lines = []
+    pending = []
+    for transaction_id, group in groups.items():
+        cached = explanation_cache.peek(transaction_id)
+        if cached:
+            cached_lines.append(_batch_line(transaction_id, cached, "cache") * len(group))
+        else:
+            pending.append(transaction_id)
+    
+    chunks = [
+        asyncio.create_task(explain_chunk(pending[start:start + BATCH_SHAP_CHUNK]))
+        for start in range(0, len(pending), BATCH_SHAP_CHUNK)
+    ]
+    
+    try:
+        for lines in cached_lines:
+            yield lines
+        
+        for _ in pending:
+            yield await results.get()
+    finally:
+        # Client disconnected mid-stream: stop spending LLM capacity
+        for task in chunks + list(signature_texts.values()):
+            task.cancel()
+
+def _error_line(transaction_id: str, error: Exception) -> str:
+    return json.dumps({"transaction_id": transaction_id, "error": f"Explanation generation failed: {str(error)}"}) + "\n"
+
+def _batch_line(transaction_id: str, entry: dict, source: str) -> str:
+    response = build_explanation_response(transaction_id, entry)
+    return json.dumps({**response.model_dump(mode="json"), "source": source}) + "\n"
+
+@router.post("/explain/ask", response_model=AnalystQuestionResponse)
+async def ask_analyst_question(request: AnalystQuestionRequest):
+    """
+    Answer a fraud analyst question
+    """
+    try:
+        answer = await groq_explainer.generate_analyst_response(request.question, await build_analyst_context(request))
         
-        response = ExplanationResponse(
-            transaction_id=request.transaction_id,
-            explanation=ai_explanation,
-            key_factors=key_factors,
-            recommendations=recommendations,
+        return AnalystQuestionResponse(
+            question=request.question,
+            answer=answer,
             generated_at=datetime.now()
         )
         
-        return response
-        
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Explanation generation failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Analyst response failed: {str(e)}")
+
+@router.post("/explain/ask/stream")
+async def ask_analyst_question_stream(request: AnalystQuestionRequest, http_request: Request):
+    """
+    Answer a fraud analyst question, streaming tokens over Server-Sent Events
+    """
+    async def event_stream():
+        tokens = groq_explainer.stream_analyst_response(request.question, await build_analyst_context(request))
+        try:
+            async for token in tokens:
+                if await http_request.is_disconnected():
+                    break
+                yield f"data: {json.dumps({'token': token})}\n\n"
+            
+            yield f"event: done\ndata: {json.dumps({'generated_at': datetime.now().isoformat()})}\n\n"
+        except Exception as e:
+            # The answer was cut off upstream; tell the client it is incomplete
+            yield f"event: error\ndata: {json.dumps({'error': f'Analyst response failed: {str(e)}'})}\n\n"
+        finally:
+            # Closes the upstream completion when the client goes away
+            await tokens.aclose()
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get("/explain/retrieval/search")
+async def search_retrieval_index(query: str, k: int = RETRIEVAL_TOP_K):
+    """
+    Search the local retrieval index used to ground analyst answers
+    """
+    try:
+        await bootstrap_retrieval_index()
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Retrieval index is not loaded yet: {str(e)}")
+    return {"results": retrieval_index.search(query, k=k), **retrieval_index.stats()}
+
+async def build_analyst_context(request: AnalystQuestionRequest) -> dict:
+    """
+    Attach the most relevant snippets of our own fraud data to the question context
+    """
+    try:
+        await bootstrap_retrieval_index()
+    except Exception as e:
+        # Answer from the documents indexed live so far; the next question retries the load
+        print(f"Retrieval index bootstrap failed: {e}")
+    
+    snippets = [hit["text"] for hit in retrieval_index.search(request.question, k=RETRIEVAL_TOP_K)]
+    return {**(request.context or {}), "snippets": snippets}
+
+@router.get("/explain/cache/stats")
+async def get_explanation_cache_stats():
+    """
+    Get explanation cache hit rates and LLM call volume
+    """
+    return explanation_cache.stats()
+
+@router.get("/explain/precompute/stats")
+async def get_precompute_stats():
+    """
+    Get background explanation precomputation queue statistics
+    """
+    return explanation_precomputer.stats()
+
+@router.get("/explain/llm/stats")
+async def get_llm_stats():
+    """
+    Get LLM client token, latency and circuit breaker counters
+    """
+    return groq_explainer.get_client_stats()
 
 @router.get("/explain/templates")
 async def get_explanation_templates():
@@ -62,28 +245,14 @@ async def get_explanation_templates():
         "refund_pattern": "Suspicious refund activity detected that may indicate return fraud."
     }
 
-def generate_recommendations(risk_score: float, flags: list) -> list:
+def build_explanation_response(transaction_id: str, entry: dict) -> ExplanationResponse:
     """
-    Generate actionable recommendations based on risk factors
+    Build an explanation response from a cached or freshly generated entry
     """
-    recommendations = []
-    
-    if risk_score >= 0.9:
-        recommendations.append("Immediately block user and flag for manual review")
-        recommendations.append("Contact user via verified phone number to confirm transaction")
-    elif risk_score >= 0.7:
-        recommendations.append("Require additional authentication before processing")
-        recommendations.append("Monitor user activity closely for next 24 hours")
-    elif risk_score >= 0.5:
-        recommendations.append("Apply enhanced monitoring to user account")
-        recommendations.append("Consider step-up authentication for large transactions")
-    
-    # Flag-specific recommendations
-    if "unusual_amount" in flags:
-        recommendations.append("Verify transaction with user via SMS or email")
-    if "new_device" in flags:
-        recommendations.append("Require device verification before processing")
-    if "high_velocity" in flags:
-        recommendations.append("Implement temporary transaction limits")
-    
-    return recommendations
\ No newline at end of file
+    return ExplanationResponse(
+        transaction_id=transaction_id,
+        explanation=entry["explanation"],
+        key_factors=entry["key_factors"],
+        recommendations=entry["recommendations"],
+        generated_at=entry["generated_at"]
+    )
\ No newline at end of file
@@ -0,0 +1,58 @@
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+from datetime import datetime, timedelta
+from typing import Optional
+import os
+
+from app.services.exporter import EXPORT_FORMATS, iter_csv, iter_ndjson, iter_parquet, stream_on_db_bulkhead
+from app.services.supabase_client import iter_scored_transactions
+from app.utils.dates import as_utc, utc_now
+
+router = APIRouter()
+
+EXPORT_PAGE_SIZE = int(os.getenv("EXPORT_PAGE_SIZE", 1000))
+EXPORT_ROW_GROUP_SIZE = int(os.getenv("EXPORT_ROW_GROUP_SIZE", 10000))
+EXPORT_MAX_DAYS = int(os.getenv("EXPORT_MAX_DAYS", 366))
+
+@router.get("/export")
+async def export_scored_transactions(
+    format: str = "csv",
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    min_risk_score: Optional[float] = None
+):
+    """
+    Stream scored transactions (fraud_scores joined with transactions) as CSV, NDJSON or Parquet
+    """
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported format. Use one of: {', '.join(EXPORT_FORMATS)}")
+    
+    # Compared and sent to timestamptz columns as UTC, whether or not the client gave an offset
+    end_date = as_utc(end_date) if end_date else utc_now()
+    start_date = as_utc(start_date) if start_date else end_date - timedelta(days=7)
+    
+    if start_date > end_date:
+        raise HTTPException(status_code=400, detail="start_date must not be after end_date")
+    if end_date - start_date > timedelta(days=EXPORT_MAX_DAYS):
+        raise HTTPException(status_code=400, detail=f"Export range cannot exceed {EXPORT_MAX_DAYS} days")
+    
+    # Keyset-paged rows are pulled lazily as the client reads, so memory
+    # holds one page (one row group for Parquet) regardless of range size
+    rows = iter_scored_transactions(start_date, end_date, min_risk_score=min_risk_score, page_size=EXPORT_PAGE_SIZE)
+    
+    if format == "csv":
+        body = iter_csv(rows, chunk_size=EXPORT_PAGE_SIZE)
+    elif format == "ndjson":
+        body = iter_ndjson(rows, chunk_size=EXPORT_PAGE_SIZE)
+    else:
+        body = iter_parquet(rows, row_group_size=EXPORT_ROW_GROUP_SIZE)
+    
+    media_type, extension = EXPORT_FORMATS[format]
+    filename = f"scored_transactions_{start_date.strftime('%Y%m%d')}_{end_date.strftime('%Y%m%d')}.{extension}"
+    
+    # Pages are fetched and encoded on the db bulkhead, one output chunk at a time
+    return StreamingResponse(
+        stream_on_db_bulkhead(body, format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
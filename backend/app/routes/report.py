@@ -1,26 +1,22 @@
 from fastapi import APIRouter, HTTPException
 from fastapi.responses import FileResponse
 from datetime import datetime, timedelta
-import uuid
 import os
 
-from app.models.schemas import ReportRequest, ReportResponse
-from app.services.pdf_generator import PDFReportGenerator
-from app.services.supabase_client import get_fraud_analytics_data
+from app.models.schemas import ReportRequest, ReportJobResponse, ReportJobStatus
+from app.services.report_jobs import report_jobs
+from app.services.dashboard_aggregator import dashboard_aggregator
 
 router = APIRouter()
 
-# Initialize PDF generator
-pdf_generator = PDFReportGenerator()
-
-@router.post("/generate-report", response_model=ReportResponse)
+@router.post("/generate-report", response_model=ReportJobResponse, status_code=202)
 async def generate_fraud_report(request: ReportRequest):
     """
-    Generate comprehensive fraud analysis report
+    Queue a fraud analysis report; poll status_url until it completes
     """
     try:
-        # Calculate date range
-        end_date = request.end_date or datetime.now()
+        # Calculate date range; relative ranges end on a cache time bucket
+        end_date = request.end_date or report_jobs.align_end_date(datetime.now())
         
         if request.date_range == "1d":
             start_date = end_date - timedelta(days=1)
@@ -33,90 +29,97 @@ async def generate_fraud_report(request: ReportRequest):
         else:
             start_date = request.start_date or (end_date - timedelta(days=7))
         
-        # Get analytics data from Supabase
-        analytics_data = await get_fraud_analytics_data(
-            start_date=start_date,
-            end_date=end_date,
-            filters=request.filters
-        )
-        
-        # Generate PDF report
-        report_id = str(uuid.uuid4())
-        pdf_path = await pdf_generator.generate_report(
+        # Reuses an unexpired report for the same request and data, otherwise
+        # data fetch and PDF rendering happen in the background
+        job = await report_jobs.submit(
             report_type=request.report_type,
-            data=analytics_data,
             start_date=start_date,
             end_date=end_date,
-            report_id=report_id
+            filters=request.filters
         )
         
-        # Get file size
-        file_size = os.path.getsize(pdf_path)
-        file_size_mb = f"{file_size / (1024 * 1024):.2f} MB"
-        
-        # Generate download URL (in production, this would be a signed URL)
-        download_url = f"/api/report/download/{report_id}"
-        
-        response = ReportResponse(
-            report_id=report_id,
-            download_url=download_url,
-            generated_at=datetime.now(),
-            file_size=file_size_mb,
-            expires_at=datetime.now() + timedelta(hours=24)
+        return ReportJobResponse(
+            job_id=job["job_id"],
+            report_id=job["job_id"],
+            status=job["status"],
+            cache_hit=job["cache_hit"],
+            status_url=f"/api/report/jobs/{job['job_id']}",
+            download_url=job["download_url"],
+            submitted_at=job["submitted_at"],
+            expires_at=job["expires_at"]
         )
         
-        return response
-        
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Report generation failed: {str(e)}")
 
+@router.get("/report/jobs/{job_id}", response_model=ReportJobStatus)
+async def get_report_job(job_id: str):
+    """
+    Get status, progress and timings of a report job
+    """
+    job = report_jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Report job not found")
+    
+    return job
+
 @router.get("/report/download/{report_id}")
 async def download_report(report_id: str):
     """
     Download generated report PDF
     """
     try:
-        pdf_path = f"reports/{report_id}.pdf"
+        job = report_jobs.get(report_id)
+        if job and job["status"] != "completed":
+            raise HTTPException(status_code=409, detail=f"Report is not ready (status: {job['status']})")
+        if job and report_jobs.is_expired(job):
+            raise HTTPException(status_code=410, detail="Report has expired")
+        
+        pdf_path = report_jobs.pdf_path(report_id)
         
         if not os.path.exists(pdf_path):
             raise HTTPException(status_code=404, detail="Report not found or expired")
         
+        if job:
+            report_jobs.touch(job)
+        
         return FileResponse(
             path=pdf_path,
             filename=f"fraud_report_{report_id}.pdf",
             media_type="application/pdf"
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Report download failed: {str(e)}")
 
 @router.get("/report/list")
 async def list_reports(limit: int = 20, offset: int = 0):
     """
-    List previously generated reports
+    List report jobs, newest first
     """
     try:
-        # In production, this would query a reports table in Supabase
+        jobs, total = await report_jobs.list(limit=limit, offset=offset)
         reports = [
             {
-                "report_id": "rpt_001",
-                "report_type": "summary",
-                "generated_at": "2024-01-15T14:00:00",
-                "file_size": "2.3 MB",
-                "status": "completed"
-            },
-            {
-                "report_id": "rpt_002",
-                "report_type": "detailed",
-                "generated_at": "2024-01-15T10:30:00",
-                "file_size": "4.1 MB",
-                "status": "completed"
+                "report_id": job["job_id"],
+                "report_type": job["report_type"],
+                "status": job["status"],
+                "progress": job["progress"],
+                "submitted_at": job["submitted_at"],
+                "generated_at": job["completed_at"] if job["status"] == "completed" else None,
+                "file_size": f"{job['file_size_bytes'] / (1024 * 1024):.2f} MB" if job["file_size_bytes"] else None,
+                "fetch_ms": job["fetch_ms"],
+                "render_ms": job["render_ms"],
+                "error": job["error"]
             }
+            for job in jobs
         ]
         
         return {
             "reports": reports,
-            "total": len(reports),
+            "total": total,
             "limit": limit,
             "offset": offset
         }
@@ -124,20 +127,26 @@ async def list_reports(limit: int = 20, offset: int = 0):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Report listing failed: {str(e)}")
 
+@router.get("/report/cache/stats")
+async def get_report_cache_stats():
+    """
+    Report cache hit rate and disk usage
+    """
+    return await report_jobs.stats()
+
 @router.delete("/report/{report_id}")
 async def delete_report(report_id: str):
     """
     Delete a generated report
     """
     try:
-        pdf_path = f"reports/{report_id}.pdf"
-        
-        if os.path.exists(pdf_path):
-            os.remove(pdf_path)
+        if report_jobs.delete(report_id):
             return {"message": f"Report {report_id} deleted successfully"}
         else:
             raise HTTPException(status_code=404, detail="Report not found")
             
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Report deletion failed: {str(e)}")
 
@@ -147,28 +156,8 @@ async def get_analytics_summary():
     Get summary analytics for dashboard
     """
     try:
-        # This would typically aggregate data from Supabase
-        summary = {
-            "total_transactions": 245000,
-            "fraud_detected": 1247,
-            "fraud_rate": 0.51,
-            "blocked_users": 342,
-            "high_risk_alerts": 89,
-            "avg_risk_score": 0.23,
-            "top_risk_factors": [
-                "Unusual amount",
-                "New device",
-                "High velocity",
-                "Location anomaly"
-            ],
-            "trend_data": {
-                "fraud_rate_trend": "+2.3%",
-                "detection_accuracy": "94.2%",
-                "false_positive_rate": "3.1%"
-            }
-        }
-        
-        return summary
+        # Served from in-process running totals; no database round trip
+        return dashboard_aggregator.summary()
         
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Analytics summary failed: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Analytics summary failed: {str(e)}")
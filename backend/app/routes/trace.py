@@ -1,12 +1,17 @@
 from fastapi import APIRouter
 import requests
+import os
+
+from app.services.bulkhead import chain_bulkhead
+from app.services.metrics import track_external
 
 router = APIRouter()
 
 ALCHEMY_SEPOLIA_URL = "https://eth-sepolia.g.alchemy.com/v2/Ptov-ZXX5VTeL_67gBMMzJz3bdzcBeFx"
+TRACE_TIMEOUT = float(os.getenv("TRACE_TIMEOUT_SECONDS", 30))
 
 @router.get("/trace/{tx_hash}")
-def trace_transaction(tx_hash: str):
+async def trace_transaction(tx_hash: str):
     payload = {
         "id": 1,
         "jsonrpc": "2.0",
@@ -18,9 +23,14 @@ def trace_transaction(tx_hash: str):
         "content-type": "application/json"
     }
 
+    def fetch_trace():
+        with track_external("web3", "debug_traceTransaction"):
+            response = requests.post(ALCHEMY_SEPOLIA_URL, json=payload, headers=headers, timeout=TRACE_TIMEOUT)
+            response.raise_for_status()
+            return response.json()
+
     try:
-        response = requests.post(ALCHEMY_SEPOLIA_URL, json=payload, headers=headers)
-        response.raise_for_status()
-        return response.json()
+        # Traces can take seconds; they run on the chain bulkhead, not the shared threadpool
+        return await chain_bulkhead.run(fetch_trace)
     except Exception as e:
         return {"error": str(e)}
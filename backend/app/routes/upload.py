@@ -1,17 +1,22 @@
 from fastapi import APIRouter, File, UploadFile, HTTPException
 from fastapi.responses import JSONResponse
-import pandas as pd
 import io
 import uuid
+import importlib
 from datetime import datetime
 from typing import List
 
 from app.models.schemas import UploadResponse, TransactionData
-from app.utils.file_parser import parse_csv_file, validate_transaction_data
 from app.services.supabase_client import save_transactions
+from app.services.container import container
+from app.services.bulkhead import render_bulkhead, BulkheadFullError
 
 router = APIRouter()
 
+# pandas is imported by the startup warmup (or the first upload), not with the app;
+# importing it holds the GIL long enough to stall the event loop from any thread
+file_parser = container.register("file_parser", lambda: importlib.import_module("app.utils.file_parser"))
+
 @router.post("/upload", response_model=UploadResponse)
 async def upload_transaction_file(file: UploadFile = File(...)):
     try:
@@ -21,10 +26,9 @@ async def upload_transaction_file(file: UploadFile = File(...)):
         contents = await file.read()
         print("✅ File read")
 
-        df = parse_csv_file(contents)
+        # Importing pandas, parsing and row validation all block; keep them off the event loop
+        df, validated_data = await render_bulkhead.run(parse_and_validate, contents)
         print("✅ CSV parsed. Columns:", df.columns)
-
-        validated_data = validate_transaction_data(df)
         print("✅ Data validated. Sample:", validated_data[:2])
 
         file_id = str(uuid.uuid4())
@@ -41,12 +45,18 @@ async def upload_transaction_file(file: UploadFile = File(...)):
             file_id=file_id
         )
 
+    except BulkheadFullError:
+        raise
     except Exception as e:
         import traceback
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"File processing failed: {str(e)}")
 
 
+def parse_and_validate(contents: bytes):
+    df = file_parser.parse_csv_file(contents)
+    return df, file_parser.validate_transaction_data(df)
+
 @router.get("/upload/status/{file_id}")
 async def get_upload_status(file_id: str):
     """
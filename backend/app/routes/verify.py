@@ -1,23 +1,30 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from datetime import datetime
 import hashlib
 import json
 
-from app.models.schemas import VerifyReceiptRequest, VerifyReceiptResponse
-from app.services.blockchain import BlockchainLogger
-from app.services.supabase_client import get_receipt_data
+from app.models.schemas import (
+    VerifyReceiptRequest, VerifyReceiptResponse,
+    IssueReceiptRequest, IssueReceiptResponse
+)
+from app.services.blockchain import blockchain_logger
+from app.services.receipt_signer import receipt_signer
+from app.services.supabase_client import get_receipt_data, save_receipt, is_receipt_revoked, get_transaction
+from app.routes.admin import require_admin
 
 router = APIRouter()
 
-# Initialize blockchain service
-blockchain_logger = BlockchainLogger()
-
 @router.post("/verify-receipt", response_model=VerifyReceiptResponse)
 async def verify_receipt(request: VerifyReceiptRequest):
     """
     Verify receipt authenticity using blockchain records
     """
     try:
+        if request.verify_mode == "offline":
+            if not request.qr_data:
+                raise HTTPException(status_code=400, detail="Offline verification requires signed QR data")
+            return await verify_receipt_offline(parse_qr_data(request.qr_data), request.check_revocation)
+        
         # Determine verification method
         if request.qr_data:
             # Parse QR code data
@@ -71,9 +78,65 @@ async def verify_receipt(request: VerifyReceiptRequest):
         
         return response
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Receipt verification failed: {str(e)}")
 
+@router.post("/receipts/issue", response_model=IssueReceiptResponse, dependencies=[Depends(require_admin)])
+async def issue_receipt(request: IssueReceiptRequest):
+    """
+    Issue a receipt whose QR payload carries an Ed25519 signature.
+    Requires ADMIN_TOKEN; the amount and timestamp are signed from the stored transaction
+    """
+    try:
+        transaction = await get_transaction(request.transaction_id)
+        if not transaction:
+            raise HTTPException(status_code=404, detail=f"Transaction {request.transaction_id} not found")
+        if request.amount is not None and round(request.amount, 2) != round(float(transaction["amount"]), 2):
+            raise HTTPException(status_code=409, detail="Amount does not match the stored transaction")
+        
+        payload = receipt_signer.sign_receipt({
+            "transaction_id": transaction["transaction_id"],
+            "amount": transaction["amount"],
+            "timestamp": transaction["timestamp"],
+            "store": request.store
+        })
+        receipt_hash = calculate_receipt_hash(payload)
+        payload["hash"] = receipt_hash
+        
+        # Persisted so the receipt can later be revoked
+        await save_receipt({
+            **payload,
+            "receipt_hash": receipt_hash,
+            "signature": payload["sig"],
+            "key_id": payload["kid"]
+        })
+        
+        return IssueReceiptResponse(
+            qr_data=json.dumps(payload, separators=(",", ":")),
+            receipt_hash=receipt_hash,
+            key_id=payload["kid"],
+            signature=payload["sig"],
+            issued_at=datetime.now()
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Receipt issuance failed: {str(e)}")
+
+@router.get("/receipts/public-keys")
+async def get_receipt_public_keys():
+    """
+    Get the public key set used to verify signed receipts offline
+    """
+    return {
+        "algorithm": "Ed25519",
+        "active_key_id": receipt_signer.key_id,
+        "keys": receipt_signer.export_public_keys()
+    }
+
 @router.get("/verify-receipt/qr-info")
 async def get_qr_info():
     """
@@ -88,12 +151,20 @@ async def get_qr_info():
             "store",
             "hash"
         ],
+        "signed_fields": [
+            "v",
+            "kid",
+            "sig"
+        ],
         "example": {
             "transaction_id": "TXN_001234",
             "amount": 89.99,
             "timestamp": "2024-01-15T14:23:45Z",
             "store": "Store 1523",
-            "hash": "0x1234567890abcdef..."
+            "hash": "0x1234567890abcdef...",
+            "v": 1,
+            "kid": "k1",
+            "sig": "base64url Ed25519 signature"
         }
     }
 
@@ -133,10 +204,14 @@ def parse_qr_data(qr_data: str) -> dict:
     """
     try:
         # Assume QR data is JSON format
-        return json.loads(qr_data)
+        receipt_data = json.loads(qr_data)
     except json.JSONDecodeError:
         # Handle other formats if needed
         raise HTTPException(status_code=400, detail="Invalid QR code format")
+    
+    if not isinstance(receipt_data, dict):
+        raise HTTPException(status_code=400, detail="QR data must be a JSON object")
+    return receipt_data
 
 def calculate_receipt_hash(receipt_data: dict) -> str:
     """
@@ -146,6 +221,42 @@ def calculate_receipt_hash(receipt_data: dict) -> str:
     hash_input = f"{receipt_data['transaction_id']}{receipt_data['amount']}{receipt_data['timestamp']}{receipt_data['store']}"
     return hashlib.sha256(hash_input.encode()).hexdigest()
 
+async def verify_receipt_offline(receipt_data: dict, check_revocation: bool = False) -> VerifyReceiptResponse:
+    """
+    Verify a signed receipt with the cached public key set, without network I/O
+    """
+    try:
+        amount = float(receipt_data.get("amount") or 0.0)
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="Receipt amount must be a number")
+    
+    is_valid, status = receipt_signer.verify_receipt(receipt_data)
+    
+    # Revocation is the only state that needs the database
+    if is_valid and check_revocation:
+        revoked = await is_receipt_revoked(receipt_data["transaction_id"])
+        if revoked is None:
+            # Fail closed: an unreadable revocation status never verifies
+            raise HTTPException(status_code=503, detail="Revocation status is unavailable, retry later")
+        if revoked:
+            is_valid, status = False, "revoked"
+    
+    try:
+        timestamp = datetime.fromisoformat(str(receipt_data.get("timestamp")))
+    except ValueError:
+        timestamp = datetime.now()
+    
+    return VerifyReceiptResponse(
+        is_valid=is_valid,
+        transaction_id=receipt_data.get("transaction_id") or "unknown",
+        amount=amount,
+        timestamp=timestamp,
+        store=receipt_data.get("store") or "unknown",
+        blockchain_hash="",
+        status=status,
+        confirmations=0
+    )
+
 async def verify_blockchain_record(receipt_record: dict) -> dict:
     """
     Verify receipt against blockchain records
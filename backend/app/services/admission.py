@@ -0,0 +1,224 @@
+import os
+import math
+import time
+import asyncio
+from collections import deque
+from typing import Dict, List, Any, Optional, Tuple
+
+from app.services.metrics import metrics
+
+ADMISSION_QUEUE_WAIT = metrics.histogram(
+    "admission_queue_wait_seconds", "Time a request waited for admission", ("route_class",)
+)
+ADMISSION_REJECTED = metrics.counter(
+    "admission_rejected_total", "Requests shed by admission control", ("route_class", "reason")
+)
+
+# Never queued or shed: probes, scrapes, admin and docs must work during an overload
+EXEMPT_PREFIXES = ("/health", "/metrics", "/api/admin", "/docs", "/redoc", "/openapi.json")
+
+class AdmissionRejected(Exception):
+    def __init__(self, status_code: int, detail: str, retry_after: int):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = retry_after
+
+class RouteClass:
+    """Concurrency limit and FIFO queue for one class of routes"""
+
+    def __init__(self, name: str, priority: int, paths: Tuple[str, ...], limit: int, max_queue: int, queue_timeout: float, shared: bool):
+        self.name = name
+        self.priority = priority
+        self.paths = paths
+        self.limit = limit
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        # Shared classes also draw from the controller's shared pool; the critical class does not
+        self.shared = shared
+
+        self.in_flight = 0
+        self.waiters: deque = deque()
+        self.service_time = 0.1
+        self._counters = {"admitted": 0, "queued": 0, "rejected_queue_full": 0, "rejected_timeout": 0}
+
+    def retry_after(self) -> int:
+        # Time for the queue ahead to drain at the current limit
+        seconds = self.service_time * (len(self.waiters) + 1) / max(self.limit, 1)
+        return min(max(math.ceil(seconds), 1), 30)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self._counters,
+            "priority": self.priority,
+            "limit": self.limit,
+            "in_flight": self.in_flight,
+            "queued_now": len(self.waiters),
+            "max_queue": self.max_queue,
+            "queue_timeout": self.queue_timeout,
+            "service_time_ms": round(self.service_time * 1000, 1),
+            "paths": list(self.paths)
+        }
+
+class AdmissionController:
+    """Per-route-class admission with priority between classes.
+
+    Every class has its own concurrency limit and bounded queue. The
+    ``critical`` class (scoring) is limited only by its own limit, so
+    other traffic can never take its capacity. The other classes also share
+    ADMISSION_SHARED_LIMIT slots. While scoring requests are queueing, no
+    new non-critical request is admitted, and freed slots go to waiting
+    classes in priority order (critical, default, heavy).
+
+    A full queue answers 429 and a queue wait past the class timeout
+    answers 503. Both responses carry Retry-After, estimated from the
+    class's recent service time. All state is touched only from the event
+    loop, so no locks are needed.
+    """
+
+    def __init__(self):
+        self.enabled = os.getenv("ADMISSION_ENABLED", "true").lower() in ("1", "true")
+        self.shared_limit = int(os.getenv("ADMISSION_SHARED_LIMIT", 32))
+        self.shared_in_flight = 0
+
+        self.classes: List[RouteClass] = sorted([
+            _env_class("critical", 0, "/api/score", 64, 256, 0.5, shared=False),
+            _env_class("heavy", 2, "/api/score/batch,/api/score/stream,/api/score/columnar,/api/generate-report,/api/upload,/api/explain,/api/trace,/api/export,/api/ledger/verify,/api/verify-receipt/batch", 4, 8, 1.0, shared=True),
+            _env_class("default", 1, "/api/score/model-info", 32, 64, 2.0, shared=True)
+        ], key=lambda route_class: route_class.priority)
+        self.critical = self._by_name("critical")
+        self.default = self._by_name("default")
+        self._path_classes: Dict[str, Optional[RouteClass]] = {}
+
+        metrics.register_collector(self._metrics)
+
+    def _by_name(self, name: str) -> RouteClass:
+        return next(route_class for route_class in self.classes if route_class.name == name)
+
+    def classify(self, path: str) -> Optional[RouteClass]:
+        """Route class for a path, or None when the path is exempt"""
+        route_class = self._path_classes.get(path, False)
+        if route_class is not False:
+            return route_class
+
+        if path == "/" or path.startswith(EXEMPT_PREFIXES):
+            route_class = None
+        else:
+            # Longest matching prefix wins, so /api/score/batch can be heavy and
+            # /api/score/model-info default while /api/score is critical
+            matches = [
+                (len(prefix), candidate)
+                for candidate in self.classes
+                for prefix in candidate.paths
+                if path == prefix or path.startswith(prefix + "/")
+            ]
+            route_class = max(matches, key=lambda match: match[0])[1] if matches else self.default
+
+        # Bounded, since paths with ids (/api/report/{id}) would otherwise grow it forever
+        if len(self._path_classes) < 10000:
+            self._path_classes[path] = route_class
+        return route_class
+
+    def _can_admit(self, route_class: RouteClass) -> bool:
+        if route_class.in_flight >= route_class.limit:
+            return False
+        if not route_class.shared:
+            return True
+        return self.shared_in_flight < self.shared_limit and not self.critical.waiters
+
+    def _admit(self, route_class: RouteClass):
+        route_class.in_flight += 1
+        route_class._counters["admitted"] += 1
+        if route_class.shared:
+            self.shared_in_flight += 1
+
+    async def acquire(self, route_class: RouteClass):
+        """Wait for a slot in the class, or raise AdmissionRejected"""
+        if not route_class.waiters and self._can_admit(route_class):
+            self._admit(route_class)
+            return
+
+        if len(route_class.waiters) >= route_class.max_queue:
+            route_class._counters["rejected_queue_full"] += 1
+            ADMISSION_REJECTED.inc(route_class.name, "queue_full")
+            raise AdmissionRejected(429, f"Too many {route_class.name} requests in progress, retry later", route_class.retry_after())
+
+        waiter = asyncio.get_running_loop().create_future()
+        route_class.waiters.append(waiter)
+        route_class._counters["queued"] += 1
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(waiter, timeout=route_class.queue_timeout)
+        except asyncio.TimeoutError:
+            _remove(route_class.waiters, waiter)
+            route_class._counters["rejected_timeout"] += 1
+            ADMISSION_REJECTED.inc(route_class.name, "queue_timeout")
+            raise AdmissionRejected(503, f"Server is busy with {route_class.name} requests, retry later", route_class.retry_after())
+        except BaseException:
+            if waiter.done() and not waiter.cancelled():
+                # Admitted just as the client went away
+                self.release(route_class, None)
+            else:
+                _remove(route_class.waiters, waiter)
+            raise
+        finally:
+            ADMISSION_QUEUE_WAIT.observe(time.perf_counter() - started, route_class.name)
+
+    def release(self, route_class: RouteClass, service_time: Optional[float]):
+        route_class.in_flight -= 1
+        if route_class.shared:
+            self.shared_in_flight -= 1
+        if service_time is not None:
+            route_class.service_time += (service_time - route_class.service_time) * 0.1
+        self._dispatch()
+
+    def _dispatch(self):
+        # Highest priority first; a critical waiter blocks shared classes in _can_admit
+        for route_class in self.classes:
+            while route_class.waiters and self._can_admit(route_class):
+                waiter = route_class.waiters.popleft()
+                if waiter.done():
+                    continue
+                self._admit(route_class)
+                waiter.set_result(None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "shared_limit": self.shared_limit,
+            "shared_in_flight": self.shared_in_flight,
+            "classes": {route_class.name: route_class.stats() for route_class in self.classes}
+        }
+
+    def _metrics(self) -> List[tuple]:
+        return [
+            ("admission_limit", "gauge", "Concurrency limit of a route class",
+             [({"route_class": c.name}, c.limit) for c in self.classes] + [({"route_class": "shared"}, self.shared_limit)]),
+            ("admission_in_flight", "gauge", "Admitted requests still in progress",
+             [({"route_class": c.name}, c.in_flight) for c in self.classes] + [({"route_class": "shared"}, self.shared_in_flight)]),
+            ("admission_queued", "gauge", "Requests waiting for admission",
+             [({"route_class": c.name}, len(c.waiters)) for c in self.classes])
+        ]
+
+def _remove(waiters: deque, waiter: asyncio.Future):
+    try:
+        waiters.remove(waiter)
+    except ValueError:
+        pass
+
+def _env_class(name: str, priority: int, paths: str, limit: int, max_queue: int, queue_timeout: float, shared: bool) -> RouteClass:
+    """Route class configured by ADMISSION_<NAME>_{PATHS,LIMIT,QUEUE,QUEUE_TIMEOUT}"""
+    prefix = f"ADMISSION_{name.upper()}_"
+    path_list = os.getenv(prefix + "PATHS", paths)
+    return RouteClass(
+        name,
+        priority,
+        paths=tuple(path.strip().rstrip("/") for path in path_list.split(",") if path.strip()),
+        limit=int(os.getenv(prefix + "LIMIT", limit)),
+        max_queue=int(os.getenv(prefix + "QUEUE", max_queue)),
+        queue_timeout=float(os.getenv(prefix + "QUEUE_TIMEOUT", queue_timeout)),
+        shared=shared
+    )
+
+# Initialize global controller
+admission_controller = AdmissionController()
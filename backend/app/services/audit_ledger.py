@@ -0,0 +1,508 @@
+import os
+import json
+import mmap
+import hashlib
+import heapq
+import threading
+import time
+import asyncio
+from concurrent.futures import Future
+from datetime import datetime
+from typing import Dict, List, Any, Optional
+
+GENESIS_HASH = "0" * 64
+SEGMENT_SUFFIX = ".seg"
+
+class AuditLedger:
+    """Append-only, hash-chained fraud event ledger stored in local segment files.
+
+    Every record carries the hash of the previous record, so altering or
+    removing any entry breaks the chain from that point on. Appends are
+    group-committed: concurrent writers share a single write + fsync.
+
+    If a batch fails to write, its partial lines are truncated away and
+    the chain head is rewound to the last record on disk; records already
+    chained onto the failed batch fail with it. If the rollback fails too,
+    the ledger stops accepting appends.
+
+    Each process writes its own chain in ``directory``. Under the pre-fork
+    server that is ``<root>/worker-N``; head(), verify() and read() cover
+    every chain under ``root``.
+    """
+
+    def __init__(
+        self,
+        directory: Optional[str] = None,
+        segment_max_bytes: Optional[int] = None,
+        commit_interval_ms: Optional[float] = None
+    ):
+        self.root = directory or os.getenv("AUDIT_LEDGER_DIR", "ledger")
+        self.directory = self.root
+        self.segment_max_bytes = segment_max_bytes or int(os.getenv("AUDIT_LEDGER_SEGMENT_BYTES", 64 * 1024 * 1024))
+        self.commit_interval = (commit_interval_ms or float(os.getenv("AUDIT_LEDGER_COMMIT_MS", 5))) / 1000
+
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._pending: List[tuple] = []
+        self._writer: Optional[threading.Thread] = None
+        self._closed = False
+        self._opened = False
+        self._write_error: Optional[Exception] = None
+
+        self._segment_file = None
+        self._segment_size = 0
+        self._head_hash = GENESIS_HASH
+        self._next_seq = 1
+        self._last_anchor: Optional[Dict[str, Any]] = None
+
+    def append(self, event: Dict[str, Any]) -> Dict[str, Any]:
+        """Append an event and block until it is durable on disk"""
+        return self._submit(event).result()
+
+    async def append_async(self, event: Dict[str, Any]) -> Dict[str, Any]:
+        """Append an event without blocking the event loop"""
+        return await asyncio.wrap_future(self._submit(event))
+
+    def _submit(self, event: Dict[str, Any]) -> Future:
+        future: Future = Future()
+
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Audit ledger is closed")
+            if self._write_error is not None:
+                raise RuntimeError(f"Audit ledger is unavailable after a failed write: {self._write_error}")
+            self._ensure_open()
+
+            # Sequence and chain position are assigned at submit time so
+            # the order callers observe is the order on disk
+            record = {
+                "seq": self._next_seq,
+                "timestamp": datetime.now().isoformat(),
+                "prev_hash": self._head_hash,
+                "event": event
+            }
+            record["hash"] = compute_record_hash(record)
+
+            self._next_seq += 1
+            self._head_hash = record["hash"]
+            self._pending.append((record, future))
+            self._wakeup.notify()
+
+        return future
+
+    def _ensure_open(self):
+        """Recover chain head from disk and start the group-commit writer"""
+        if self._opened:
+            return
+
+        os.makedirs(self.directory, exist_ok=True)
+        segments = list_segments(self.directory)
+
+        if segments:
+            last_path = segments[-1][1]
+            _truncate_to_last_record(last_path)
+            last_record = _read_last_chained_record(self.directory)
+            if last_record:
+                self._head_hash = last_record["hash"]
+                self._next_seq = last_record["seq"] + 1
+            self._open_segment(last_path)
+        else:
+            self._open_segment(segment_path(self.directory, 1))
+
+        self._writer = threading.Thread(target=self._writer_loop, name="audit-ledger-writer", daemon=True)
+        self._writer.start()
+        self._opened = True
+
+    def _open_segment(self, path: str):
+        if self._segment_file:
+            self._segment_file.close()
+        self._segment_file = open(path, "ab")
+        self._segment_size = self._segment_file.tell()
+
+    def _writer_loop(self):
+        while True:
+            with self._lock:
+                while not self._pending and not self._closed:
+                    self._wakeup.wait()
+
+                if not self._pending and self._closed:
+                    return
+
+            # Let concurrent appenders pile up so a single fsync covers them
+            if self.commit_interval > 0 and not self._closed:
+                time.sleep(self.commit_interval)
+
+            with self._lock:
+                batch, self._pending = self._pending, []
+
+            try:
+                self._write_batch(batch)
+            except Exception as e:
+                print(f"Audit ledger write error: {e}")
+                failed = batch + self._rollback(e)
+                for _, future in failed:
+                    future.set_exception(e)
+                continue
+
+            for record, future in batch:
+                future.set_result(record)
+
+    def _write_batch(self, batch: List[tuple]):
+        # Where the batch starts, so a failed write can be cut off again
+        self._batch_start = (self._segment_file.name, self._segment_size)
+        for record, _ in batch:
+            line = json.dumps(record, separators=(",", ":"), sort_keys=True).encode() + b"\n"
+
+            if self._segment_size and self._segment_size + len(line) > self.segment_max_bytes:
+                self._segment_file.flush()
+                os.fsync(self._segment_file.fileno())
+                self._open_segment(segment_path(self.directory, record["seq"]))
+
+            self._segment_file.write(line)
+            self._segment_size += len(line)
+
+        self._segment_file.flush()
+        os.fsync(self._segment_file.fileno())
+
+    def _rollback(self, error: Exception) -> List[tuple]:
+        """Remove a failed batch from disk and rewind the chain head to the last durable record.
+
+        Returns the pending records, which were chained onto the failed
+        batch and have to fail as well.
+        """
+        start_path, start_size = self._batch_start
+        try:
+            self._segment_file.close()
+            # Segments opened while writing the failed batch hold nothing durable
+            for _, path in list_segments(self.directory):
+                if path > start_path:
+                    os.remove(path)
+            with open(start_path, "r+b") as f:
+                f.truncate(start_size)
+            self._open_segment(start_path)
+            last_record = _read_last_chained_record(self.directory)
+        except Exception as e:
+            print(f"Audit ledger rollback failed, refusing further appends: {e}")
+            last_record = None
+            with self._lock:
+                self._write_error = error
+
+        with self._lock:
+            pending, self._pending = self._pending, []
+            if self._write_error is None:
+                self._head_hash = last_record["hash"] if last_record else GENESIS_HASH
+                self._next_seq = last_record["seq"] + 1 if last_record else 1
+        return pending
+
+    def close(self):
+        """Flush pending records and stop the writer thread"""
+        with self._lock:
+            self._closed = True
+            self._wakeup.notify()
+
+        if self._writer:
+            self._writer.join()
+        if self._segment_file:
+            self._segment_file.close()
+            self._segment_file = None
+
+    def _own_head(self) -> Dict[str, Any]:
+        with self._lock:
+            if not self._opened and os.path.isdir(self.directory):
+                self._ensure_open()
+            return {
+                "head_hash": self._head_hash,
+                "sequence": self._next_seq - 1,
+                "segments": len(list_segments(self.directory)) if os.path.isdir(self.directory) else 0,
+                "last_anchor": self._last_anchor
+            }
+
+    def head(self) -> Dict[str, Any]:
+        """Return this process's chain head plus the durable head of every chain under the root"""
+        head = self._own_head()
+        head["chains"] = [chain_head(directory, self.root) for directory in chain_directories(self.root)]
+        head["total_records"] = sum(chain["sequence"] for chain in head["chains"])
+        return head
+
+    def verify(self, start_seq: Optional[int] = None, end_seq: Optional[int] = None) -> Dict[str, Any]:
+        """Verify every chain under the root; a sequence range applies to each chain"""
+        chains = []
+        for directory in chain_directories(self.root):
+            result = verify_ledger(directory, start_seq, end_seq)
+            result["chain"] = chain_name(directory, self.root)
+            chains.append(result)
+
+        return {
+            "is_valid": all(chain["is_valid"] for chain in chains),
+            "records_checked": sum(chain["records_checked"] for chain in chains),
+            "start_seq": start_seq or 1,
+            "end_seq": end_seq,
+            "failed_chains": [chain["chain"] for chain in chains if not chain["is_valid"]],
+            "chains": chains,
+            "verified_at": datetime.now().isoformat()
+        }
+
+    def read(self, limit: int = 50, offset: int = 0, action_filter: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Return the most recent records across every chain, newest first"""
+        streams = [
+            _iter_chain_reversed(directory, chain_name(directory, self.root))
+            for directory in chain_directories(self.root)
+        ]
+        records = []
+        skipped = 0
+
+        # Timestamps are assigned in chain order, so each stream is already newest first
+        for record in heapq.merge(*streams, key=lambda record: record["timestamp"], reverse=True):
+            if action_filter and record["event"].get("action") != action_filter:
+                continue
+            if skipped < offset:
+                skipped += 1
+                continue
+            records.append(record)
+            if len(records) >= limit:
+                break
+
+        return records
+
+    async def anchor(self, blockchain_logger) -> Optional[Dict[str, Any]]:
+        """Publish this process's chain head through the given blockchain logger"""
+        head = self._own_head()
+        if head["sequence"] == 0:
+            return None
+
+        result = await blockchain_logger.log_onchain(
+            user_id_hash=head["head_hash"],
+            risk_score=0.0,
+            action="LEDGER_ANCHOR",
+            metadata={"sequence": head["sequence"], "head_hash": head["head_hash"]}
+        )
+
+        if not result:
+            return None
+
+        self._last_anchor = {
+            "sequence": head["sequence"],
+            "head_hash": head["head_hash"],
+            "transaction_hash": result.get("transaction_hash"),
+            "anchored_at": datetime.now().isoformat()
+        }
+
+        return self._last_anchor
+
+def compute_record_hash(record: Dict[str, Any]) -> str:
+    """Hash a record's content together with the previous record's hash"""
+    body = {
+        "seq": record["seq"],
+        "timestamp": record["timestamp"],
+        "prev_hash": record["prev_hash"],
+        "event": record["event"]
+    }
+    canonical = json.dumps(body, separators=(",", ":"), sort_keys=True)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+def segment_path(directory: str, first_seq: int) -> str:
+    return os.path.join(directory, f"{first_seq:020d}{SEGMENT_SUFFIX}")
+
+def list_segments(directory: str) -> List[tuple]:
+    """Return (first_seq, path) for every segment, ordered by sequence"""
+    if not os.path.isdir(directory):
+        return []
+
+    segments = []
+    for name in os.listdir(directory):
+        if name.endswith(SEGMENT_SUFFIX):
+            segments.append((int(name[:-len(SEGMENT_SUFFIX)]), os.path.join(directory, name)))
+
+    return sorted(segments)
+
+def chain_directories(root: str) -> List[str]:
+    """The root and every directory directly below it that holds ledger segments"""
+    if not os.path.isdir(root):
+        return []
+
+    directories = [root] if list_segments(root) else []
+    for name in sorted(os.listdir(root)):
+        path = os.path.join(root, name)
+        if os.path.isdir(path) and list_segments(path):
+            directories.append(path)
+
+    return directories
+
+def chain_name(directory: str, root: str) -> str:
+    return os.path.relpath(directory, root)
+
+def chain_head(directory: str, root: str) -> Dict[str, Any]:
+    """Last durable record of one chain, read from disk"""
+    last_record = _read_last_chained_record(directory)
+    return {
+        "chain": chain_name(directory, root),
+        "head_hash": last_record["hash"] if last_record else GENESIS_HASH,
+        "sequence": last_record["seq"] if last_record else 0,
+        "segments": len(list_segments(directory))
+    }
+
+def _iter_segment(path: str):
+    """Yield records from a segment using a read-only memory map"""
+    if os.path.getsize(path) == 0:
+        return
+
+    with open(path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            position = 0
+            size = len(mapped)
+            while position < size:
+                end = mapped.find(b"\n", position)
+                if end == -1:
+                    # Torn write from a crash; everything before it is intact
+                    break
+                yield json.loads(mapped[position:end])
+                position = end + 1
+
+def _iter_segment_reversed(path: str):
+    """Yield records from the end of a segment backwards"""
+    if os.path.getsize(path) == 0:
+        return
+
+    with open(path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            end = mapped.rfind(b"\n")
+            while end > 0:
+                start = mapped.rfind(b"\n", 0, end) + 1
+                yield json.loads(mapped[start:end])
+                end = start - 1
+
+def _iter_chain_reversed(directory: str, chain: str):
+    """Yield a chain's records newest first, tagged with the chain they belong to"""
+    for _, path in reversed(list_segments(directory)):
+        for record in _iter_segment_reversed(path):
+            record["chain"] = chain
+            yield record
+
+def _parse_record(line: bytes) -> Optional[Dict[str, Any]]:
+    try:
+        record = json.loads(line)
+    except ValueError:
+        return None
+    if not isinstance(record, dict) or "seq" not in record or "hash" not in record:
+        return None
+    return record
+
+def _last_record_line(mapped) -> tuple:
+    """(record, end offset) of the last line that parses as a record, or (None, 0)"""
+    end = mapped.rfind(b"\n")
+    while end >= 0:
+        start = mapped.rfind(b"\n", 0, end) + 1
+        record = _parse_record(mapped[start:end])
+        if record is not None:
+            return record, end + 1
+        end = start - 1
+    return None, 0
+
+def _read_last_record(path: str) -> Optional[Dict[str, Any]]:
+    if os.path.getsize(path) == 0:
+        return None
+
+    with open(path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            return _last_record_line(mapped)[0]
+
+def _read_last_chained_record(directory: str) -> Optional[Dict[str, Any]]:
+    """Last record of the newest non-empty segment"""
+    for _, path in reversed(list_segments(directory)):
+        record = _read_last_record(path)
+        if record:
+            return record
+    return None
+
+def _truncate_to_last_record(path: str):
+    """Cut a torn or corrupt tail left behind by a crash back to the last record that parses"""
+    size = os.path.getsize(path)
+    if size == 0:
+        return
+
+    with open(path, "r+b") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            valid_size = _last_record_line(mapped)[1]
+        if valid_size < size:
+            print(f"Audit ledger: truncating {size - valid_size} bytes of torn or corrupt records in {path}")
+            f.truncate(valid_size)
+
+def verify_ledger(directory: str, start_seq: Optional[int] = None, end_seq: Optional[int] = None) -> Dict[str, Any]:
+    """Walk the chain and report the first broken link, if any"""
+    segments = list_segments(directory)
+    start_seq = start_seq or 1
+
+    checked = 0
+    prev_hash = None
+    last_seq = None
+
+    for index, (first_seq, path) in enumerate(segments):
+        next_first = segments[index + 1][0] if index + 1 < len(segments) else None
+
+        # Skip segments entirely before the range, but keep the record just
+        # before start_seq so the first link in the range is also checked
+        if next_first is not None and next_first <= start_seq - 1:
+            continue
+        if end_seq is not None and first_seq > end_seq:
+            break
+
+        records = _iter_segment(path)
+        while True:
+            try:
+                record = next(records, None)
+                if record is None:
+                    break
+                seq = record["seq"]
+                stored_hash = record["hash"]
+                record_hash = compute_record_hash(record)
+            except (ValueError, KeyError, TypeError):
+                # Unparseable line: report the sequence number that should have been there
+                expected_seq = last_seq + 1 if last_seq is not None else first_seq
+                return _verification_result(False, checked, start_seq, last_seq, expected_seq, "corrupt record")
+
+            if seq < start_seq - 1:
+                continue
+            if end_seq is not None and seq > end_seq:
+                break
+
+            if record_hash != stored_hash:
+                return _verification_result(False, checked, start_seq, last_seq, seq, "record hash mismatch")
+
+            if prev_hash is None:
+                if seq == 1 and record["prev_hash"] != GENESIS_HASH:
+                    return _verification_result(False, checked, start_seq, last_seq, seq, "invalid genesis link")
+            else:
+                if seq != last_seq + 1:
+                    return _verification_result(False, checked, start_seq, last_seq, seq, "sequence gap")
+                if record["prev_hash"] != prev_hash:
+                    return _verification_result(False, checked, start_seq, last_seq, seq, "broken hash link")
+
+            prev_hash = record["hash"]
+            last_seq = seq
+            if seq >= start_seq:
+                checked += 1
+
+    return _verification_result(True, checked, start_seq, last_seq, None, None, head_hash=prev_hash)
+
+def _verification_result(
+    is_valid: bool,
+    checked: int,
+    start_seq: int,
+    last_seq: Optional[int],
+    failed_seq: Optional[int],
+    error: Optional[str],
+    head_hash: Optional[str] = None
+) -> Dict[str, Any]:
+    return {
+        "is_valid": is_valid,
+        "records_checked": checked,
+        "start_seq": start_seq,
+        "end_seq": last_seq,
+        "failed_seq": failed_seq,
+        "error": error,
+        "head_hash": head_hash,
+        "verified_at": datetime.now().isoformat()
+    }
+
+# Initialize global ledger (opened lazily on first append)
+audit_ledger = AuditLedger()
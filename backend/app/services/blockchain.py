@@ -1,9 +1,11 @@
 import os
-from web3 import Web3
 from typing import Dict, List, Any, Optional
 import json
 from datetime import datetime
-import hashlib
+from app.services.audit_ledger import audit_ledger
+from app.services.container import container
+from app.services.bulkhead import chain_bulkhead, render_bulkhead
+from app.services.metrics import track_external
 
 class BlockchainLogger:
     def __init__(self):
@@ -16,6 +18,7 @@ class BlockchainLogger:
             self.web3 = None
             self.contract = None
         else:
+            from web3 import Web3
             self.web3 = Web3(Web3.HTTPProvider(self.provider_url))
             self.account = self.web3.eth.account.from_key(self.private_key)
             self.contract = self._load_contract()
@@ -76,51 +79,81 @@ class BlockchainLogger:
         action: str,
         metadata: Dict[str, Any]
     ) -> Dict[str, Any]:
-        """Log fraud event to blockchain"""
+        """Log fraud event to the local hash-chained audit ledger"""
+        
+        # The ledger is the primary sink; the chain only receives periodic
+        # anchors of the ledger head (see AuditLedger.anchor)
+        record = await audit_ledger.append_async({
+            "user_id_hash": user_id_hash,
+            "risk_score": risk_score,
+            "action": action,
+            "metadata": metadata
+        })
+        
+        return {
+            "transaction_hash": f"0x{record['hash']}",
+            "block_number": record["seq"],
+            "gas_used": None,
+            "status": 1
+        }
+    
+    async def log_onchain(
+        self,
+        user_id_hash: str,
+        risk_score: float,
+        action: str,
+        metadata: Dict[str, Any]
+    ) -> Optional[Dict[str, Any]]:
+        """Write an event directly to the smart contract"""
         
         if not self.web3 or not self.contract:
-            return self._mock_blockchain_log(user_id_hash, risk_score, action)
+            return None
         
-        try:
-            # Convert risk score to integer (multiply by 10000 for precision)
-            risk_score_int = int(risk_score * 10000)
+        def send_event():
+            with track_external("web3", "log_onchain"):
+                # Convert risk score to integer (multiply by 10000 for precision)
+                risk_score_int = int(risk_score * 10000)
             
-            # Convert user ID to bytes32
-            user_id_bytes = self.web3.keccak(text=user_id_hash)
+                # Convert user ID to bytes32
+                user_id_bytes = self.web3.keccak(text=user_id_hash)
             
-            # Convert metadata to JSON string
-            metadata_json = json.dumps(metadata)
+                # Convert metadata to JSON string
+                metadata_json = json.dumps(metadata)
             
-            # Build transaction
-            transaction = self.contract.functions.logFraudEvent(
-                user_id_bytes,
-                risk_score_int,
-                action,
-                metadata_json
-            ).build_transaction({
-                'from': self.account.address,
-                'gas': 200000,
-                'gasPrice': self.web3.to_wei('20', 'gwei'),
-                'nonce': self.web3.eth.get_transaction_count(self.account.address)
-            })
+                # Build transaction
+                transaction = self.contract.functions.logFraudEvent(
+                    user_id_bytes,
+                    risk_score_int,
+                    action,
+                    metadata_json
+                ).build_transaction({
+                    'from': self.account.address,
+                    'gas': 200000,
+                    'gasPrice': self.web3.to_wei('20', 'gwei'),
+                    'nonce': self.web3.eth.get_transaction_count(self.account.address)
+                })
             
-            # Sign and send transaction
-            signed_txn = self.web3.eth.account.sign_transaction(transaction, self.private_key)
-            tx_hash = self.web3.eth.send_raw_transaction(signed_txn.rawTransaction)
+                # Sign and send transaction
+                signed_txn = self.web3.eth.account.sign_transaction(transaction, self.private_key)
+                tx_hash = self.web3.eth.send_raw_transaction(signed_txn.rawTransaction)
             
-            # Wait for transaction receipt
-            receipt = self.web3.eth.wait_for_transaction_receipt(tx_hash)
+                # Wait for transaction receipt
+                receipt = self.web3.eth.wait_for_transaction_receipt(tx_hash)
             
-            return {
-                "transaction_hash": receipt.transactionHash.hex(),
-                "block_number": receipt.blockNumber,
-                "gas_used": receipt.gasUsed,
-                "status": receipt.status
-            }
+                return {
+                    "transaction_hash": receipt.transactionHash.hex(),
+                    "block_number": receipt.blockNumber,
+                    "gas_used": receipt.gasUsed,
+                    "status": receipt.status
+                }
+        
+        try:
+            # Blocking RPCs (and the receipt wait) run on the chain bulkhead
+            return await chain_bulkhead.run(send_event)
             
         except Exception as e:
             print(f"Blockchain logging error: {e}")
-            return self._mock_blockchain_log(user_id_hash, risk_score, action)
+            return None
     
     async def get_fraud_logs(
         self,
@@ -128,41 +161,12 @@ class BlockchainLogger:
         offset: int = 0,
         action_filter: Optional[str] = None
     ) -> List[Dict[str, Any]]:
-        """Retrieve fraud logs from blockchain"""
-        
-        if not self.web3 or not self.contract:
-            return self._mock_fraud_logs(limit, offset, action_filter)
+        """Retrieve fraud logs from the audit ledger, across every worker's chain"""
         
-        try:
-            # Get events from contract
-            event_filter = self.contract.events.FraudEventLogged.create_filter(
-                fromBlock='earliest',
-                toBlock='latest'
-            )
-            
-            events = event_filter.get_all_entries()
-            
-            # Convert events to readable format
-            logs = []
-            for event in events[-limit:]:  # Get latest events
-                log_entry = {
-                    "transaction_hash": event.transactionHash.hex(),
-                    "block_number": event.blockNumber,
-                    "user_id_hash": event.args.userIdHash.hex(),
-                    "risk_score": event.args.riskScore / 10000,  # Convert back to float
-                    "action": event.args.action,
-                    "timestamp": datetime.fromtimestamp(event.args.timestamp).isoformat(),
-                    "gas_used": None  # Would need to get from transaction receipt
-                }
-                
-                if not action_filter or log_entry["action"] == action_filter:
-                    logs.append(log_entry)
-            
-            return logs
-            
-        except Exception as e:
-            print(f"Error retrieving blockchain logs: {e}")
-            return self._mock_fraud_logs(limit, offset, action_filter)
+        # Every fraud event goes to the ledger, with or without web3; the chain
+        # only holds periodic anchors of the ledger head. Reads scan mmapped
+        # segments, so keep them off the event loop like /ledger/verify
+        return await render_bulkhead.run(self._ledger_fraud_logs, limit, offset, action_filter)
     
     async def get_transaction_details(self, tx_hash: str) -> Dict[str, Any]:
         """Get detailed transaction information"""
@@ -170,25 +174,29 @@ class BlockchainLogger:
         if not self.web3:
             return self._mock_transaction_details(tx_hash)
         
-        try:
-            # Get transaction and receipt
-            tx = self.web3.eth.get_transaction(tx_hash)
-            receipt = self.web3.eth.get_transaction_receipt(tx_hash)
+        def fetch_details():
+            with track_external("web3", "get_transaction_details"):
+                # Get transaction and receipt
+                tx = self.web3.eth.get_transaction(tx_hash)
+                receipt = self.web3.eth.get_transaction_receipt(tx_hash)
             
-            # Get block timestamp
-            block = self.web3.eth.get_block(receipt.blockNumber)
+                # Get block timestamp
+                block = self.web3.eth.get_block(receipt.blockNumber)
             
-            return {
-                "transaction_hash": tx_hash,
-                "block_number": receipt.blockNumber,
-                "gas_used": receipt.gasUsed,
-                "gas_price": tx.gasPrice,
-                "status": "success" if receipt.status == 1 else "failed",
-                "timestamp": datetime.fromtimestamp(block.timestamp).isoformat(),
-                "from": tx["from"],
-                "to": tx.to,
-                "event_data": self._parse_event_data(receipt)
-            }
+                return {
+                    "transaction_hash": tx_hash,
+                    "block_number": receipt.blockNumber,
+                    "gas_used": receipt.gasUsed,
+                    "gas_price": tx.gasPrice,
+                    "status": "success" if receipt.status == 1 else "failed",
+                    "timestamp": datetime.fromtimestamp(block.timestamp).isoformat(),
+                    "from": tx["from"],
+                    "to": tx.to,
+                    "event_data": self._parse_event_data(receipt)
+                }
+        
+        try:
+            return await chain_bulkhead.run(fetch_details)
             
         except Exception as e:
             print(f"Error getting transaction details: {e}")
@@ -253,55 +261,23 @@ class BlockchainLogger:
             "action": "USER_BLOCKED"
         }
     
-    def _mock_blockchain_log(self, user_id_hash: str, risk_score: float, action: str) -> Dict[str, Any]:
-        """Mock blockchain logging for demo purposes"""
-        mock_tx_hash = hashlib.sha256(f"{user_id_hash}{risk_score}{action}{datetime.now()}".encode()).hexdigest()
+    def _ledger_fraud_logs(self, limit: int, offset: int, action_filter: Optional[str]) -> List[Dict[str, Any]]:
+        """Read fraud logs from the local audit ledger"""
+        records = audit_ledger.read(limit=limit, offset=offset, action_filter=action_filter)
         
-        return {
-            "transaction_hash": f"0x{mock_tx_hash[:64]}",
-            "block_number": 12456789,
-            "gas_used": 21000,
-            "status": 1
-        }
-    
-    def _mock_fraud_logs(self, limit: int, offset: int, action_filter: Optional[str]) -> List[Dict[str, Any]]:
-        """Mock fraud logs for demo purposes"""
-        mock_logs = [
-            {
-                "transaction_hash": "0x1a2b3c4d5e6f7890abcdef1234567890abcdef12",
-                "block_number": 12456789,
-                "user_id_hash": "0xabcd1234efgh5678ijkl9012mnop3456",
-                "risk_score": 0.94,
-                "action": "USER_BLOCKED",
-                "timestamp": "2024-01-15T14:23:45",
-                "gas_used": 21000
-            },
+        return [
             {
-                "transaction_hash": "0x2b3c4d5e6f7890abcdef1234567890abcdef1234",
-                "block_number": 12456788,
-                "user_id_hash": "0xefgh5678ijkl9012mnop3456qrst7890",
-                "risk_score": 0.87,
-                "action": "FRAUD_DETECTED",
-                "timestamp": "2024-01-15T13:15:30",
-                "gas_used": 21000
-            },
-            {
-                "transaction_hash": "0x3c4d5e6f7890abcdef1234567890abcdef123456",
-                "block_number": 12456787,
-                "user_id_hash": "0xijkl9012mnop3456qrst7890uvwx1234",
-                "risk_score": 0.76,
-                "action": "ALERT_TRIGGERED",
-                "timestamp": "2024-01-15T12:05:22",
-                "gas_used": 21000
+                "transaction_hash": f"0x{record['hash']}",
+                "block_number": record["seq"],
+                "user_id_hash": record["event"].get("user_id_hash"),
+                "risk_score": record["event"].get("risk_score"),
+                "action": record["event"].get("action"),
+                "timestamp": record["timestamp"],
+                "gas_used": None,
+                "chain": record["chain"]
             }
+            for record in records
         ]
-        
-        # Apply action filter if specified
-        if action_filter:
-            mock_logs = [log for log in mock_logs if log["action"] == action_filter]
-        
-        # Apply pagination
-        return mock_logs[offset:offset + limit]
     
     def _mock_transaction_details(self, tx_hash: str) -> Dict[str, Any]:
         """Mock transaction details for demo purposes"""
@@ -319,4 +295,7 @@ class BlockchainLogger:
                 "risk_score": 0.94,
                 "action": "USER_BLOCKED"
             }
-        }
\ No newline at end of file
+        }
+
+# Shared logger for the blockchain, verification and dashboard routes, connected on first use
+blockchain_logger = container.register("blockchain_logger", BlockchainLogger)
@@ -0,0 +1,260 @@
+import os
+import time
+import asyncio
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Optional
+
+from app.services.metrics import metrics
+
+BULKHEAD_QUEUE_WAIT = metrics.histogram(
+    "bulkhead_queue_wait_seconds", "Time a task waited for a bulkhead slot", ("bulkhead",)
+)
+BULKHEAD_TASK_DURATION = metrics.histogram(
+    "bulkhead_task_duration_seconds", "Time a task ran on a bulkhead thread", ("bulkhead",)
+)
+
+class BulkheadFullError(Exception):
+    """The bulkhead's queue is full, or a task waited longer than its queue timeout"""
+
+    def __init__(self, name: str, reason: str):
+        super().__init__(f"{name} bulkhead is saturated ({reason})")
+        self.bulkhead = name
+
+class Bulkhead:
+    """Isolated thread pool for one class of blocking work, with an adaptive concurrency limit.
+
+    Tasks beyond the current limit wait in a bounded FIFO queue. A full
+    queue, or a wait longer than ``queue_timeout``, fails fast with
+    BulkheadFullError, so a stuck dependency only backs up its own callers.
+
+    The limit moves between ``min_threads`` and ``max_threads`` once per
+    ``adapt_interval``, based on the median run time of the tasks that
+    finished in that window (additive increase, multiplicative decrease):
+    - median above ``latency_tolerance`` times the baseline: the
+      dependency is slowing down, and more threads would only pile onto
+      it, so the limit drops by a quarter;
+    - otherwise, if tasks had to queue, it grows by a quarter (at least 1).
+    The baseline follows the lowest medians seen and drifts up slowly, so
+    a dependency that stays slower eventually becomes the new normal.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        min_threads: int,
+        max_threads: int,
+        max_queue: int,
+        queue_timeout: float,
+        adapt_interval: Optional[float] = None,
+        latency_tolerance: Optional[float] = None
+    ):
+        self.name = name
+        self.min_threads = max(min_threads, 1)
+        self.max_threads = max(max_threads, self.min_threads)
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.adapt_interval = adapt_interval or float(os.getenv("BULKHEAD_ADAPT_INTERVAL_SECONDS", 1.0))
+        self.latency_tolerance = latency_tolerance or float(os.getenv("BULKHEAD_LATENCY_TOLERANCE", 2.0))
+
+        self.limit = self.min_threads
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._active = 0
+        self._waiters: deque = deque()
+
+        self._window_started = time.monotonic()
+        self._window_latencies: deque = deque()
+        self._window_queued = False
+        self.baseline: Optional[float] = None
+        self._counters = {
+            "submitted": 0,
+            "completed": 0,
+            "failed": 0,
+            "rejected": 0,
+            "queue_timeouts": 0,
+            "limit_increases": 0,
+            "limit_decreases": 0
+        }
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        # Threads are only started once the pool is used
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_threads, thread_name_prefix=f"bulkhead-{self.name}")
+        return self._executor
+
+    async def run(self, func, *args):
+        """Run a blocking callable on this bulkhead's threads"""
+        await self._acquire()
+        self._counters["submitted"] += 1
+        loop = asyncio.get_running_loop()
+        try:
+            future = self.executor.submit(self._timed, func, *args)
+        except BaseException:
+            self._release(None)
+            raise
+        # Released when the thread finishes, even if the caller stopped waiting
+        future.add_done_callback(lambda done: self._release_threadsafe(loop, done))
+        return await asyncio.wrap_future(future)
+
+    def _timed(self, func, *args):
+        started = time.perf_counter()
+        try:
+            result = func(*args)
+        except Exception:
+            BULKHEAD_TASK_DURATION.observe(time.perf_counter() - started, self.name)
+            raise
+
+        elapsed = time.perf_counter() - started
+        BULKHEAD_TASK_DURATION.observe(elapsed, self.name)
+        # Only successes feed the limit, a fast-failing dependency would skew the baseline.
+        # deque.append is atomic, so worker threads record without a lock
+        self._window_latencies.append(elapsed)
+        return result
+
+    async def _acquire(self):
+        if self._active < self.limit and not self._waiters:
+            self._active += 1
+            BULKHEAD_QUEUE_WAIT.observe(0.0, self.name)
+            return
+
+        if len(self._waiters) >= self.max_queue:
+            self._counters["rejected"] += 1
+            raise BulkheadFullError(self.name, f"{len(self._waiters)} tasks queued")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self._window_queued = True
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(waiter, timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            self._remove_waiter(waiter)
+            self._counters["queue_timeouts"] += 1
+            raise BulkheadFullError(self.name, f"waited over {self.queue_timeout}s for a thread")
+        except BaseException:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just as the caller went away
+                self._release(None)
+            else:
+                self._remove_waiter(waiter)
+            raise
+        finally:
+            BULKHEAD_QUEUE_WAIT.observe(time.perf_counter() - started, self.name)
+
+    def _remove_waiter(self, waiter: asyncio.Future):
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            pass
+
+    def _release_threadsafe(self, loop: asyncio.AbstractEventLoop, future):
+        try:
+            loop.call_soon_threadsafe(self._release, future)
+        except RuntimeError:
+            # The loop is closed (shutdown); nobody is left waiting for the slot
+            self._active -= 1
+
+    def _release(self, future):
+        self._active -= 1
+        if future is not None:
+            if future.cancelled() or future.exception() is not None:
+                self._counters["failed"] += 1
+            else:
+                self._counters["completed"] += 1
+
+        self._adapt()
+
+        while self._waiters and self._active < self.limit:
+            waiter = self._waiters.popleft()
+            if waiter.done():
+                continue
+            self._active += 1
+            waiter.set_result(None)
+
+    def _adapt(self):
+        now = time.monotonic()
+        if now - self._window_started < self.adapt_interval:
+            return
+
+        latencies = []
+        while self._window_latencies:
+            latencies.append(self._window_latencies.popleft())
+        queued = self._window_queued
+        self._window_started = now
+        self._window_queued = bool(self._waiters)
+        if not latencies:
+            return
+
+        median = sorted(latencies)[len(latencies) // 2]
+        if self.baseline is None:
+            self.baseline = median
+
+        if median > self.baseline * self.latency_tolerance:
+            limit = max(self.min_threads, int(self.limit * 0.75))
+            if limit < self.limit:
+                self.limit = limit
+                self._counters["limit_decreases"] += 1
+        elif queued and self.limit < self.max_threads:
+            self.limit = min(self.max_threads, self.limit + max(1, self.limit // 4))
+            self._counters["limit_increases"] += 1
+
+        self.baseline = min(median, self.baseline + (median - self.baseline) * 0.1)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self._counters,
+            "limit": self.limit,
+            "min_threads": self.min_threads,
+            "max_threads": self.max_threads,
+            "active": self._active,
+            "queued": len(self._waiters),
+            "max_queue": self.max_queue,
+            "threads": len(self._executor._threads) if self._executor else 0,
+            "baseline_ms": round(self.baseline * 1000, 2) if self.baseline is not None else None
+        }
+
+def _env_bulkhead(name: str, min_threads: int, max_threads: int, max_queue: int, queue_timeout: float) -> Bulkhead:
+    """Bulkhead configured by BULKHEAD_<NAME>_{MIN_THREADS,MAX_THREADS,QUEUE,QUEUE_TIMEOUT}"""
+    prefix = f"BULKHEAD_{name.upper().replace('-', '_')}_"
+    return Bulkhead(
+        name,
+        min_threads=int(os.getenv(prefix + "MIN_THREADS", min_threads)),
+        max_threads=int(os.getenv(prefix + "MAX_THREADS", max_threads)),
+        max_queue=int(os.getenv(prefix + "QUEUE", max_queue)),
+        queue_timeout=float(os.getenv(prefix + "QUEUE_TIMEOUT", queue_timeout))
+    )
+
+# Initialize global bulkheads; the default executor is left to request-path work such as scoring
+db_bulkhead = _env_bulkhead("db", 8, 32, 500, 5.0)
+chain_bulkhead = _env_bulkhead("chain", 1, 4, 16, 10.0)
+llm_bulkhead = _env_bulkhead("llm", 2, 8, 64, 10.0)
+render_bulkhead = _env_bulkhead("cpu-render", 1, os.cpu_count() or 2, 16, 30.0)
+
+bulkheads = {bulkhead.name: bulkhead for bulkhead in (db_bulkhead, chain_bulkhead, llm_bulkhead, render_bulkhead)}
+
+def shutdown_bulkheads():
+    for bulkhead in bulkheads.values():
+        bulkhead.shutdown()
+
+def _bulkhead_metrics():
+    families = {
+        "bulkhead_limit": ("gauge", "Current adaptive concurrency limit", "limit"),
+        "bulkhead_active": ("gauge", "Tasks running on bulkhead threads", "active"),
+        "bulkhead_queued": ("gauge", "Tasks waiting for a bulkhead slot", "queued"),
+        "bulkhead_threads": ("gauge", "Threads started by a bulkhead", "threads"),
+        "bulkhead_rejected_total": ("counter", "Tasks rejected by a full bulkhead queue", "rejected"),
+        "bulkhead_queue_timeouts_total": ("counter", "Tasks that gave up waiting for a bulkhead slot", "queue_timeouts")
+    }
+    stats = {name: bulkhead.stats() for name, bulkhead in bulkheads.items()}
+    return [
+        (family, metric_type, documentation, [({"bulkhead": name}, values[key]) for name, values in stats.items()])
+        for family, (metric_type, documentation, key) in families.items()
+    ]
+
+metrics.register_collector(_bulkhead_metrics)
@@ -0,0 +1,142 @@
+import os
+import time
+import asyncio
+import threading
+from typing import Dict, List, Any, Callable, Iterable, Optional
+
+class ServiceContainer:
+    """Named services built on first use or during an explicit warmup.
+
+    Modules register a factory at import time and get back a LazyService
+    stand-in, so importing the app never opens connections, loads models or
+    pulls in heavy libraries. Each factory runs at most once; concurrent
+    first users wait on a per-service lock instead of building twice.
+    Request paths wait for the startup warmup (see wait_until_warm) so they
+    never build a service on the event loop thread.
+    """
+
+    def __init__(self):
+        self._factories: Dict[str, Callable[[], Any]] = {}
+        self._instances: Dict[str, Any] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._build_ms: Dict[str, float] = {}
+        self._errors: Dict[str, str] = {}
+        self.warmed_up = False
+        self._warmed_event: Optional[asyncio.Event] = None
+
+    def register(self, name: str, factory: Callable[[], Any]) -> "LazyService":
+        if name in self._factories:
+            raise ValueError(f"Service already registered: {name}")
+        self._factories[name] = factory
+        self._locks[name] = threading.Lock()
+        return LazyService(self, name)
+
+    def get(self, name: str) -> Any:
+        instance = self._instances.get(name)
+        if instance is not None:
+            return instance
+
+        with self._locks[name]:
+            if name not in self._instances:
+                started = time.perf_counter()
+                try:
+                    self._instances[name] = self._factories[name]()
+                except Exception as e:
+                    self._errors[name] = str(e)
+                    raise
+                self._build_ms[name] = round((time.perf_counter() - started) * 1000, 1)
+                self._errors.pop(name, None)
+        return self._instances[name]
+
+    def is_built(self, name: str) -> bool:
+        return name in self._instances
+
+    def names(self, selection: Optional[str] = None) -> List[str]:
+        """Resolve a comma-separated selection ("all" or empty for every service)"""
+        if not selection or selection.strip() == "all":
+            return list(self._factories)
+        return [name.strip() for name in selection.split(",") if name.strip() in self._factories]
+
+    def preload(self, names: Iterable[str]):
+        """Build services synchronously, e.g. in a pre-fork parent before workers start"""
+        for name in names:
+            try:
+                self.get(name)
+            except Exception as e:
+                print(f"Service preload error ({name}): {e}")
+
+    async def warmup(self, names: Optional[Iterable[str]] = None):
+        """Build services concurrently in worker threads; failures are left for first use to retry"""
+        names = list(names) if names is not None else self.names()
+        loop = asyncio.get_event_loop()
+
+        results = await asyncio.gather(
+            *[loop.run_in_executor(None, self.get, name) for name in names],
+            return_exceptions=True
+        )
+        for name, result in zip(names, results):
+            if isinstance(result, Exception):
+                print(f"Service warmup error ({name}): {result}")
+
+        self.warmed_up = True
+        self.warmed_event.set()
+
+    @property
+    def warmed_event(self) -> asyncio.Event:
+        # Created lazily so it binds to the running event loop
+        if self._warmed_event is None:
+            self._warmed_event = asyncio.Event()
+        return self._warmed_event
+
+    async def wait_until_warm(self, timeout: float) -> bool:
+        """Wait for the startup warmup; False if it has not finished within the timeout"""
+        if self.warmed_up:
+            return True
+        try:
+            await asyncio.wait_for(self.warmed_event.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            name: {
+                "built": name in self._instances,
+                "build_ms": self._build_ms.get(name),
+                **({"error": self._errors[name]} if name in self._errors else {})
+            }
+            for name in self._factories
+        }
+
+class LazyService:
+    """Module-level stand-in for a container service; the first attribute access builds it"""
+
+    __slots__ = ("_container", "_name", "_instance")
+
+    def __init__(self, container: ServiceContainer, name: str):
+        object.__setattr__(self, "_container", container)
+        object.__setattr__(self, "_name", name)
+        object.__setattr__(self, "_instance", None)
+
+    def _resolve(self) -> Any:
+        instance = self._instance
+        if instance is None:
+            instance = self._container.get(self._name)
+            object.__setattr__(self, "_instance", instance)
+        return instance
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self._resolve(), attr)
+
+    def __setattr__(self, attr: str, value: Any):
+        setattr(self._resolve(), attr, value)
+
+    def __repr__(self) -> str:
+        state = "built" if self._container.is_built(self._name) else "lazy"
+        return f"<LazyService {self._name} ({state})>"
+
+# Services built by the startup warmup ("all", "none" or a comma-separated list)
+SERVICE_WARMUP = os.getenv("SERVICE_WARMUP", "all")
+
+# Initialize global container
+container = ServiceContainer()
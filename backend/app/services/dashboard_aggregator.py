@@ -0,0 +1,248 @@
+import os
+import time
+import heapq
+import asyncio
+from collections import Counter, deque
+from datetime import datetime, timedelta
+from typing import Dict, List, Any, Optional
+
+from app.services.supabase_client import supabase_client, iter_keyset_pages, get_dashboard_totals
+
+BUCKET_SECONDS = 60
+WINDOWS = {"1h": 3600, "24h": 86400, "7d": 604800}
+
+def _empty_totals() -> Dict[str, Any]:
+    return {"transactions": 0, "high": 0, "medium": 0, "low": 0, "risk_sum": 0.0, "blocked": 0, "flags": Counter()}
+
+class SlidingWindows:
+    """Per-minute buckets with running totals for each window.
+
+    Each window keeps its own deque of references to the shared minute
+    buckets. Adding an event updates the current bucket and every window
+    total; expiring subtracts whole buckets as they age out. Both are
+    amortized O(1), so reads never scan history.
+    """
+
+    def __init__(self):
+        self.windows = {
+            name: {"buckets": deque(), "totals": _empty_totals(), "span": seconds // BUCKET_SECONDS}
+            for name, seconds in WINDOWS.items()
+        }
+        self._current_key: Optional[int] = None
+        self._current: Optional[Dict[str, Any]] = None
+
+    def _targets(self, timestamp: float) -> List[Dict[str, Any]]:
+        key = int(timestamp // BUCKET_SECONDS)
+        if key != self._current_key:
+            # Events arrive in time order; a late one joins the newest bucket
+            if self._current_key is None or key > self._current_key:
+                self._current_key = key
+                self._current = _empty_totals()
+                for window in self.windows.values():
+                    window["buckets"].append((key, self._current))
+
+        return [self._current] + [window["totals"] for window in self.windows.values()]
+
+    def add(self, timestamp: float, risk_level: Optional[str] = None, risk_score: float = 0.0,
+            flags: Optional[List[str]] = None, blocked: int = 0):
+        for totals in self._targets(timestamp):
+            if risk_level:
+                totals["transactions"] += 1
+                totals[risk_level] += 1
+                totals["risk_sum"] += risk_score
+                if flags:
+                    totals["flags"].update(flags)
+            totals["blocked"] += blocked
+
+    def add_totals(self, timestamp: float, batch: Dict[str, Any]):
+        """Add many events at once, pre-summed into a totals dictionary"""
+        for totals in self._targets(timestamp):
+            for field in ("transactions", "high", "medium", "low", "risk_sum", "blocked"):
+                totals[field] += batch[field]
+            totals["flags"].update(batch["flags"])
+
+    def expire(self, now: float):
+        now_key = int(now // BUCKET_SECONDS)
+        for window in self.windows.values():
+            buckets, totals = window["buckets"], window["totals"]
+            while buckets and buckets[0][0] <= now_key - window["span"]:
+                _, bucket = buckets.popleft()
+                for field in ("transactions", "high", "medium", "low", "risk_sum", "blocked"):
+                    totals[field] -= bucket[field]
+                totals["flags"].subtract(bucket["flags"])
+                totals["flags"] += Counter()  # drop zero and negative counts
+
+class DashboardAggregator:
+    """In-process dashboard counters updated as transactions are scored and users blocked.
+
+    Each worker only sees its own traffic, so the windows are rebuilt from
+    the database every DASHBOARD_RECONCILE_SECONDS; events recorded while a
+    rebuild runs are replayed on top of it. Reading the summary costs the
+    same regardless of traffic or history.
+    """
+
+    def __init__(self, reconcile_interval: Optional[float] = None, page_size: Optional[int] = None):
+        self.reconcile_interval = reconcile_interval or float(os.getenv("DASHBOARD_RECONCILE_SECONDS", 300))
+        self.page_size = page_size or int(os.getenv("DASHBOARD_RECONCILE_PAGE_SIZE", 1000))
+
+        self._windows = SlidingWindows()
+        self._totals = {"total_transactions": 0, "active_blocked_users": 0}
+        self._replay: Optional[List[Dict[str, Any]]] = None
+        self.reconciled_at: Optional[datetime] = None
+        self.reconcile_ms: Optional[float] = None
+
+    def record_score(self, risk_score: float, risk_level: str, flags: List[str]):
+        self._record({"risk_level": risk_level, "risk_score": risk_score, "flags": flags})
+        self._totals["total_transactions"] += 1
+
+    def record_scores(self, risk_scores: List[float], risk_levels: List[str], flags: List[List[str]]):
+        """Record a whole scored batch as one event, summed up front"""
+        batch = _empty_totals()
+        batch["transactions"] = len(risk_levels)
+        batch.update(Counter(risk_levels))
+        batch["risk_sum"] = float(sum(risk_scores))
+        batch["flags"] = Counter(flag for row_flags in flags for flag in row_flags)
+
+        self._record({"totals": batch})
+        self._totals["total_transactions"] += batch["transactions"]
+
+    def record_block(self):
+        self._record({"blocked": 1})
+        self._totals["active_blocked_users"] += 1
+
+    def record_unblock(self):
+        self._totals["active_blocked_users"] = max(self._totals["active_blocked_users"] - 1, 0)
+
+    def _record(self, event: Dict[str, Any]):
+        now = time.time()
+        _apply(self._windows, now, event)
+        if self._replay is not None:
+            self._replay.append({"timestamp": now, **event})
+
+    def window(self, name: str) -> Dict[str, Any]:
+        """Counts, fraud rate, average score and top flags for one window"""
+        self._windows.expire(time.time())
+        totals = self._windows.windows[name]["totals"]
+        scored = totals["transactions"]
+
+        return {
+            "transactions": scored,
+            "fraud_detected": totals["high"],
+            "medium_risk": totals["medium"],
+            "low_risk": totals["low"],
+            "fraud_rate": round(totals["high"] / scored * 100, 2) if scored else 0.0,
+            "avg_risk_score": round(totals["risk_sum"] / scored, 4) if scored else 0.0,
+            "users_blocked": totals["blocked"],
+            "top_flags": [flag for flag, _ in totals["flags"].most_common(5)]
+        }
+
+    def summary(self) -> Dict[str, Any]:
+        """Dashboard summary built from the running totals"""
+        windows = {name: self.window(name) for name in WINDOWS}
+        day, week = windows["24h"], windows["7d"]
+
+        # Fraud rate of the last 24h against the six days before it
+        prior_scored = week["transactions"] - day["transactions"]
+        prior_rate = (week["fraud_detected"] - day["fraud_detected"]) / prior_scored * 100 if prior_scored else 0.0
+
+        return {
+            "total_transactions": self._totals["total_transactions"],
+            "fraud_detected": day["fraud_detected"],
+            "fraud_rate": day["fraud_rate"],
+            "blocked_users": self._totals["active_blocked_users"],
+            "high_risk_alerts": windows["1h"]["fraud_detected"],
+            "avg_risk_score": day["avg_risk_score"],
+            "top_risk_factors": [flag.replace("_", " ").capitalize() for flag in day["top_flags"]],
+            "trend_data": {
+                "fraud_rate_trend": f"{day['fraud_rate'] - prior_rate:+.1f}%" if prior_scored else "n/a"
+            },
+            "windows": windows,
+            "reconciled_at": self.reconciled_at.isoformat() if self.reconciled_at else None
+        }
+
+    async def reconcile(self):
+        """Rebuild the windows and totals from Supabase"""
+        if self._replay is not None:
+            return
+
+        started = time.perf_counter()
+        end_date = datetime.now()
+        start_date = end_date - timedelta(seconds=max(WINDOWS.values()))
+        self._replay = []
+
+        try:
+            windows, totals = await asyncio.gather(
+                supabase_client._run_scan(self._build_windows, start_date, end_date),
+                get_dashboard_totals()
+            )
+
+            # Everything recorded after the rebuild's cut-off is replayed on top
+            cutoff = end_date.timestamp()
+            replay = [event for event in self._replay if event["timestamp"] > cutoff]
+            for event in replay:
+                _apply(windows, event["timestamp"], event)
+            self._windows = windows
+
+            if totals:
+                totals["total_transactions"] += sum(
+                    event["totals"]["transactions"] if "totals" in event else 1
+                    for event in replay
+                    if event.get("risk_level") or "totals" in event
+                )
+                totals["active_blocked_users"] += sum(event.get("blocked", 0) for event in replay)
+                self._totals = totals
+
+            self.reconciled_at = end_date
+            self.reconcile_ms = round((time.perf_counter() - started) * 1000, 1)
+        finally:
+            self._replay = None
+
+    def _build_windows(self, start_date: datetime, end_date: datetime) -> SlidingWindows:
+        """Scan the last week of scores and blocks (runs in a worker thread)"""
+        scores = (
+            (_timestamp(row["scored_at"]), 0, row)
+            for page in iter_keyset_pages(
+                "fraud_scores", "risk_score, risk_level, flags", "scored_at",
+                start_date, end_date, page_size=self.page_size
+            )
+            for row in page
+        )
+        blocks = (
+            (_timestamp(row["blocked_at"]), 1, row)
+            for page in iter_keyset_pages(
+                "blocklist", "status", "blocked_at", start_date, end_date, page_size=self.page_size
+            )
+            for row in page
+        )
+
+        # Both streams are already time ordered, so merge them page by page
+        windows = SlidingWindows()
+        for timestamp, is_block, row in heapq.merge(scores, blocks, key=lambda event: event[:2]):
+            if is_block:
+                windows.add(timestamp, blocked=1)
+            else:
+                windows.add(timestamp, risk_level=row["risk_level"], risk_score=float(row["risk_score"]), flags=row.get("flags"))
+
+        windows.expire(end_date.timestamp())
+        return windows
+
+    async def run_reconciler(self):
+        """Reconcile on startup and then at a fixed interval"""
+        while True:
+            try:
+                await self.reconcile()
+            except Exception as e:
+                print(f"Dashboard reconcile error: {e}")
+            await asyncio.sleep(self.reconcile_interval)
+
+def _apply(windows: SlidingWindows, timestamp: float, event: Dict[str, Any]):
+    if "totals" in event:
+        windows.add_totals(timestamp, event["totals"])
+    else:
+        windows.add(timestamp, **{key: value for key, value in event.items() if key != "timestamp"})
+
+def _timestamp(value: str) -> float:
+    return datetime.fromisoformat(value).timestamp()
+
+# Initialize global aggregator
+dashboard_aggregator = DashboardAggregator()
@@ -0,0 +1,209 @@
+import os
+import time
+import asyncio
+import hashlib
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List, Any, Optional
+
+from app.services.supabase_client import get_explanation, save_explanations
+
+# Generators whose text only describes the risk signature and may be shown for any transaction with it
+SHARED_GENERATORS = ("groq_signature",)
+
+class ExplanationCache:
+    """Two-tier explanation cache: in-memory LRU backed by fraud_explanations.
+
+    Entries are keyed by transaction_id for exact repeats and by a normalized
+    risk signature (risk bucket, flags, top-3 factors) for near-duplicates.
+    Only signature-scoped LLM text is shared by signature; templates are
+    cheaper to regenerate than to look up. Key factors and recommendations
+    are always computed for the requesting transaction.
+    Reads go through to Supabase on a memory miss; writes are buffered and
+    flushed to Supabase in batches in the background.
+    """
+
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        flush_interval: Optional[float] = None,
+        flush_batch_size: Optional[int] = None
+    ):
+        self.max_entries = max_entries or int(os.getenv("EXPLANATION_CACHE_SIZE", 10000))
+        self.flush_interval = flush_interval or float(os.getenv("EXPLANATION_CACHE_FLUSH_INTERVAL", 2.0))
+        self.flush_batch_size = flush_batch_size or int(os.getenv("EXPLANATION_CACHE_FLUSH_BATCH", 100))
+
+        self._by_transaction: OrderedDict = OrderedDict()
+        self._by_signature: OrderedDict = OrderedDict()
+        self._write_buffer: List[Dict[str, Any]] = []
+        self._flush_task: Optional[asyncio.Task] = None
+
+        self._started_at = time.monotonic()
+        self._counters = {
+            "transaction_hits": 0,
+            "signature_hits": 0,
+            "database_hits": 0,
+            "misses": 0,
+            "llm_calls": 0,
+            "persisted": 0,
+            "persist_failures": 0
+        }
+
+    @staticmethod
+    def risk_signature(risk_score: float, flags: List[str], shap_values: Dict[str, float]) -> str:
+        """Normalize the inputs that drive an explanation into a stable key"""
+        risk_bucket = min(int(risk_score * 10), 9)
+        top_factors = sorted(shap_values.items(), key=lambda x: abs(x[1]), reverse=True)[:3]
+
+        normalized = "|".join([
+            str(risk_bucket),
+            ",".join(sorted(set(flags))),
+            ",".join(f"{name}{'+' if value > 0 else '-'}" for name, value in top_factors)
+        ])
+        return hashlib.sha1(normalized.encode()).hexdigest()
+
+    def contains(self, transaction_id: str) -> bool:
+        """Check for an in-memory entry without touching LRU order or stats"""
+        return transaction_id in self._by_transaction
+
+    def peek(self, transaction_id: str) -> Optional[Dict[str, Any]]:
+        """Memory-only lookup for an exact transaction repeat"""
+        entry = self._lookup(self._by_transaction, transaction_id)
+        if entry:
+            self._counters["transaction_hits"] += 1
+        return entry
+
+    async def get(self, transaction_id: str) -> Optional[Dict[str, Any]]:
+        """Look up an explanation generated for this exact transaction"""
+        entry = self._lookup(self._by_transaction, transaction_id)
+        if entry:
+            self._counters["transaction_hits"] += 1
+            return entry
+
+        record = await get_explanation(transaction_id=transaction_id)
+        if record:
+            entry = self._entry_from_record(record)
+            self._store(self._by_transaction, transaction_id, entry)
+            self._counters["database_hits"] += 1
+            return entry
+
+        return None
+
+    async def get_similar(self, signature: str) -> Optional[Dict[str, Any]]:
+        """Look up signature-scoped LLM text generated for an equivalent risk signature.
+
+        The caller computes key factors and recommendations for its own request.
+        """
+        entry = self._lookup(self._by_signature, signature)
+        if entry:
+            self._counters["signature_hits"] += 1
+            return entry
+
+        record = await get_explanation(risk_signature=signature, generated_by=SHARED_GENERATORS)
+        if record:
+            entry = self._entry_from_record(record)
+            self._store(self._by_signature, signature, entry)
+            self._counters["database_hits"] += 1
+            return entry
+
+        self._counters["misses"] += 1
+        return None
+
+    def put(
+        self,
+        transaction_id: str,
+        signature: str,
+        entry: Dict[str, Any],
+        risk_score: Optional[float] = None,
+        persist: bool = True
+    ):
+        """Cache an explanation and queue freshly generated ones for persistence"""
+        self._store(self._by_transaction, transaction_id, entry)
+        if entry.get("generated_by") in SHARED_GENERATORS:
+            self._store(self._by_signature, signature, entry)
+
+        if persist:
+            self._write_buffer.append({
+                "transaction_id": transaction_id,
+                "risk_signature": signature,
+                "risk_score": risk_score,
+                "explanation": entry["explanation"],
+                "key_factors": entry["key_factors"],
+                "recommendations": entry["recommendations"],
+                "generated_by": entry.get("generated_by", "groq_ai"),
+                "generated_at": entry["generated_at"]
+            })
+            self._schedule_flush()
+
+    def record_llm_call(self):
+        self._counters["llm_calls"] += 1
+
+    async def flush(self):
+        """Persist all buffered explanations"""
+        while self._write_buffer:
+            batch = self._write_buffer[:self.flush_batch_size]
+            del self._write_buffer[:self.flush_batch_size]
+
+            if await save_explanations(batch):
+                self._counters["persisted"] += len(batch)
+            else:
+                self._counters["persist_failures"] += len(batch)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit rates and LLM call volume since startup"""
+        hits = (
+            self._counters["transaction_hits"]
+            + self._counters["signature_hits"]
+            + self._counters["database_hits"]
+        )
+        lookups = hits + self._counters["misses"]
+        hours = max((time.monotonic() - self._started_at) / 3600, 1 / 3600)
+
+        return {
+            **self._counters,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "llm_calls_per_hour": self._counters["llm_calls"] / hours,
+            "memory_entries": len(self._by_transaction),
+            "signature_entries": len(self._by_signature),
+            "pending_writes": len(self._write_buffer)
+        }
+
+    def _lookup(self, store: OrderedDict, key: str) -> Optional[Dict[str, Any]]:
+        entry = store.get(key)
+        if entry is not None:
+            store.move_to_end(key)
+        return entry
+
+    def _store(self, store: OrderedDict, key: str, entry: Dict[str, Any]):
+        store[key] = entry
+        store.move_to_end(key)
+        while len(store) > self.max_entries:
+            store.popitem(last=False)
+
+    def _schedule_flush(self):
+        if self._flush_task and not self._flush_task.done():
+            return
+
+        try:
+            self._flush_task = asyncio.get_running_loop().create_task(self._flush_later())
+        except RuntimeError:
+            # No running loop (e.g. called from a worker thread); the next
+            # put from the event loop or the shutdown flush picks it up
+            pass
+
+    async def _flush_later(self):
+        if len(self._write_buffer) < self.flush_batch_size:
+            await asyncio.sleep(self.flush_interval)
+        await self.flush()
+
+    def _entry_from_record(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "explanation": record["explanation"],
+            "key_factors": record.get("key_factors") or [],
+            "recommendations": record.get("recommendations") or [],
+            "generated_by": record.get("generated_by", "groq_ai"),
+            "generated_at": record.get("generated_at") or datetime.now().isoformat()
+        }
+
+# Initialize global cache
+explanation_cache = ExplanationCache()
@@ -0,0 +1,107 @@
+import os
+import asyncio
+from typing import Dict, List, Any, Optional, Set
+
+from app.models.schemas import ScoreRequest, ScoreResponse, ExplanationRequest
+from app.services.explanation_service import explanation_service
+
+class ExplanationPrecomputer:
+    """Background worker pool that prepares explanations for high-risk scores.
+
+    Scoring only ever calls ``submit``, which never waits: when the bounded
+    queue is full the job is dropped and counted, so precomputation can
+    fall behind but can never slow scoring down.
+    """
+
+    def __init__(
+        self,
+        risk_threshold: Optional[float] = None,
+        workers: Optional[int] = None,
+        queue_size: Optional[int] = None
+    ):
+        self.risk_threshold = risk_threshold if risk_threshold is not None else float(os.getenv("EXPLAIN_PRECOMPUTE_THRESHOLD", 0.8))
+        self.worker_count = workers or int(os.getenv("EXPLAIN_PRECOMPUTE_WORKERS", 2))
+        self.queue_size = queue_size or int(os.getenv("EXPLAIN_PRECOMPUTE_QUEUE_SIZE", 500))
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._pending: Set[str] = set()
+        self._counters = {
+            "submitted": 0,
+            "skipped_cached": 0,
+            "shed": 0,
+            "completed": 0,
+            "failed": 0
+        }
+
+    def submit(self, request: ScoreRequest, response: ScoreResponse) -> bool:
+        """Queue explanation precomputation for a scored transaction if it is risky enough"""
+        if response.risk_score < self.risk_threshold:
+            return False
+
+        transaction_id = response.transaction_id
+        if transaction_id in self._pending or explanation_service.cache.contains(transaction_id):
+            self._counters["skipped_cached"] += 1
+            return False
+
+        self._ensure_started()
+
+        job = ExplanationRequest(
+            transaction_id=transaction_id,
+            risk_score=response.risk_score,
+            flags=response.flags,
+            transaction_data=request.model_dump(mode="json")
+        )
+
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            self._counters["shed"] += 1
+            return False
+
+        self._pending.add(transaction_id)
+        self._counters["submitted"] += 1
+        return True
+
+    def _ensure_started(self):
+        if self._workers:
+            return
+
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        loop = asyncio.get_event_loop()
+        self._workers = [
+            loop.create_task(self._worker_loop())
+            for _ in range(self.worker_count)
+        ]
+
+    async def _worker_loop(self):
+        while True:
+            job = await self._queue.get()
+            try:
+                await explanation_service.explain(job)
+                self._counters["completed"] += 1
+            except Exception as e:
+                self._counters["failed"] += 1
+                print(f"Explanation precompute error for {job.transaction_id}: {e}")
+            finally:
+                self._pending.discard(job.transaction_id)
+                self._queue.task_done()
+
+    async def stop(self):
+        """Cancel workers; queued jobs are dropped since they are only an optimization"""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self._counters,
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "queue_size": self.queue_size,
+            "workers": len(self._workers),
+            "risk_threshold": self.risk_threshold
+        }
+
+# Initialize global precomputer (workers start on first submit)
+explanation_precomputer = ExplanationPrecomputer()
@@ -0,0 +1,117 @@
+from datetime import datetime
+from typing import Dict, List, Any, Tuple
+
+from app.models.schemas import ExplanationRequest
+from app.services.groq_client import groq_explainer
+from app.services.ml_engine import ml_engine
+from app.services.explanation_cache import explanation_cache, ExplanationCache
+from app.services.retrieval_index import index_explanation
+from app.services.bulkhead import llm_bulkhead
+
+class ExplanationService:
+    """Builds fraud explanations (SHAP factors, LLM text, recommendations) behind the explanation cache"""
+
+    def __init__(self):
+        # Lazy stand-ins; the explainer and engine are built on first use or warmup
+        self.groq_explainer = groq_explainer
+        self.ml_engine = ml_engine
+        self.cache = explanation_cache
+
+    async def explain(self, request: ExplanationRequest) -> Dict[str, Any]:
+        """Return a cached explanation or generate and cache a new one"""
+        # Exact repeat for this transaction
+        cached = await self.cache.get(request.transaction_id)
+        if cached:
+            return cached
+
+        shap_explanation = await self.compute_shap(request.transaction_data)
+        signature = ExplanationCache.risk_signature(request.risk_score, request.flags, shap_explanation)
+
+        explanation, generated_by = await self.signature_text(request, shap_explanation, signature)
+        entry = self.build_entry(request, shap_explanation, explanation, generated_by)
+        index_explanation(request.transaction_id, request.risk_score, explanation, entry["key_factors"])
+        self.cache.put(request.transaction_id, signature, entry, risk_score=request.risk_score)
+
+        return entry
+
+    async def compute_shap(self, transaction_data: Dict[str, Any]) -> Dict[str, float]:
+        """Get SHAP values for feature importance on the llm bulkhead, off the event loop"""
+        return await llm_bulkhead.run(self.ml_engine.get_shap_explanation, transaction_data)
+
+    async def compute_shap_batch(self, transactions: List[Dict[str, Any]]) -> List[Dict[str, float]]:
+        """SHAP values for many transactions in one llm bulkhead call"""
+        return await llm_bulkhead.run(self.ml_engine.get_shap_explanation_batch, transactions)
+
+    async def signature_text(
+        self,
+        request: ExplanationRequest,
+        shap_explanation: Dict[str, float],
+        signature: str,
+        use_llm: bool = True
+    ) -> Tuple[str, str]:
+        """Explanation text and its generator for a request's risk signature.
+
+        LLM text only describes the signature, so it is looked up and cached
+        by signature. A template is generated straight away: it costs less
+        than a cache or database lookup.
+        """
+        if use_llm and self.groq_explainer.client:
+            # Near-duplicate: same risk bucket, flags and top factors
+            cached = await self.cache.get_similar(signature)
+            if cached:
+                return cached["explanation"], cached["generated_by"]
+
+            explanation = await self.groq_explainer.generate_signature_explanation(
+                request.risk_score, request.flags, shap_explanation
+            )
+            if explanation is not None:
+                self.cache.record_llm_call()
+                return explanation, "groq_signature"
+
+        return self.groq_explainer.generate_template_explanation(request.risk_score, request.flags), "template"
+
+    def build_entry(
+        self,
+        request: ExplanationRequest,
+        shap_explanation: Dict[str, float],
+        explanation: str,
+        generated_by: str
+    ) -> Dict[str, Any]:
+        """Cache entry for a request; key factors and recommendations always come from the request itself"""
+        return {
+            "explanation": explanation,
+            # Extract key factors from SHAP analysis
+            "key_factors": self.ml_engine.get_top_risk_factors(shap_explanation),
+            "recommendations": generate_recommendations(request.risk_score, request.flags),
+            "generated_by": generated_by,
+            "generated_at": datetime.now().isoformat()
+        }
+
+def generate_recommendations(risk_score: float, flags: list) -> list:
+    """
+    Generate actionable recommendations based on risk factors
+    """
+    recommendations = []
+
+    if risk_score >= 0.9:
+        recommendations.append("Immediately block user and flag for manual review")
+        recommendations.append("Contact user via verified phone number to confirm transaction")
+    elif risk_score >= 0.7:
+        recommendations.append("Require additional authentication before processing")
+        recommendations.append("Monitor user activity closely for next 24 hours")
+    elif risk_score >= 0.5:
+        recommendations.append("Apply enhanced monitoring to user account")
+        recommendations.append("Consider step-up authentication for large transactions")
+
+    # Flag-specific recommendations
+    if "unusual_amount" in flags:
+        recommendations.append("Verify transaction with user via SMS or email")
+    if "new_device" in flags:
+        recommendations.append("Require device verification before processing")
+    if "high_velocity" in flags:
+        recommendations.append("Implement temporary transaction limits")
+
+    return recommendations
+
+# Initialize global service
+explanation_service = ExplanationService()
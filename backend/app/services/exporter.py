@@ -0,0 +1,151 @@
+import io
+import csv
+import json
+from datetime import datetime
+from itertools import islice
+from typing import Dict, Any, AsyncIterator, Iterable, Iterator, List
+
+from app.services.supabase_client import SCORED_TRANSACTION_COLUMNS, supabase_client
+
+EXPORT_FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "parquet": ("application/vnd.apache.parquet", "parquet")
+}
+
+def iter_chunks(rows: Iterable[Dict[str, Any]], size: int) -> Iterator[List[Dict[str, Any]]]:
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+async def stream_on_db_bulkhead(body: Iterator[bytes], format: str) -> AsyncIterator[bytes]:
+    """Advance an export body on the db bulkhead, since pulling a chunk runs Supabase page queries.
+
+    A failure mid-stream must not look like a complete export: NDJSON gets
+    a trailing error line, then the error is re-raised so the server aborts
+    the response instead of ending it cleanly.
+    """
+    done = object()
+    try:
+        while True:
+            chunk = await supabase_client._run_scan(next, body, done)
+            if chunk is done:
+                return
+            yield chunk
+    except Exception as e:
+        print(f"Export failed mid-stream: {e}")
+        if format == "ndjson":
+            yield (json.dumps({"error": f"Export failed: {str(e)}"}) + "\n").encode()
+        raise
+
+def iter_csv(rows: Iterable[Dict[str, Any]], chunk_size: int = 1000) -> Iterator[bytes]:
+    """Encode rows as CSV, one output chunk per ``chunk_size`` rows"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(SCORED_TRANSACTION_COLUMNS)
+
+    for chunk in iter_chunks(rows, chunk_size):
+        writer.writerows(
+            [_csv_value(row.get(column)) for column in SCORED_TRANSACTION_COLUMNS]
+            for row in chunk
+        )
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+
+    # Header only when there were no rows
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+def iter_ndjson(rows: Iterable[Dict[str, Any]], chunk_size: int = 1000) -> Iterator[bytes]:
+    """Encode rows as newline-delimited JSON"""
+    for chunk in iter_chunks(rows, chunk_size):
+        yield "".join(json.dumps(row, default=str) + "\n" for row in chunk).encode()
+
+def iter_parquet(rows: Iterable[Dict[str, Any]], row_group_size: int = 10000) -> Iterator[bytes]:
+    """Encode rows as Parquet, writing one row group per ``row_group_size`` rows.
+
+    Each row group's bytes are yielded as soon as it is written, so only
+    one row group is ever buffered.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([
+        ("transaction_id", pa.string()),
+        ("user_id", pa.string()),
+        ("amount", pa.float64()),
+        ("timestamp", pa.timestamp("us", tz="UTC")),
+        ("location", pa.string()),
+        ("device_id", pa.string()),
+        ("payment_method", pa.string()),
+        ("merchant_category", pa.string()),
+        ("risk_score", pa.float64()),
+        ("risk_level", pa.string()),
+        ("flags", pa.list_(pa.string())),
+        ("confidence", pa.float64()),
+        ("model_version", pa.string()),
+        ("scored_at", pa.timestamp("us", tz="UTC"))
+    ])
+    converters = {
+        "amount": _to_float,
+        "risk_score": _to_float,
+        "confidence": _to_float,
+        "timestamp": _to_datetime,
+        "scored_at": _to_datetime
+    }
+
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema, compression="snappy")
+
+    for chunk in iter_chunks(rows, row_group_size):
+        columns = []
+        for field in schema:
+            convert = converters.get(field.name)
+            values = [row.get(field.name) for row in chunk]
+            columns.append(pa.array([convert(value) for value in values] if convert else values, type=field.type))
+
+        writer.write_table(pa.Table.from_arrays(columns, schema=schema))
+        yield sink.drain()
+
+    writer.close()
+    yield sink.drain()
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file object that hands back what was written since the last drain"""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+def _csv_value(value: Any) -> Any:
+    if isinstance(value, list):
+        return "|".join(str(item) for item in value)
+    return value
+
+def _to_float(value: Any):
+    return float(value) if value is not None else None
+
+def _to_datetime(value: Any):
+    if value is None or isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(value)
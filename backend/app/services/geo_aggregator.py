@@ -0,0 +1,234 @@
+import os
+import re
+import sys
+import json
+import time
+import asyncio
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Dict, List, Any, Optional, Tuple
+
+from app.services.supabase_client import supabase_client, iter_scored_transactions
+from app.utils.dates import utc_now
+
+HOUR = 3600
+WHITESPACE_PATTERN = re.compile(r"\s+")
+UNKNOWN_LOCATION = sys.intern("Unknown")
+
+class GeoAggregator:
+    """Hourly per-location transaction counts, fraud counts and risk sums.
+
+    Locations are normalized and interned once at ingest, so every hourly
+    bucket shares one string object per location. Query results over
+    closed hours never change and are cached by (start hour, end hour);
+    only the current, still-open hour is merged in on each request.
+
+    Each worker only records its own traffic, so the last
+    GEO_BOOTSTRAP_HOURS are rebuilt from the database every
+    GEO_RECONCILE_SECONDS; records made while a rebuild runs are replayed
+    on top of it.
+    """
+
+    def __init__(self, retention_hours: Optional[int] = None, cache_size: Optional[int] = None):
+        self.retention_hours = retention_hours or int(os.getenv("GEO_RETENTION_HOURS", 24 * 30))
+        self.cache_size = cache_size or int(os.getenv("GEO_CACHE_SIZE", 256))
+        # Optional mapping of store identifiers to regions, e.g. {"Store 1523": "TX"}
+        self.store_regions: Dict[str, str] = json.loads(os.getenv("GEO_STORE_REGIONS", "{}"))
+
+        # hour -> location -> [transactions, fraud_count, risk_sum]
+        self._hours: Dict[int, Dict[str, List[float]]] = {}
+        self._normalized: Dict[str, str] = {}
+        self._regions: Dict[str, str] = {}
+        # normalize() also runs on the reconcile scan's worker thread
+        self._normalize_lock = threading.Lock()
+        self._cache: OrderedDict = OrderedDict()
+        self._counters = {"cache_hits": 0, "cache_misses": 0}
+        self._replay: Optional[List[Tuple[Optional[str], float, bool, float]]] = None
+        self.reconcile_interval = float(os.getenv("GEO_RECONCILE_SECONDS", 300))
+        self.reconciled_at: Optional[datetime] = None
+        self.bootstrapped = False
+
+    def normalize(self, raw: Optional[str]) -> str:
+        """Canonical, interned form of a location string"""
+        if not raw:
+            return UNKNOWN_LOCATION
+
+        location = self._normalized.get(raw)
+        if location is not None:
+            return location
+
+        parts = [WHITESPACE_PATTERN.sub(" ", part).strip() for part in raw.split(",")]
+        parts = [part for part in parts if part]
+        if not parts:
+            location = UNKNOWN_LOCATION
+        else:
+            city = parts[0].title()
+            # "dallas, tx" -> "Dallas, TX"; longer region names keep title case
+            rest = [part.upper() if len(part) <= 3 else part.title() for part in parts[1:]]
+            location = sys.intern(", ".join([city] + rest))
+
+        with self._normalize_lock:
+            if len(self._normalized) < 100000:
+                self._normalized[raw] = location
+            if location not in self._regions:
+                self._regions[location] = sys.intern(self._region_for(location))
+        return location
+
+    def _region_for(self, location: str) -> str:
+        if location in self.store_regions:
+            return self.store_regions[location]
+        if ", " in location:
+            return location.rsplit(", ", 1)[1]
+        return UNKNOWN_LOCATION
+
+    def record(self, location: Optional[str], risk_score: float, is_fraud: bool, timestamp: Optional[float] = None):
+        timestamp = timestamp or time.time()
+        self._add(self._hours, location, risk_score, is_fraud, timestamp)
+        if self._replay is not None:
+            self._replay.append((location, risk_score, is_fraud, timestamp))
+
+        if timestamp // HOUR < time.time() // HOUR:
+            # A closed hour changed, cached sums are stale
+            self._cache.clear()
+
+    def _add(self, hours: Dict[int, Dict[str, List[float]]], location: Optional[str], risk_score: float, is_fraud: bool, timestamp: float):
+        hour = int(timestamp // HOUR)
+        location = self.normalize(location)
+
+        counts = hours.setdefault(hour, {}).get(location)
+        if counts is None:
+            counts = hours[hour][location] = [0, 0, 0.0]
+        counts[0] += 1
+        counts[1] += 1 if is_fraud else 0
+        counts[2] += risk_score
+
+    def query(self, start_date: datetime, end_date: datetime, level: str = "location") -> Tuple[List[Dict[str, Any]], bool]:
+        """Per-location (or per-region) aggregates for a time range; returns (rows, cache_hit)"""
+        self._expire()
+
+        start_hour = int(start_date.timestamp() // HOUR)
+        end_hour = int(end_date.timestamp() // HOUR)
+        open_hour = int(time.time() // HOUR)
+
+        closed_end = min(end_hour, open_hour - 1)
+        cache_key = (start_hour, closed_end, level)
+        closed = self._cache.get(cache_key)
+        cache_hit = closed is not None
+
+        if cache_hit:
+            self._cache.move_to_end(cache_key)
+            self._counters["cache_hits"] += 1
+        else:
+            self._counters["cache_misses"] += 1
+            closed = {}
+            for hour in range(max(start_hour, open_hour - self.retention_hours), closed_end + 1):
+                self._accumulate(closed, self._hours.get(hour), level)
+            self._cache[cache_key] = closed
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+        totals = closed
+        if start_hour <= open_hour <= end_hour and open_hour in self._hours:
+            totals = {key: list(counts) for key, counts in closed.items()}
+            self._accumulate(totals, self._hours[open_hour], level)
+
+        rows = [
+            {
+                "location" if level == "location" else "region": key,
+                **({"region": self._regions.get(key, UNKNOWN_LOCATION)} if level == "location" else {}),
+                "transactions": int(transactions),
+                "fraud_count": int(fraud_count),
+                "fraud_rate": round(fraud_count / transactions, 4) if transactions else 0.0,
+                "mean_risk": round(risk_sum / transactions, 4) if transactions else 0.0
+            }
+            for key, (transactions, fraud_count, risk_sum) in totals.items()
+        ]
+        rows.sort(key=lambda row: row["transactions"], reverse=True)
+        return rows, cache_hit
+
+    def _accumulate(self, totals: Dict[str, List[float]], hour: Optional[Dict[str, List[float]]], level: str):
+        if not hour:
+            return
+        for location, (transactions, fraud_count, risk_sum) in hour.items():
+            key = location if level == "location" else self._regions.get(location, UNKNOWN_LOCATION)
+            counts = totals.get(key)
+            if counts is None:
+                totals[key] = [transactions, fraud_count, risk_sum]
+            else:
+                counts[0] += transactions
+                counts[1] += fraud_count
+                counts[2] += risk_sum
+
+    def _expire(self):
+        oldest = int(time.time() // HOUR) - self.retention_hours
+        for hour in [hour for hour in self._hours if hour < oldest]:
+            del self._hours[hour]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self._counters,
+            "hours": len(self._hours),
+            "locations": len(self._regions),
+            "cached_ranges": len(self._cache),
+            "bootstrapped": self.bootstrapped,
+            "reconciled_at": self.reconciled_at.isoformat() if self.reconciled_at else None
+        }
+
+    async def reconcile(self, hours: Optional[int] = None):
+        """Rebuild the last GEO_BOOTSTRAP_HOURS from Supabase"""
+        if self._replay is not None:
+            return
+
+        hours = hours or int(os.getenv("GEO_BOOTSTRAP_HOURS", 24 * 7))
+        end_date = utc_now()
+        # Whole hours, so the oldest rebuilt bucket is complete
+        start_date = datetime.fromtimestamp((end_date.timestamp() - hours * HOUR) // HOUR * HOUR, timezone.utc)
+        self._replay = []
+
+        try:
+            rebuilt = await supabase_client._run_scan(self._build_hours, start_date, end_date)
+
+            # Records made after the scan's cut-off are replayed on top
+            cutoff = end_date.timestamp()
+            for location, risk_score, is_fraud, timestamp in self._replay:
+                if timestamp > cutoff:
+                    self._add(rebuilt, location, risk_score, is_fraud, timestamp)
+
+            # Hours before the rebuilt range keep what this worker recorded
+            start_hour = int(start_date.timestamp() // HOUR)
+            for hour, locations in self._hours.items():
+                if hour < start_hour:
+                    rebuilt[hour] = locations
+
+            self._hours = rebuilt
+            self._cache.clear()
+            self.bootstrapped = True
+            self.reconciled_at = end_date
+        finally:
+            self._replay = None
+
+    def _build_hours(self, start_date: datetime, end_date: datetime) -> Dict[int, Dict[str, List[float]]]:
+        """Scan scored transactions into fresh hourly buckets (runs in a worker thread)"""
+        hours: Dict[int, Dict[str, List[float]]] = {}
+        for row in iter_scored_transactions(start_date, end_date):
+            self._add(
+                hours,
+                row.get("location"),
+                float(row.get("risk_score") or 0.0),
+                row.get("risk_level") == "high",
+                datetime.fromisoformat(row["scored_at"]).timestamp()
+            )
+        return hours
+
+    async def run_reconciler(self):
+        """Rebuild on startup and then at a fixed interval"""
+        while True:
+            try:
+                await self.reconcile()
+            except Exception as e:
+                print(f"Geo aggregate reconcile error: {e}")
+            await asyncio.sleep(self.reconcile_interval)
+
+# Initialize global aggregator
+geo_aggregator = GeoAggregator()
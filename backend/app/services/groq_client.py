@@ -1,8 +1,13 @@
 import os
-from groq import Groq
-from typing import Dict, List, Any
+from typing import Dict, List, Any, AsyncIterator, Optional
 import json
 
+from app.services.llm_client import AsyncLLMClient
+from app.services.container import container
+
+ANALYST_UNAVAILABLE_MESSAGE = "I'm sorry, but the AI explanation service is currently unavailable. Please check your Groq API configuration."
+ANALYST_ERROR_MESSAGE = "I apologize, but I'm unable to process your question at the moment. Please try again later."
+
 class GroqExplainer:
     def __init__(self):
         self.api_key = os.getenv("GROQ_API_KEY")
@@ -10,37 +15,38 @@ class GroqExplainer:
             print("Warning: GROQ_API_KEY not found. Using mock explanations.")
             self.client = None
         else:
-            self.client = Groq(api_key=self.api_key)
+            self.client = AsyncLLMClient(api_key=self.api_key)
     
-    async def generate_explanation(
+    async def generate_signature_explanation(
         self,
-        transaction_id: str,
         risk_score: float,
         flags: List[str],
-        shap_values: Dict[str, float],
-        transaction_data: Dict[str, Any]
-    ) -> str:
-        """Generate AI-powered explanation for fraud detection"""
+        shap_values: Dict[str, float]
+    ) -> Optional[str]:
+        """Generate an AI explanation for a risk signature, or None if the LLM is unavailable.
+
+        The prompt only carries what the risk signature is built from (risk
+        bucket, flags, top factors), never transaction ids, amounts, users or
+        locations, so the text can be shared by every transaction with the
+        same signature.
+        """
         
         if not self.client:
-            return self._generate_mock_explanation(risk_score, flags)
+            return None
         
         try:
-            # Prepare context for Groq
-            context = self._prepare_context(
-                transaction_id, risk_score, flags, shap_values, transaction_data
-            )
+            context = self._prepare_context(risk_score, flags, shap_values)
             
             # Create prompt for Groq
             prompt = self._create_explanation_prompt(context)
             
-            # Call Groq API
-            response = self.client.chat.completions.create(
+            # Call Groq API (non-blocking, bounded and circuit-broken)
+            explanation = await self.client.chat(
                 model="mixtral-8x7b-32768",
                 messages=[
                     {
                         "role": "system",
-                        "content": "You are an expert fraud analyst AI assistant. Provide clear, concise explanations for fraud detection decisions. Keep explanations under 100 words and focus on the most important risk factors."
+                        "content": "You are an expert fraud analyst AI assistant. Provide clear, concise explanations for fraud detection decisions. Keep explanations under 100 words and focus on the most important risk factors. Do not invent transaction details such as amounts, users or locations."
                     },
                     {
                         "role": "user",
@@ -51,36 +57,29 @@ class GroqExplainer:
                 max_tokens=200
             )
             
-            explanation = response.choices[0].message.content.strip()
             return explanation
             
         except Exception as e:
-            print(f"Error calling Groq API: {e}")
-            return self._generate_mock_explanation(risk_score, flags)
+            print(f"Error calling Groq API: {e!r}")
+            return None
     
     def _prepare_context(
         self,
-        transaction_id: str,
         risk_score: float,
         flags: List[str],
-        shap_values: Dict[str, float],
-        transaction_data: Dict[str, Any]
+        shap_values: Dict[str, float]
     ) -> Dict[str, Any]:
-        """Prepare context data for explanation generation"""
+        """Prepare the signature-level context for explanation generation"""
         
-        # Get top contributing factors from SHAP values
+        # Same inputs as ExplanationCache.risk_signature: risk bucket, flags, top-3 factor directions
+        risk_bucket = min(int(risk_score * 10), 9)
         top_factors = sorted(shap_values.items(), key=lambda x: abs(x[1]), reverse=True)[:3]
         
         context = {
-            "transaction_id": transaction_id,
-            "risk_score": risk_score,
+            "risk_range": f"{risk_bucket / 10:.1f}-{(risk_bucket + 1) / 10:.1f}",
             "risk_level": "HIGH" if risk_score >= 0.8 else "MEDIUM" if risk_score >= 0.5 else "LOW",
-            "flags": flags,
-            "top_factors": top_factors,
-            "amount": transaction_data.get("amount", 0),
-            "user_id": transaction_data.get("user_id", "unknown"),
-            "location": transaction_data.get("location", "unknown"),
-            "timestamp": transaction_data.get("timestamp", "unknown")
+            "flags": sorted(set(flags)),
+            "top_factors": [(name, "increases" if value > 0 else "decreases") for name, value in top_factors]
         }
         
         return context
@@ -89,24 +88,25 @@ class GroqExplainer:
         """Create prompt for Groq explanation generation"""
         
         prompt = f"""
-Analyze this transaction for fraud risk:
+Explain this fraud risk pattern:
 
-Transaction ID: {context['transaction_id']}
-Risk Score: {context['risk_score']:.2f} ({context['risk_level']} RISK)
-Amount: ${context['amount']}
-Location: {context['location']}
+Risk Score: {context['risk_range']} ({context['risk_level']} RISK)
 
 Risk Flags:
-{chr(10).join(f"- {flag}" for flag in context['flags'])}
+{chr(10).join(f"- {flag}" for flag in context['flags']) or "- none"}
 
 Top Risk Factors (from ML model):
-{chr(10).join(f"- {factor}: {value:.3f}" for factor, value in context['top_factors'])}
+{chr(10).join(f"- {factor} {direction} risk" for factor, direction in context['top_factors'])}
 
-Provide a clear, concise explanation (1-2 sentences) of why this transaction was flagged for fraud. Focus on the most significant risk factors and what they indicate about potential fraudulent activity.
+Provide a clear, concise explanation (1-2 sentences) of why a transaction with this pattern is flagged for fraud. Focus on the most significant risk factors and what they indicate about potential fraudulent activity.
 """
         
         return prompt
     
+    def generate_template_explanation(self, risk_score: float, flags: List[str]) -> str:
+        """Generate a deterministic explanation without calling the LLM"""
+        return self._generate_mock_explanation(risk_score, flags)
+    
     def _generate_mock_explanation(self, risk_score: float, flags: List[str]) -> str:
         """Generate mock explanation when Groq API is not available"""
         
@@ -143,40 +143,88 @@ Provide a clear, concise explanation (1-2 sentences) of why this transaction was
         """Generate response for analyst Q&A"""
         
         if not self.client:
-            return "I'm sorry, but the AI explanation service is currently unavailable. Please check your Groq API configuration."
+            return ANALYST_UNAVAILABLE_MESSAGE
         
         try:
-            prompt = f"""
-You are an expert fraud analyst AI assistant helping with fraud investigation.
-
-Context:
-- Current fraud detection system data
-- Recent transaction patterns
-- Risk assessment models
-
-Question: {question}
-
-Provide a helpful, accurate response based on fraud detection best practices. Keep responses concise and actionable.
-"""
-            
-            response = self.client.chat.completions.create(
+            return await self.client.chat(
                 model="mixtral-8x7b-32768",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are an expert fraud analyst AI assistant. Provide helpful, accurate information about fraud detection, risk assessment, and investigation techniques."
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
+                messages=self._create_analyst_messages(question, context),
                 temperature=0.3,
                 max_tokens=300
             )
             
-            return response.choices[0].message.content.strip()
-            
         except Exception as e:
             print(f"Error generating analyst response: {e}")
-            return "I apologize, but I'm unable to process your question at the moment. Please try again later."
\ No newline at end of file
+            return ANALYST_ERROR_MESSAGE
+    
+    async def stream_analyst_response(self, question: str, context: Dict[str, Any]) -> AsyncIterator[str]:
+        """Stream the analyst Q&A response token by token"""
+        
+        if not self.client:
+            yield ANALYST_UNAVAILABLE_MESSAGE
+            return
+        
+        tokens = self.client.stream_chat(
+            model="mixtral-8x7b-32768",
+            messages=self._create_analyst_messages(question, context),
+            temperature=0.3,
+            max_tokens=300
+        )
+        
+        started = False
+        try:
+            async for token in tokens:
+                started = True
+                yield token
+                
+        except Exception as e:
+            print(f"Error streaming analyst response: {e}")
+            # Only substitute the apology if nothing has been sent yet;
+            # a partial answer must not look complete to the caller
+            if started:
+                raise
+            yield ANALYST_ERROR_MESSAGE
+        finally:
+            await tokens.aclose()
+    
+    def _create_analyst_messages(self, question: str, context: Dict[str, Any]) -> List[Dict[str, str]]:
+        """Create chat messages for analyst Q&A"""
+        
+        # Keep the prompt small: only the top retrieved snippets, trimmed
+        snippets = [snippet[:300] for snippet in context.get("snippets", [])[:5]]
+        if snippets:
+            context_lines = "\n".join(f"- {snippet}" for snippet in snippets)
+        else:
+            context_lines = "- Current fraud detection system data\n- Recent transaction patterns\n- Risk assessment models"
+        
+        prompt = f"""
+You are an expert fraud analyst AI assistant helping with fraud investigation.
+
+Context (from our own recent fraud data):
+{context_lines}
+
+Question: {question}
+
+Provide a helpful, accurate response based on fraud detection best practices. Keep responses concise and actionable.
+"""
+        
+        return [
+            {
+                "role": "system",
+                "content": "You are an expert fraud analyst AI assistant. Provide helpful, accurate information about fraud detection, risk assessment, and investigation techniques."
+            },
+            {
+                "role": "user",
+                "content": prompt
+            }
+        ]
+    
+    def get_client_stats(self) -> Dict[str, Any]:
+        """Get LLM client token, latency and circuit breaker counters"""
+        if not self.client:
+            return {"enabled": False}
+        
+        return {"enabled": True, **self.client.stats()}
+
+# Shared explainer, its LLM client is created on first use
+groq_explainer = container.register("groq_explainer", GroqExplainer)
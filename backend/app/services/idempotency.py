@@ -0,0 +1,116 @@
+import os
+import time
+import asyncio
+import hashlib
+from collections import OrderedDict
+from typing import Dict, Any, Awaitable, Callable, Optional, Tuple
+
+from app.services.metrics import metrics
+
+class IdempotencyConflict(Exception):
+    """The key was already used with a different request payload"""
+
+class IdempotencyCache:
+    """Results of recent requests by idempotency key, with in-flight coalescing.
+
+    A repeated key with the same fingerprint gets the stored result
+    (a dictionary lookup); one with a different fingerprint raises
+    IdempotencyConflict. Concurrent duplicates await the first request's
+    computation instead of starting their own. The computation runs as
+    its own task, so it finishes and is cached even if the client that
+    started it disconnects. Failures are not cached. Entries expire after
+    ``ttl`` seconds and the least recently used go past ``max_entries``.
+    The cache is per worker; duplicates that reach another worker are
+    caught by the unique index on persistence.
+    """
+
+    def __init__(self, name: str, max_entries: int, ttl: float):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[str, float, Any]]" = OrderedDict()
+        self._in_flight: Dict[str, Tuple[str, asyncio.Future]] = {}
+        self._counters = {"hits": 0, "coalesced": 0, "misses": 0, "conflicts": 0, "expired": 0, "evicted": 0}
+        metrics.register_collector(self._metrics)
+
+    @staticmethod
+    def fingerprint(payload: str) -> str:
+        return hashlib.sha1(payload.encode()).hexdigest()
+
+    def get(self, key: str, fingerprint: str) -> Optional[Any]:
+        """Stored result for a repeat of the same request, or None"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        stored_fingerprint, expires_at, result = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            self._counters["expired"] += 1
+            return None
+        if stored_fingerprint != fingerprint:
+            self._counters["conflicts"] += 1
+            raise IdempotencyConflict(f"{key} was already used with a different request")
+
+        self._entries.move_to_end(key)
+        self._counters["hits"] += 1
+        return result
+
+    async def run(self, key: str, fingerprint: str, compute: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """Return (result, replayed); replayed is True when no new computation ran for this call"""
+        result = self.get(key, fingerprint)
+        if result is not None:
+            return result, True
+
+        in_flight = self._in_flight.get(key)
+        if in_flight is not None:
+            in_flight_fingerprint, task = in_flight
+            if in_flight_fingerprint != fingerprint:
+                self._counters["conflicts"] += 1
+                raise IdempotencyConflict(f"{key} is being processed for a different request")
+            self._counters["coalesced"] += 1
+            return await asyncio.shield(task), True
+
+        self._counters["misses"] += 1
+        task = asyncio.ensure_future(compute())
+        self._in_flight[key] = (fingerprint, task)
+        task.add_done_callback(lambda done: self._complete(key, fingerprint, done))
+        return await asyncio.shield(task), False
+
+    def _complete(self, key: str, fingerprint: str, task: asyncio.Future):
+        self._in_flight.pop(key, None)
+        # exception() also marks a failure as retrieved when nobody is awaiting it any more
+        if task.cancelled() or task.exception() is not None:
+            return
+
+        self._entries[key] = (fingerprint, time.monotonic() + self.ttl, task.result())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._counters["evicted"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self._counters,
+            "entries": len(self._entries),
+            "in_flight": len(self._in_flight),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl
+        }
+
+    def _metrics(self):
+        return [
+            ("idempotency_requests_total", "counter", "Idempotent requests by outcome", [
+                ({"cache": self.name, "outcome": outcome}, self._counters[outcome])
+                for outcome in ("hits", "coalesced", "misses", "conflicts")
+            ]),
+            ("idempotency_entries", "gauge", "Results held by an idempotency cache",
+             [({"cache": self.name}, len(self._entries))])
+        ]
+
+# Initialize global cache for /api/score
+score_idempotency = IdempotencyCache(
+    "score",
+    max_entries=int(os.getenv("SCORE_IDEMPOTENCY_MAX_ENTRIES", 20000)),
+    ttl=float(os.getenv("SCORE_IDEMPOTENCY_TTL_SECONDS", 600))
+)
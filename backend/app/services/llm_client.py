@@ -0,0 +1,320 @@
+import os
+import time
+import random
+import asyncio
+from collections import deque
+from typing import Dict, List, Any, Optional, AsyncIterator
+
+from app.services.metrics import metrics, track_external
+
+class CircuitOpenError(Exception):
+    """Raised when the circuit breaker is rejecting upstream calls"""
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker with a single half-open probe.
+
+    Calls slower than ``slow_call_threshold`` count as failures, so a
+    degraded upstream trips the breaker just like an erroring one.
+    """
+
+    def __init__(self, failure_threshold: int, reset_timeout: float, slow_call_threshold: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.slow_call_threshold = slow_call_threshold
+
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self._probe_in_flight = False
+
+    def allow(self) -> bool:
+        if self.state == "closed":
+            return True
+
+        if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_timeout:
+            self.state = "half_open"
+
+        if self.state == "half_open" and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return True
+
+        return False
+
+    def record_success(self, latency: float):
+        if latency > self.slow_call_threshold:
+            self.record_failure()
+            return
+
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self._probe_in_flight = False
+
+    def release_probe(self):
+        """Give up a half-open probe slot without recording an outcome"""
+        self._probe_in_flight = False
+
+    def record_failure(self):
+        self.consecutive_failures += 1
+        self._probe_in_flight = False
+
+        if self.state == "half_open" or self.consecutive_failures >= self.failure_threshold:
+            if self.state != "open":
+                self.times_opened += 1
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+class AsyncLLMClient:
+    """Non-blocking Groq chat client with bounded concurrency and failure isolation.
+
+    Every call runs under a concurrency semaphore and an overall deadline
+    (queueing and retries included). Transient errors are retried with
+    jittered exponential backoff, and a circuit breaker fails fast while
+    the upstream is erroring or slow. Set GROQ_BASE_URL to point the client
+    at a local fake server.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        base_url: Optional[str] = None,
+        max_concurrency: Optional[int] = None,
+        deadline: Optional[float] = None,
+        max_retries: Optional[int] = None
+    ):
+        from groq import AsyncGroq
+        self.client = AsyncGroq(
+            api_key=api_key,
+            base_url=base_url or os.getenv("GROQ_BASE_URL") or None,
+            max_retries=0
+        )
+        self.max_concurrency = max_concurrency or int(os.getenv("LLM_MAX_CONCURRENCY", 8))
+        self.deadline = deadline or float(os.getenv("LLM_DEADLINE_SECONDS", 8.0))
+        self.max_retries = max_retries if max_retries is not None else int(os.getenv("LLM_MAX_RETRIES", 2))
+        self.backoff_base = float(os.getenv("LLM_BACKOFF_BASE_SECONDS", 0.2))
+
+        self.breaker = CircuitBreaker(
+            failure_threshold=int(os.getenv("LLM_BREAKER_FAILURES", 5)),
+            reset_timeout=float(os.getenv("LLM_BREAKER_RESET_SECONDS", 30.0)),
+            slow_call_threshold=float(os.getenv("LLM_SLOW_CALL_SECONDS", 4.0))
+        )
+
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._in_flight = 0
+        self._latencies = deque(maxlen=1000)
+        self._first_token_latencies = deque(maxlen=1000)
+        self._counters = {
+            "calls": 0,
+            "streams": 0,
+            "streams_cancelled": 0,
+            "stream_chunks": 0,
+            "successes": 0,
+            "failures": 0,
+            "timeouts": 0,
+            "retries": 0,
+            "short_circuited": 0,
+            "prompt_tokens": 0,
+            "completion_tokens": 0
+        }
+        metrics.register_collector(self._metrics)
+
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        # Created lazily so it binds to the running event loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    async def chat(
+        self,
+        messages: List[Dict[str, str]],
+        model: str,
+        temperature: float,
+        max_tokens: int,
+        deadline: Optional[float] = None
+    ) -> str:
+        """Run a chat completion and return the message content"""
+        if not self.breaker.allow():
+            self._counters["short_circuited"] += 1
+            raise CircuitOpenError("LLM circuit breaker is open")
+
+        self._counters["calls"] += 1
+
+        try:
+            response, latency = await asyncio.wait_for(
+                self._call_with_retries(messages, model, temperature, max_tokens),
+                timeout=deadline or self.deadline
+            )
+        except asyncio.CancelledError:
+            # Caller went away; the call says nothing about upstream health
+            self.breaker.release_probe()
+            raise
+        except asyncio.TimeoutError:
+            self._counters["timeouts"] += 1
+            self._counters["failures"] += 1
+            self.breaker.record_failure()
+            raise
+        except Exception:
+            self._counters["failures"] += 1
+            self.breaker.record_failure()
+            raise
+
+        # Upstream time of the successful attempt; queueing for a slot is not the upstream's fault
+        self._latencies.append(latency)
+        self._counters["successes"] += 1
+        self.breaker.record_success(latency)
+
+        usage = getattr(response, "usage", None)
+        if usage:
+            self._counters["prompt_tokens"] += usage.prompt_tokens or 0
+            self._counters["completion_tokens"] += usage.completion_tokens or 0
+
+        return response.choices[0].message.content.strip()
+
+    async def _call_with_retries(self, messages, model, temperature, max_tokens):
+        async with self.semaphore:
+            self._in_flight += 1
+            try:
+                for attempt in range(self.max_retries + 1):
+                    try:
+                        started = time.monotonic()
+                        with track_external("groq", "chat"):
+                            response = await self.client.chat.completions.create(
+                                model=model,
+                                messages=messages,
+                                temperature=temperature,
+                                max_tokens=max_tokens
+                            )
+                        return response, time.monotonic() - started
+                    except Exception as e:
+                        if attempt >= self.max_retries or not _is_retryable(e):
+                            raise
+
+                        self._counters["retries"] += 1
+                        backoff = self.backoff_base * (2 ** attempt)
+                        await asyncio.sleep(backoff * random.uniform(0.5, 1.5))
+            finally:
+                self._in_flight -= 1
+
+    async def stream_chat(
+        self,
+        messages: List[Dict[str, str]],
+        model: str,
+        temperature: float,
+        max_tokens: int
+    ) -> AsyncIterator[str]:
+        """Relay completion tokens as they arrive.
+
+        The deadline applies to the wait for each chunk rather than the whole
+        response. Closing the iterator (e.g. on client disconnect) closes the
+        upstream stream so abandoned questions stop consuming capacity.
+        """
+        if not self.breaker.allow():
+            self._counters["short_circuited"] += 1
+            raise CircuitOpenError("LLM circuit breaker is open")
+
+        self._counters["calls"] += 1
+        self._counters["streams"] += 1
+        first_token_latency = None
+        stream = None
+
+        async with self.semaphore:
+            self._in_flight += 1
+            started = time.monotonic()
+            try:
+                # Time until the stream opens; first-token latency is in stats()
+                with track_external("groq", "chat_stream"):
+                    stream = await asyncio.wait_for(
+                        self.client.chat.completions.create(
+                            model=model,
+                            messages=messages,
+                            temperature=temperature,
+                            max_tokens=max_tokens,
+                            stream=True
+                        ),
+                        timeout=self.deadline
+                    )
+                chunks = stream.__aiter__()
+
+                while True:
+                    try:
+                        chunk = await asyncio.wait_for(chunks.__anext__(), timeout=self.deadline)
+                    except StopAsyncIteration:
+                        break
+
+                    content = chunk.choices[0].delta.content if chunk.choices else None
+                    if not content:
+                        continue
+
+                    if first_token_latency is None:
+                        first_token_latency = time.monotonic() - started
+                        self._first_token_latencies.append(first_token_latency)
+
+                    self._counters["stream_chunks"] += 1
+                    yield content
+
+            except (asyncio.CancelledError, GeneratorExit):
+                self._counters["streams_cancelled"] += 1
+                self.breaker.release_probe()
+                raise
+            except asyncio.TimeoutError:
+                self._counters["timeouts"] += 1
+                self._counters["failures"] += 1
+                self.breaker.record_failure()
+                raise
+            except Exception:
+                self._counters["failures"] += 1
+                self.breaker.record_failure()
+                raise
+            else:
+                self._latencies.append(time.monotonic() - started)
+                self._counters["successes"] += 1
+                # A stream is judged on how quickly it starts, not its length
+                self.breaker.record_success(first_token_latency or 0.0)
+            finally:
+                self._in_flight -= 1
+                if stream is not None:
+                    await stream.response.aclose()
+
+    def _metrics(self) -> List[tuple]:
+        return [
+            ("llm_requests_in_flight", "gauge", "LLM calls holding a concurrency slot", [({}, self._in_flight)]),
+            ("llm_breaker_open", "gauge", "1 while the LLM circuit breaker is not closed", [({}, int(self.breaker.state != "closed"))]),
+            ("llm_tokens_total", "counter", "LLM tokens used", [
+                ({"kind": "prompt"}, self._counters["prompt_tokens"]),
+                ({"kind": "completion"}, self._counters["completion_tokens"])
+            ])
+        ]
+
+    def stats(self) -> Dict[str, Any]:
+        """Token, latency and breaker counters"""
+        latencies = sorted(self._latencies)
+        first_token_latencies = sorted(self._first_token_latencies)
+
+        return {
+            **self._counters,
+            "in_flight": self._in_flight,
+            "max_concurrency": self.max_concurrency,
+            "breaker_state": self.breaker.state,
+            "breaker_opened": self.breaker.times_opened,
+            "latency_p50_ms": _percentile(latencies, 0.50) * 1000,
+            "latency_p95_ms": _percentile(latencies, 0.95) * 1000,
+            "latency_max_ms": (latencies[-1] if latencies else 0.0) * 1000,
+            "first_token_p50_ms": _percentile(first_token_latencies, 0.50) * 1000,
+            "first_token_p95_ms": _percentile(first_token_latencies, 0.95) * 1000
+        }
+
+def _is_retryable(error: Exception) -> bool:
+    """Retry transport errors, timeouts, rate limits and server errors; anything else is a bug or a bad request"""
+    from groq import APIConnectionError, APIStatusError
+
+    if isinstance(error, APIStatusError):
+        return error.status_code == 429 or error.status_code >= 500
+    # APITimeoutError is an APIConnectionError
+    return isinstance(error, (APIConnectionError, asyncio.TimeoutError, ConnectionError))
+
+def _percentile(sorted_values: List[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(int(len(sorted_values) * fraction), len(sorted_values) - 1)
+    return sorted_values[index]
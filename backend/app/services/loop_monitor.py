@@ -0,0 +1,225 @@
+import os
+import sys
+import time
+import asyncio
+import threading
+import traceback
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Any, Optional
+
+from app.services.metrics import metrics
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MIDDLEWARE_DIR = os.path.join(APP_DIR, "middleware") + os.sep
+UNKNOWN_SITE = "<stack not captured>"
+
+LOOP_LAG = metrics.histogram(
+    "event_loop_lag_seconds", "Delay between a heartbeat's scheduled and actual wake-up",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+)
+LOOP_STALLS = metrics.counter(
+    "event_loop_stalls_total", "Heartbeats delayed past LOOP_STALL_THRESHOLD_MS"
+)
+
+class LoopStallMonitor:
+    """Measures event-loop lag and captures the stack of whatever blocks the loop.
+
+    A heartbeat task sleeps for ``interval`` and records how late it woke
+    up. A watchdog thread notices when the heartbeat is overdue by more
+    than ``threshold`` and samples the loop thread's stack with
+    sys._current_frames() while it is still blocked. When the loop
+    resumes, the stall's full duration is charged to that call site.
+    A stall with no captured stack usually means native code held the
+    GIL, so the watchdog thread could not run either.
+    Call sites are keyed by the innermost frame inside the app package,
+    so stalls aggregate by the route or service code that made the
+    blocking call rather than by library internals.
+    """
+
+    def __init__(self, interval_ms: Optional[float] = None, threshold_ms: Optional[float] = None, max_sites: Optional[int] = None):
+        self.interval = (interval_ms or float(os.getenv("LOOP_MONITOR_INTERVAL_MS", 50))) / 1000
+        self.threshold = (threshold_ms or float(os.getenv("LOOP_STALL_THRESHOLD_MS", 100))) / 1000
+        self.max_sites = max_sites or int(os.getenv("LOOP_STALL_MAX_SITES", 200))
+        self.enabled = os.getenv("LOOP_MONITOR_ENABLED", "true").lower() in ("1", "true")
+
+        self._lock = threading.Lock()
+        self._sites: Dict[str, Dict[str, Any]] = {}
+        self._events = deque(maxlen=1000)
+        self._stop = threading.Event()
+        self._loop_thread_id: Optional[int] = None
+        self._last_beat = 0.0
+        self._captured: Optional[str] = None
+        self._counters = {"stalls": 0, "uncaptured": 0, "dropped_sites": 0}
+        self.max_lag = 0.0
+        self.running = False
+
+    async def run(self):
+        """Heartbeat task; also starts the watchdog thread for its lifetime"""
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stop.clear()
+        watchdog = threading.Thread(target=self._watch, name="loop-stall-watchdog", daemon=True)
+        watchdog.start()
+        self.running = True
+
+        try:
+            while True:
+                await asyncio.sleep(self.interval)
+                self._beat(time.monotonic())
+        finally:
+            self.running = False
+            self._stop.set()
+
+    def _beat(self, now: float):
+        with self._lock:
+            lag = max(now - self._last_beat - self.interval, 0.0)
+            self._last_beat = now
+            site, self._captured = self._captured, None
+
+            self.max_lag = max(self.max_lag, lag)
+            stalled = lag >= self.threshold
+            if stalled:
+                self._record_stall(site, lag)
+
+        LOOP_LAG.observe(lag)
+        if stalled:
+            LOOP_STALLS.inc()
+
+    def _record_stall(self, site: Optional[str], lag: float):
+        self._counters["stalls"] += 1
+        if site is None:
+            self._counters["uncaptured"] += 1
+            site = UNKNOWN_SITE
+
+        entry = self._sites.get(site)
+        if entry is None:
+            entry = self._new_site(site, [])
+        if entry is not None:
+            entry["count"] += 1
+            entry["total_ms"] += lag * 1000
+            entry["max_ms"] = max(entry["max_ms"], lag * 1000)
+            entry["last_seen"] = datetime.now().isoformat()
+
+        self._events.append((time.monotonic(), lag * 1000, site))
+
+    def _new_site(self, site: str, stack: List[str]) -> Optional[Dict[str, Any]]:
+        if len(self._sites) >= self.max_sites:
+            self._counters["dropped_sites"] += 1
+            return None
+        entry = self._sites[site] = {"count": 0, "total_ms": 0.0, "max_ms": 0.0, "last_seen": None, "stack": stack}
+        return entry
+
+    def _watch(self):
+        poll = max(self.threshold / 4, 0.005)
+        while not self._stop.wait(poll):
+            with self._lock:
+                beat = self._last_beat
+                overdue = time.monotonic() - beat - self.interval
+                if overdue < self.threshold or self._captured is not None:
+                    continue
+
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            stack = traceback.extract_stack(frame)
+            del frame
+            site = call_site(stack)
+
+            with self._lock:
+                # Only attribute it if the loop is still stuck in the same stall
+                if self._last_beat == beat and self._captured is None:
+                    self._captured = site
+                    entry = self._sites.get(site)
+                    if entry is None:
+                        self._new_site(site, format_stack(stack))
+                    else:
+                        entry["stack"] = format_stack(stack)
+
+    def report(self, limit: int = 20) -> Dict[str, Any]:
+        """Stall call sites ordered by total blocked time"""
+        with self._lock:
+            sites = sorted(
+                ({"site": site, **entry} for site, entry in self._sites.items()),
+                key=lambda entry: entry["total_ms"],
+                reverse=True
+            )[:limit]
+
+        return {
+            "running": self.running,
+            "worker_id": os.getenv("WORKER_ID"),
+            "interval_ms": self.interval * 1000,
+            "threshold_ms": self.threshold * 1000,
+            "max_lag_ms": round(self.max_lag * 1000, 1),
+            **self._counters,
+            "sites": [
+                {**entry, "total_ms": round(entry["total_ms"], 1), "max_ms": round(entry["max_ms"], 1)}
+                for entry in sites
+            ]
+        }
+
+    def reset(self):
+        with self._lock:
+            self._sites.clear()
+            self._events.clear()
+            self._counters = {key: 0 for key in self._counters}
+            self.max_lag = 0.0
+
+    def stalls_since(self, started: float, min_ms: float = 0.0) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [
+                {"site": site, "stall_ms": round(stall_ms, 1), "stack": self._sites.get(site, {}).get("stack", [])}
+                for timestamp, stall_ms, site in self._events
+                if timestamp >= started and stall_ms >= min_ms
+            ]
+
+    @contextmanager
+    def assert_no_stalls(self, max_ms: Optional[float] = None):
+        """Fail with the blocking stacks if the loop stalls longer than max_ms inside the block.
+
+        Meant for tests and CI runs against a started app (e.g. inside a
+        TestClient context), where the monitor's loop is the app's loop.
+        Only stalls past the monitor's threshold are recorded, so a lower
+        max_ms needs a lower LOOP_STALL_THRESHOLD_MS.
+        """
+        if not self.running:
+            raise RuntimeError("Loop monitor is not running; start the app with LOOP_MONITOR_ENABLED=true")
+
+        max_ms = self.threshold * 1000 if max_ms is None else max_ms
+        started = time.monotonic()
+        yield
+        # Let the heartbeat observe the end of a stall that finished with the block
+        time.sleep(self.interval * 2)
+
+        stalls = self.stalls_since(started, max_ms)
+        if stalls:
+            details = "\n\n".join(
+                f"{stall['stall_ms']} ms at {stall['site']}\n" + "".join(stall["stack"][-8:])
+                for stall in stalls
+            )
+            raise AssertionError(f"Event loop blocked longer than {max_ms} ms ({len(stalls)} stalls):\n\n{details}")
+
+def call_site(stack: traceback.StackSummary) -> str:
+    """Innermost route or service frame, or the innermost frame overall.
+
+    Middleware frames wrap every request, so they never identify the blocker.
+    """
+    for frame in reversed(stack):
+        filename = os.path.normpath(frame.filename)
+        if filename.startswith(APP_DIR + os.sep) and not filename.startswith(MIDDLEWARE_DIR) and not filename.endswith("loop_monitor.py"):
+            return f"{os.path.relpath(filename, os.path.dirname(APP_DIR))}:{frame.lineno} in {frame.name}"
+
+    frame = stack[-1] if stack else None
+    if frame is None:
+        return UNKNOWN_SITE
+    if frame.name == "select" and frame.filename.endswith("selectors.py"):
+        # The loop was idle but could not get the GIL back from another thread
+        return "GIL contention (loop waiting in selectors.select)"
+    return f"{frame.filename}:{frame.lineno} in {frame.name}"
+
+def format_stack(stack: traceback.StackSummary) -> List[str]:
+    return stack.format()[-15:]
+
+# Initialize global monitor
+loop_monitor = LoopStallMonitor()
@@ -0,0 +1,291 @@
+import os
+import json
+import time
+import bisect
+import asyncio
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Any, Callable, Iterable, Optional, Tuple
+
+# Seconds; covers sub-millisecond model calls up to slow upstream requests
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+class Metric:
+    """Base for label-keyed metric families; values are guarded by one lock per family"""
+
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+
+    def _labels(self, labelvalues: Tuple[str, ...]) -> Dict[str, str]:
+        return dict(zip(self.labelnames, labelvalues))
+
+    def samples(self) -> List[Tuple[str, Dict[str, str], float]]:
+        with self._lock:
+            return [("", self._labels(key), value) for key, value in self._values.items()]
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, *labelvalues: str, amount: float = 1.0):
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0.0) + amount
+
+class Gauge(Metric):
+    type = "gauge"
+
+    def set(self, value: float, *labelvalues: str):
+        with self._lock:
+            self._values[labelvalues] = value
+
+    def inc(self, *labelvalues: str, amount: float = 1.0):
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0.0) + amount
+
+    def dec(self, *labelvalues: str, amount: float = 1.0):
+        self.inc(*labelvalues, amount=-amount)
+
+class Histogram(Metric):
+    """Fixed-bucket histogram; an observation is one bisect and three additions"""
+
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (), buckets: Iterable[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *labelvalues: str):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labelvalues)
+            if state is None:
+                # Per-bucket (non-cumulative) counts with +Inf last, sum, count
+                state = self._values[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def time(self, *labelvalues: str) -> "_Timer":
+        """Context manager observing the duration of its block"""
+        return _Timer(self, labelvalues)
+
+    def samples(self) -> List[Tuple[str, Dict[str, str], float]]:
+        with self._lock:
+            states = [(key, list(counts), total, count) for key, (counts, total, count) in self._values.items()]
+
+        samples = []
+        for key, counts, total, count in states:
+            labels = self._labels(key)
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                samples.append(("_bucket", {**labels, "le": _format_bound(bound)}, cumulative))
+            samples.append(("_sum", labels, total))
+            samples.append(("_count", labels, count))
+        return samples
+
+class _Timer:
+    # A plain class rather than @contextmanager: it sits on every scoring stage
+    __slots__ = ("histogram", "labelvalues", "started")
+
+    def __init__(self, histogram: Histogram, labelvalues: Tuple[str, ...]):
+        self.histogram = histogram
+        self.labelvalues = labelvalues
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.started, *self.labelvalues)
+
+class MetricsRegistry:
+    """Process-local metrics plus collectors evaluated at scrape time.
+
+    Under the pre-fork server every worker has its own registry. Each one
+    periodically writes a snapshot to METRICS_DIR, and a scrape served by
+    any worker renders all live snapshots with a ``worker`` label, so
+    Prometheus sees every worker no matter which one answered.
+    """
+
+    def __init__(self, directory: Optional[str] = None, flush_interval: Optional[float] = None):
+        self.directory = directory or os.getenv("METRICS_DIR", "metrics")
+        self.flush_interval = flush_interval or float(os.getenv("METRICS_FLUSH_SECONDS", 5))
+        self._metrics: Dict[str, Metric] = {}
+        self._collectors: List[Callable[[], Iterable[tuple]]] = []
+
+    def _register(self, metric: Metric) -> Metric:
+        existing = self._metrics.get(metric.name)
+        if existing is not None:
+            return existing
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (), buckets: Iterable[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def register_collector(self, collector: Callable[[], Iterable[tuple]]):
+        """Add a callable returning (name, type, help, [(labels, value), ...]) tuples"""
+        self._collectors.append(collector)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        families = {
+            metric.name: {"type": metric.type, "help": metric.documentation, "samples": metric.samples()}
+            for metric in self._metrics.values()
+        }
+
+        for collector in self._collectors:
+            try:
+                for name, metric_type, documentation, samples in collector():
+                    families[name] = {
+                        "type": metric_type,
+                        "help": documentation,
+                        "samples": [("", labels, value) for labels, value in samples]
+                    }
+            except Exception as e:
+                print(f"Metrics collector error: {e}")
+
+        return families
+
+    def _worker_path(self, worker_id: str) -> str:
+        return os.path.join(self.directory, f"worker-{worker_id}.json")
+
+    def flush(self):
+        """Write this worker's snapshot for sibling workers to serve"""
+        worker_id = os.getenv("WORKER_ID")
+        if worker_id is None:
+            return
+
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._worker_path(worker_id)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.snapshot(), f)
+        os.replace(tmp_path, path)
+
+    def _sibling_snapshots(self, worker_id: str) -> List[Tuple[str, Dict[str, Any]]]:
+        snapshots = []
+        stale_after = max(self.flush_interval * 3, 30)
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return snapshots
+
+        for name in names:
+            if not (name.startswith("worker-") and name.endswith(".json")):
+                continue
+            sibling = name[len("worker-"):-len(".json")]
+            path = os.path.join(self.directory, name)
+            try:
+                # Workers that were scaled away stop refreshing their file
+                if sibling == worker_id or time.time() - os.path.getmtime(path) > stale_after:
+                    continue
+                with open(path) as f:
+                    snapshots.append((sibling, json.load(f)))
+            except (OSError, ValueError):
+                continue
+        return snapshots
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)"""
+        worker_id = os.getenv("WORKER_ID")
+        snapshots = [(worker_id, self.snapshot())]
+        if worker_id is not None:
+            snapshots += self._sibling_snapshots(worker_id)
+
+        lines = []
+        names = sorted({name for _, families in snapshots for name in families})
+        for name in names:
+            header_written = False
+            for worker, families in snapshots:
+                family = families.get(name)
+                if family is None:
+                    continue
+                if not header_written:
+                    lines.append(f"# HELP {name} {family['help']}")
+                    lines.append(f"# TYPE {name} {family['type']}")
+                    header_written = True
+                for suffix, labels, value in family["samples"]:
+                    if worker is not None:
+                        labels = {"worker": worker, **labels}
+                    lines.append(f"{name}{suffix}{_format_labels(labels)} {_format_value(value)}")
+
+        return "\n".join(lines) + "\n"
+
+    async def run_flusher(self):
+        """Flush this worker's snapshot at a fixed interval (pre-fork workers only)"""
+        if os.getenv("WORKER_ID") is None:
+            return
+        while True:
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Metrics flush error: {e}")
+            await asyncio.sleep(self.flush_interval)
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+def _format_bound(bound: float) -> str:
+    return "+Inf" if bound == float("inf") else repr(float(bound))
+
+# Initialize global registry
+metrics = MetricsRegistry()
+
+HTTP_REQUESTS = metrics.counter(
+    "http_requests_total", "HTTP requests by route template and status", ("method", "route", "status")
+)
+HTTP_REQUEST_DURATION = metrics.histogram(
+    "http_request_duration_seconds", "HTTP request latency, including streamed bodies", ("method", "route")
+)
+HTTP_REQUESTS_IN_FLIGHT = metrics.gauge(
+    "http_requests_in_flight", "HTTP requests currently being served"
+)
+PIPELINE_STAGE_DURATION = metrics.histogram(
+    "pipeline_stage_duration_seconds", "Time spent in each stage of a request pipeline", ("pipeline", "stage")
+)
+EXTERNAL_CALL_DURATION = metrics.histogram(
+    "external_call_duration_seconds", "Latency of calls to Supabase, Groq and web3", ("service", "operation")
+)
+EXTERNAL_CALL_ERRORS = metrics.counter(
+    "external_call_errors_total", "Failed calls to Supabase, Groq and web3", ("service", "operation", "error")
+)
+
+def stage_timer(pipeline: str, stage: str):
+    """Context manager timing one stage of a pipeline, e.g. stage_timer("score", "inference")"""
+    return PIPELINE_STAGE_DURATION.time(pipeline, stage)
+
+@contextmanager
+def track_external(service: str, operation: str):
+    """Record latency, and the error type on failure, of a call to an external service"""
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception as e:
+        EXTERNAL_CALL_ERRORS.inc(service, operation, type(e).__name__)
+        raise
+    finally:
+        EXTERNAL_CALL_DURATION.observe(time.perf_counter() - started, service, operation)
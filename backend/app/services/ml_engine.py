@@ -1,17 +1,45 @@
 import numpy as np
-import pandas as pd
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.preprocessing import StandardScaler
-import joblib
 import os
 from datetime import datetime, timedelta
-from typing import Dict, List, Any
-import shap
+from typing import Dict, List, Any, Optional, Sequence, Tuple
 
 from app.models.schemas import ScoreRequest
+from app.services.container import container
+
+# Mock per-user amount history used for the amount z-score
+MOCK_USER_AVG_AMOUNT = 150.0
+MOCK_USER_STD_AMOUNT = 75.0
+
+# Mock SHAP value range per feature
+MOCK_SHAP_RANGES = {
+    'amount': (-0.1, 0.3),
+    'hour': (-0.05, 0.05),
+    'day_of_week': (-0.02, 0.02),
+    'is_weekend': (-0.03, 0.03),
+    'amount_zscore': (-0.1, 0.4),
+    'velocity_1h': (-0.05, 0.2),
+    'velocity_24h': (-0.05, 0.15),
+    'new_device': (-0.02, 0.1),
+    'location_risk': (-0.05, 0.2),
+    'merchant_risk': (-0.03, 0.1)
+}
+
+# (flag, feature, rule) applied to a feature column; shared by single-row and batch scoring
+FLAG_RULES = [
+    ("Large transaction amount", "amount", lambda values: values > 1000),
+    ("Unusual amount for user", "amount_zscore", lambda values: values > 2),
+    ("High transaction velocity", "velocity_1h", lambda values: values > 3),
+    ("New device detected", "new_device", lambda values: values > 0),
+    ("Unusual location", "location_risk", lambda values: values > 0.7),
+    ("Unusual transaction time", "hour", lambda values: (values < 6) | (values > 23)),
+    ("Weekend transaction", "is_weekend", lambda values: values > 0)
+]
 
 class FraudMLEngine:
     def __init__(self):
+        # scikit-learn is only imported once the engine is actually built
+        from sklearn.preprocessing import StandardScaler
+
         self.model = None
         self.scaler = StandardScaler()
         self.feature_names = [
@@ -25,6 +53,8 @@ class FraudMLEngine:
         
     def load_model(self):
         """Load pre-trained fraud detection model"""
+        import joblib
+
         model_path = "models/fraud_model.pkl"
         
         if os.path.exists(model_path):
@@ -62,6 +92,7 @@ class FraudMLEngine:
         y[X[:, 7] > 0.5] = np.random.choice([0, 1], size=np.sum(X[:, 7] > 0.5), p=[0.7, 0.3])
         
         # Train model
+        from sklearn.ensemble import RandomForestClassifier
         model = RandomForestClassifier(n_estimators=100, random_state=42)
         model.fit(X, y)
         
@@ -69,31 +100,78 @@ class FraudMLEngine:
     
     def extract_features(self, request: ScoreRequest) -> np.ndarray:
         """Extract features from transaction request"""
-        timestamp = request.timestamp or datetime.now()
-        
-        features = {
-            'amount': request.amount,
-            'hour': timestamp.hour,
-            'day_of_week': timestamp.weekday(),
-            'is_weekend': 1 if timestamp.weekday() >= 5 else 0,
-            'amount_zscore': self._calculate_amount_zscore(request.user_id, request.amount),
-            'velocity_1h': self._calculate_velocity(request.user_id, hours=1),
-            'velocity_24h': self._calculate_velocity(request.user_id, hours=24),
-            'new_device': 1 if self._is_new_device(request.user_id, request.device_id) else 0,
-            'location_risk': self._calculate_location_risk(request.user_id, request.location),
-            'merchant_risk': self._calculate_merchant_risk(request.location),
-            'user_age_days': self._get_user_age_days(request.user_id),
-            'avg_transaction_amount': self._get_avg_transaction_amount(request.user_id),
-            'transaction_frequency': self._get_transaction_frequency(request.user_id),
-            'refund_ratio': self._get_refund_ratio(request.user_id),
-            'failed_attempts': self._get_failed_attempts(request.user_id)
-        }
-        
-        # Convert to numpy array in correct order
-        feature_array = np.array([features[name] for name in self.feature_names]).reshape(1, -1)
-        
-        return feature_array
+        return self.extract_features_batch(
+            np.array([request.amount], dtype=np.float64),
+            [request.timestamp or datetime.now()],
+            user_ids=[request.user_id],
+            device_ids=[request.device_id],
+            locations=[request.location]
+        )
     
+    def extract_features_batch(
+        self,
+        amounts: np.ndarray,
+        timestamps: List[datetime],
+        user_ids: Optional[Sequence[str]] = None,
+        device_ids: Optional[Sequence[Optional[str]]] = None,
+        locations: Optional[Sequence[str]] = None
+    ) -> np.ndarray:
+        """Feature matrix for many transactions, one row per transaction"""
+        n = len(amounts)
+        amounts = np.asarray(amounts, dtype=np.float64)
+        hours = np.fromiter((timestamp.hour for timestamp in timestamps), dtype=np.float64, count=n)
+        weekdays = np.fromiter((timestamp.weekday() for timestamp in timestamps), dtype=np.float64, count=n)
+        return self.feature_matrix(amounts, hours, weekdays, user_ids, device_ids, locations)
+
+    def feature_matrix(
+        self,
+        amounts: np.ndarray,
+        hours: np.ndarray,
+        weekdays: np.ndarray,
+        user_ids: Optional[Sequence[str]] = None,
+        device_ids: Optional[Sequence[Optional[str]]] = None,
+        locations: Optional[Sequence[str]] = None
+    ) -> np.ndarray:
+        """Assemble the feature matrix from amount, hour and weekday columns plus the per-user columns"""
+        n = len(amounts)
+        user_ids = user_ids if user_ids is not None else [None] * n
+        device_ids = device_ids if device_ids is not None else [None] * n
+        locations = locations if locations is not None else [None] * n
+
+        features = np.empty((n, len(self.feature_names)), dtype=np.float64)
+        features[:, 0] = amounts
+        features[:, 1] = hours
+        features[:, 2] = weekdays
+        features[:, 3] = weekdays >= 5
+        features[:, 4] = self._calculate_amount_zscore(user_ids, amounts)
+        features[:, 5] = self._calculate_velocity(user_ids, hours=1)
+        features[:, 6] = self._calculate_velocity(user_ids, hours=24)
+        features[:, 7] = self._is_new_device(user_ids, device_ids)
+        features[:, 8] = self._calculate_location_risk(user_ids, locations)
+        features[:, 9] = self._calculate_merchant_risk(locations)
+        features[:, 10] = self._get_user_age_days(user_ids)
+        features[:, 11] = self._get_avg_transaction_amount(user_ids)
+        features[:, 12] = self._get_transaction_frequency(user_ids)
+        features[:, 13] = self._get_refund_ratio(user_ids)
+        features[:, 14] = self._get_failed_attempts(user_ids)
+        return features
+
+    def predict_batch(self, features: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Fraud probability and confidence for every row, from one predict_proba call"""
+        if self.model is None:
+            raise ValueError("Model not loaded")
+
+        probs = self.model.predict_proba(features)
+        return probs[:, 1], probs.max(axis=1)
+
+    def generate_flags_batch(self, features: np.ndarray) -> List[List[str]]:
+        """Flags for every row of a feature matrix, from FLAG_RULES"""
+        flags = [[] for _ in range(len(features))]
+        for flag, feature, rule in FLAG_RULES:
+            for index in np.flatnonzero(rule(features[:, self.feature_names.index(feature)])):
+                flags[index].append(flag)
+        return flags
+
     def predict_fraud_probability(self, features: np.ndarray) -> float:
         """Predict fraud probability for given features"""
         if self.model is None:
@@ -113,60 +191,26 @@ class FraudMLEngine:
         confidence = float(np.max(probs))
         return confidence
     
-    def generate_flags(self, request: ScoreRequest, risk_score: float) -> List[str]:
-        """Generate human-readable flags based on features and risk score"""
-        flags = []
-        
-        # Amount-based flags
-        if request.amount > 1000:
-            flags.append("Large transaction amount")
-        
-        amount_zscore = self._calculate_amount_zscore(request.user_id, request.amount)
-        if amount_zscore > 2:
-            flags.append("Unusual amount for user")
-        
-        # Velocity flags
-        velocity_1h = self._calculate_velocity(request.user_id, hours=1)
-        if velocity_1h > 3:
-            flags.append("High transaction velocity")
-        
-        # Device flags
-        if self._is_new_device(request.user_id, request.device_id):
-            flags.append("New device detected")
-        
-        # Location flags
-        location_risk = self._calculate_location_risk(request.user_id, request.location)
-        if location_risk > 0.7:
-            flags.append("Unusual location")
-        
-        # Time-based flags
-        timestamp = request.timestamp or datetime.now()
-        if timestamp.hour < 6 or timestamp.hour > 23:
-            flags.append("Unusual transaction time")
-        
-        if timestamp.weekday() >= 5:  # Weekend
-            flags.append("Weekend transaction")
-        
-        return flags
+    def generate_flags(self, request: ScoreRequest, risk_score: float, features: Optional[np.ndarray] = None) -> List[str]:
+        """Generate human-readable flags, from the features the transaction was scored with when given"""
+        if features is None:
+            features = self.extract_features(request)
+        return self.generate_flags_batch(features)[0]
     
     def get_shap_explanation(self, transaction_data: Dict[str, Any]) -> Dict[str, float]:
         """Get SHAP explanation for feature importance"""
+        return self.get_shap_explanation_batch([transaction_data])[0]
+    
+    def get_shap_explanation_batch(self, transactions: List[Dict[str, Any]]) -> List[Dict[str, float]]:
+        """SHAP explanations for many transactions in one pass, one dict per transaction"""
         # For demo purposes, return mock SHAP values
-        # In production, you would use actual SHAP explainer
-        mock_shap_values = {
-            'amount': np.random.uniform(-0.1, 0.3),
-            'hour': np.random.uniform(-0.05, 0.05),
-            'day_of_week': np.random.uniform(-0.02, 0.02),
-            'is_weekend': np.random.uniform(-0.03, 0.03),
-            'amount_zscore': np.random.uniform(-0.1, 0.4),
-            'velocity_1h': np.random.uniform(-0.05, 0.2),
-            'velocity_24h': np.random.uniform(-0.05, 0.15),
-            'new_device': np.random.uniform(-0.02, 0.1),
-            'location_risk': np.random.uniform(-0.05, 0.2),
-            'merchant_risk': np.random.uniform(-0.03, 0.1)
+        # In production, you would run the SHAP explainer once over the feature matrix
+        n = len(transactions)
+        columns = {
+            name: np.random.uniform(low, high, n)
+            for name, (low, high) in MOCK_SHAP_RANGES.items()
         }
-        
-        return mock_shap_values
+        return [{name: float(values[index]) for name, values in columns.items()} for index in range(n)]
     
     def get_top_risk_factors(self, shap_values: Dict[str, float], top_k: int = 5) -> List[str]:
         """Get top risk factors from SHAP values"""
@@ -195,55 +239,56 @@ class FraudMLEngine:
         
         return top_factors
     
-    # Helper methods for feature calculation (mock implementations)
-    def _calculate_amount_zscore(self, user_id: str, amount: float) -> float:
+    # Helper methods for feature calculation (mock implementations), one value per transaction
+    def _calculate_amount_zscore(self, user_ids: Sequence[str], amounts: np.ndarray) -> np.ndarray:
         """Calculate z-score for transaction amount"""
-        # Mock implementation - in production, query user's transaction history
-        user_avg = 150.0  # Mock average
-        user_std = 75.0   # Mock standard deviation
-        return (amount - user_avg) / user_std if user_std > 0 else 0
+        # Mock implementation - in production, query each user's transaction history
+        return (amounts - MOCK_USER_AVG_AMOUNT) / MOCK_USER_STD_AMOUNT
     
-    def _calculate_velocity(self, user_id: str, hours: int) -> int:
+    def _calculate_velocity(self, user_ids: Sequence[str], hours: int) -> np.ndarray:
         """Calculate transaction velocity"""
         # Mock implementation
-        return np.random.randint(0, 5)
+        return np.random.randint(0, 5, len(user_ids))
     
-    def _is_new_device(self, user_id: str, device_id: str) -> bool:
+    def _is_new_device(self, user_ids: Sequence[str], device_ids: Sequence[Optional[str]]) -> np.ndarray:
         """Check if device is new for user"""
         # Mock implementation
-        return np.random.choice([True, False], p=[0.2, 0.8])
+        return np.random.random(len(user_ids)) < 0.2
     
-    def _calculate_location_risk(self, user_id: str, location: str) -> float:
+    def _calculate_location_risk(self, user_ids: Sequence[str], locations: Sequence[str]) -> np.ndarray:
         """Calculate location risk score"""
         # Mock implementation
-        return np.random.uniform(0, 1)
+        return np.random.uniform(0, 1, len(user_ids))
     
-    def _calculate_merchant_risk(self, location: str) -> float:
+    def _calculate_merchant_risk(self, locations: Sequence[str]) -> np.ndarray:
         """Calculate merchant risk score"""
         # Mock implementation
-        return np.random.uniform(0, 0.5)
+        return np.random.uniform(0, 0.5, len(locations))
     
-    def _get_user_age_days(self, user_id: str) -> int:
+    def _get_user_age_days(self, user_ids: Sequence[str]) -> np.ndarray:
         """Get user account age in days"""
         # Mock implementation
-        return np.random.randint(1, 1000)
+        return np.random.randint(1, 1000, len(user_ids))
     
-    def _get_avg_transaction_amount(self, user_id: str) -> float:
+    def _get_avg_transaction_amount(self, user_ids: Sequence[str]) -> np.ndarray:
         """Get user's average transaction amount"""
         # Mock implementation
-        return np.random.uniform(50, 300)
+        return np.random.uniform(50, 300, len(user_ids))
     
-    def _get_transaction_frequency(self, user_id: str) -> float:
+    def _get_transaction_frequency(self, user_ids: Sequence[str]) -> np.ndarray:
         """Get user's transaction frequency"""
         # Mock implementation
-        return np.random.uniform(0.1, 5.0)
+        return np.random.uniform(0.1, 5.0, len(user_ids))
     
-    def _get_refund_ratio(self, user_id: str) -> float:
+    def _get_refund_ratio(self, user_ids: Sequence[str]) -> np.ndarray:
         """Get user's refund ratio"""
         # Mock implementation
-        return np.random.uniform(0, 0.2)
+        return np.random.uniform(0, 0.2, len(user_ids))
     
-    def _get_failed_attempts(self, user_id: str) -> int:
+    def _get_failed_attempts(self, user_ids: Sequence[str]) -> np.ndarray:
         """Get recent failed payment attempts"""
         # Mock implementation
-        return np.random.randint(0, 3)
\ No newline at end of file
+        return np.random.randint(0, 3, len(user_ids))
+
+# Shared engine for scoring and explanations, loaded on first use
+ml_engine = container.register("ml_engine", FraudMLEngine)
@@ -5,11 +5,11 @@ from xhtml2pdf import pisa
 import io
 
 class PDFReportGenerator:
-    def __init__(self):
-        self.reports_dir = "reports"
+    def __init__(self, reports_dir: str = "reports"):
+        self.reports_dir = reports_dir
         os.makedirs(self.reports_dir, exist_ok=True)
     
-    async def generate_report(
+    def generate_report(
         self,
         report_type: str,
         data: Dict[str, Any],
@@ -17,7 +17,7 @@ class PDFReportGenerator:
         end_date: datetime,
         report_id: str
     ) -> str:
-        """Generate PDF report based on type and data"""
+        """Generate PDF report based on type and data (CPU-bound, run in a report worker)"""
         
         try:
             # Generate HTML content based on report type
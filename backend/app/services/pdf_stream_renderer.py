@@ -0,0 +1,207 @@
+import os
+from datetime import datetime
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import letter, landscape
+from reportlab.pdfgen import canvas
+
+WALMART_BLUE = colors.HexColor("#004c91")
+WALMART_YELLOW = colors.HexColor("#ffc220")
+HEADER_FILL = colors.HexColor("#f8f9fa")
+ROW_SHADE = colors.HexColor("#fafafa")
+RISK_COLORS = {
+    "high": colors.HexColor("#dc3545"),
+    "medium": colors.HexColor("#b8860b"),
+    "low": colors.HexColor("#28a745")
+}
+
+# (header, row key, width in points, max characters)
+TRANSACTION_COLUMNS: List[Tuple[str, str, float, int]] = [
+    ("Transaction ID", "transaction_id", 120, 22),
+    ("User", "user_id", 90, 16),
+    ("Amount", "amount", 65, 12),
+    ("Location", "location", 110, 20),
+    ("Risk", "risk_score", 40, 5),
+    ("Level", "risk_level", 50, 8),
+    ("Flags", "flags", 170, 34),
+    ("Scored At", "scored_at", 95, 16)
+]
+
+REPORT_TITLES = {
+    "detailed": "Detailed Fraud Analysis Report",
+    "user-risk": "User Risk Assessment Report"
+}
+
+class StreamingPDFRenderer:
+    """Draws large tabular reports page by page with the ReportLab canvas.
+
+    Rows are pulled from an iterator and drawn directly, and each finished
+    page is compressed and handed to the document, so memory depends on
+    the output PDF rather than on an intermediate HTML/table model, and
+    render time grows linearly with the row count.
+    """
+
+    ROW_HEIGHT = 13
+    MARGIN = 36
+
+    def __init__(self, reports_dir: str = "reports"):
+        self.reports_dir = reports_dir
+        self.page_width, self.page_height = landscape(letter)
+        os.makedirs(self.reports_dir, exist_ok=True)
+
+    def render(
+        self,
+        report_type: str,
+        data: Dict[str, Any],
+        rows: Iterable[Dict[str, Any]],
+        start_date: datetime,
+        end_date: datetime,
+        report_id: str
+    ) -> str:
+        """Render summary stats followed by one table line per row"""
+        pdf_path = os.path.join(self.reports_dir, f"{report_id}.pdf")
+        title = REPORT_TITLES.get(report_type, "Fraud Detection Report")
+        period = f"Period: {start_date.strftime('%Y-%m-%d')} to {end_date.strftime('%Y-%m-%d')}"
+
+        pdf = canvas.Canvas(pdf_path, pagesize=(self.page_width, self.page_height), pageCompression=1)
+        pdf.setTitle(f"Walmart Fraud Prevention - {title}")
+
+        page_number = 1
+        y = self._draw_first_page_header(pdf, title, period, data)
+        y = self._draw_table_header(pdf, y)
+        row_count = 0
+
+        for row in rows:
+            if y < self.MARGIN + self.ROW_HEIGHT:
+                self._draw_footer(pdf, page_number)
+                pdf.showPage()
+                page_number += 1
+                y = self._draw_continuation_header(pdf, title, period)
+                y = self._draw_table_header(pdf, y)
+
+            self._draw_row(pdf, y, row, shaded=row_count % 2 == 1)
+            y -= self.ROW_HEIGHT
+            row_count += 1
+
+        if not row_count:
+            pdf.setFont("Helvetica-Oblique", 9)
+            pdf.setFillColor(colors.grey)
+            pdf.drawString(self.MARGIN, y - self.ROW_HEIGHT, "No flagged transactions in this period.")
+
+        self._draw_footer(pdf, page_number, row_count)
+        pdf.save()
+
+        return pdf_path
+
+    def _draw_first_page_header(self, pdf: canvas.Canvas, title: str, period: str, data: Dict[str, Any]) -> float:
+        y = self.page_height - self.MARGIN
+        center = self.page_width / 2
+
+        pdf.setFillColor(WALMART_BLUE)
+        pdf.setFont("Helvetica-Bold", 18)
+        pdf.drawCentredString(center, y - 14, "Walmart AI Fraud Prevention Platform")
+        pdf.setFillColor(colors.black)
+        pdf.setFont("Helvetica", 14)
+        pdf.drawCentredString(center, y - 34, title)
+        pdf.setFillColor(colors.grey)
+        pdf.setFont("Helvetica", 10)
+        pdf.drawCentredString(center, y - 50, period)
+
+        transaction_stats = data.get("transaction_stats", {})
+        risk_distribution = data.get("risk_distribution", {})
+        stats = [
+            ("Total Transactions", f"{transaction_stats.get('total_transactions', 0):,}"),
+            ("Fraud Detected", f"{transaction_stats.get('fraud_detected', 0):,}"),
+            ("Fraud Rate", f"{transaction_stats.get('fraud_rate', 0):.2f}%"),
+            ("Users Blocked", f"{data.get('blocklist_stats', {}).get('users_blocked', 0):,}"),
+            ("High / Medium / Low", "{:,} / {:,} / {:,}".format(
+                risk_distribution.get("high_risk", 0),
+                risk_distribution.get("medium_risk", 0),
+                risk_distribution.get("low_risk", 0)
+            ))
+        ]
+
+        box_width = (self.page_width - 2 * self.MARGIN) / len(stats)
+        box_top = y - 66
+        for index, (label, value) in enumerate(stats):
+            x = self.MARGIN + index * box_width
+            pdf.setStrokeColor(colors.lightgrey)
+            pdf.rect(x + 4, box_top - 44, box_width - 8, 44)
+            pdf.setFillColor(WALMART_BLUE)
+            pdf.setFont("Helvetica-Bold", 13)
+            pdf.drawCentredString(x + box_width / 2, box_top - 22, value)
+            pdf.setFillColor(colors.grey)
+            pdf.setFont("Helvetica", 8)
+            pdf.drawCentredString(x + box_width / 2, box_top - 36, label)
+
+        y = box_top - 66
+        pdf.setFillColor(WALMART_BLUE)
+        pdf.setFont("Helvetica-Bold", 12)
+        pdf.drawString(self.MARGIN, y, "Flagged Transactions")
+        pdf.setStrokeColor(WALMART_YELLOW)
+        pdf.setLineWidth(2)
+        pdf.line(self.MARGIN, y - 4, self.page_width - self.MARGIN, y - 4)
+        pdf.setLineWidth(1)
+
+        return y - 18
+
+    def _draw_continuation_header(self, pdf: canvas.Canvas, title: str, period: str) -> float:
+        y = self.page_height - self.MARGIN
+        pdf.setFillColor(WALMART_BLUE)
+        pdf.setFont("Helvetica-Bold", 10)
+        pdf.drawString(self.MARGIN, y - 10, f"{title} (continued)")
+        pdf.setFillColor(colors.grey)
+        pdf.setFont("Helvetica", 8)
+        pdf.drawRightString(self.page_width - self.MARGIN, y - 10, period)
+        return y - 28
+
+    def _draw_table_header(self, pdf: canvas.Canvas, y: float) -> float:
+        pdf.setFillColor(HEADER_FILL)
+        pdf.rect(self.MARGIN, y - 4, self.page_width - 2 * self.MARGIN, self.ROW_HEIGHT + 2, stroke=0, fill=1)
+        pdf.setFillColor(WALMART_BLUE)
+        pdf.setFont("Helvetica-Bold", 8)
+
+        x = self.MARGIN + 2
+        for header, _, width, _ in TRANSACTION_COLUMNS:
+            pdf.drawString(x, y, header)
+            x += width
+
+        return y - self.ROW_HEIGHT - 2
+
+    def _draw_row(self, pdf: canvas.Canvas, y: float, row: Dict[str, Any], shaded: bool):
+        if shaded:
+            pdf.setFillColor(ROW_SHADE)
+            pdf.rect(self.MARGIN, y - 3, self.page_width - 2 * self.MARGIN, self.ROW_HEIGHT, stroke=0, fill=1)
+
+        pdf.setFont("Helvetica", 7.5)
+        x = self.MARGIN + 2
+        for _, key, width, max_chars in TRANSACTION_COLUMNS:
+            text = format_cell(key, row.get(key))
+            if len(text) > max_chars:
+                text = text[:max_chars - 1] + "…"
+
+            pdf.setFillColor(RISK_COLORS.get(row.get("risk_level"), colors.black) if key == "risk_level" else colors.black)
+            pdf.drawString(x, y, text)
+            x += width
+
+    def _draw_footer(self, pdf: canvas.Canvas, page_number: int, row_count: Optional[int] = None):
+        pdf.setFillColor(colors.grey)
+        pdf.setFont("Helvetica", 7)
+        footer = f"Generated on {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} | Confidential"
+        if row_count is not None:
+            footer += f" | {row_count:,} transactions"
+        pdf.drawString(self.MARGIN, self.MARGIN / 2, footer)
+        pdf.drawRightString(self.page_width - self.MARGIN, self.MARGIN / 2, f"Page {page_number}")
+
+def format_cell(key: str, value: Any) -> str:
+    if value is None:
+        return ""
+    if key == "amount":
+        return f"${float(value):,.2f}"
+    if key == "risk_score":
+        return f"{float(value):.2f}"
+    if key == "flags":
+        return ", ".join(value) if isinstance(value, list) else str(value)
+    if key in ("scored_at", "timestamp"):
+        return str(value).replace("T", " ")[:16]
+    return str(value)
@@ -0,0 +1,282 @@
+import io
+import os
+import sys
+import time
+import uuid
+import pstats
+import cProfile
+import threading
+import tracemalloc
+from collections import Counter, OrderedDict
+from datetime import datetime
+from typing import Dict, List, Any, Optional, Tuple
+
+# Leaf frames of threads that are parked rather than running
+IDLE_LEAVES = {
+    ("selectors.py", "select"),
+    ("threading.py", "wait"),
+    ("thread.py", "_worker"),
+    ("queue.py", "get"),
+    ("socket.py", "accept")
+}
+
+class ProfilerBusyError(Exception):
+    pass
+
+class SamplingProfiler:
+    """Wall-clock sampling profiler producing collapsed stacks.
+
+    For the duration of a capture a thread samples every thread's stack
+    with sys._current_frames() and counts identical stacks. The output is
+    the collapsed format read by flamegraph.pl and speedscope:
+    ``thread;outer_frame;...;inner_frame count``. Nothing runs between
+    captures, and only one capture runs at a time per worker.
+    """
+
+    def __init__(self, interval_ms: Optional[float] = None, max_seconds: Optional[float] = None):
+        self.interval = (interval_ms or float(os.getenv("PROFILE_SAMPLE_INTERVAL_MS", 5))) / 1000
+        self.max_seconds = max_seconds or float(os.getenv("PROFILE_MAX_SECONDS", 60))
+        self._lock = threading.Lock()
+        self.running = False
+
+    def capture(self, seconds: float, interval_ms: Optional[float] = None, include_idle: bool = False) -> Dict[str, Any]:
+        """Sample for ``seconds``; blocking, so call it from a thread"""
+        if not self._lock.acquire(blocking=False):
+            raise ProfilerBusyError("A CPU profile is already being captured")
+
+        seconds = min(max(seconds, 0.1), self.max_seconds)
+        interval = interval_ms / 1000 if interval_ms else self.interval
+        own_thread = threading.get_ident()
+        stacks = Counter()
+        samples = 0
+        self.running = True
+
+        try:
+            deadline = time.monotonic() + seconds
+            while time.monotonic() < deadline:
+                names = {thread.ident: thread.name for thread in threading.enumerate()}
+                for thread_id, frame in sys._current_frames().items():
+                    if thread_id == own_thread:
+                        continue
+                    stack = collapse(frame)
+                    if include_idle or not is_idle(frame):
+                        stacks[f"{names.get(thread_id, thread_id)};{stack}"] += 1
+                frame = None
+                samples += 1
+                time.sleep(interval)
+        finally:
+            self.running = False
+            self._lock.release()
+
+        return {
+            "worker_id": os.getenv("WORKER_ID"),
+            "seconds": seconds,
+            "interval_ms": interval * 1000,
+            "samples": samples,
+            "stacks": stacks
+        }
+
+def collapse(frame) -> str:
+    frames = []
+    while frame is not None:
+        code = frame.f_code
+        frames.append(f"{code.co_name} ({short_path(code.co_filename)})")
+        frame = frame.f_back
+    return ";".join(reversed(frames))
+
+def short_path(filename: str) -> str:
+    # Parent directory plus file name tells apart the many __init__.py and utils.py
+    return os.path.join(os.path.basename(os.path.dirname(filename)), os.path.basename(filename))
+
+def is_idle(frame) -> bool:
+    code = frame.f_code
+    return (os.path.basename(code.co_filename), code.co_name) in IDLE_LEAVES
+
+def format_collapsed(stacks: Counter) -> str:
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+class AllocationTracker:
+    """tracemalloc snapshots and diffs for finding memory growth.
+
+    Tracing costs CPU and memory on every allocation, so it is off until
+    start() and stop() discards its data. Snapshots keep only the traces,
+    filtered of tracemalloc's and the import system's own allocations,
+    and the oldest is dropped past TRACEMALLOC_MAX_SNAPSHOTS.
+    """
+
+    def __init__(self, max_snapshots: Optional[int] = None):
+        self.max_snapshots = max_snapshots or int(os.getenv("TRACEMALLOC_MAX_SNAPSHOTS", 5))
+        self._lock = threading.Lock()
+        self._snapshots: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+        self._next_id = 1
+
+    @property
+    def tracing(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def start(self, frames: int = 10) -> Dict[str, Any]:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+        return self.status()
+
+    def stop(self):
+        with self._lock:
+            self._snapshots.clear()
+        tracemalloc.stop()
+
+    def status(self) -> Dict[str, Any]:
+        current, peak = tracemalloc.get_traced_memory()
+        with self._lock:
+            snapshots = [
+                {"id": snapshot_id, "taken_at": entry["taken_at"], "traced_bytes": entry["traced_bytes"]}
+                for snapshot_id, entry in self._snapshots.items()
+            ]
+        return {
+            "worker_id": os.getenv("WORKER_ID"),
+            "tracing": tracemalloc.is_tracing(),
+            "frames": tracemalloc.get_traceback_limit(),
+            "traced_bytes": current,
+            "peak_bytes": peak,
+            "tracemalloc_overhead_bytes": tracemalloc.get_tracemalloc_memory(),
+            "snapshots": snapshots
+        }
+
+    def snapshot(self) -> Dict[str, Any]:
+        if not tracemalloc.is_tracing():
+            raise RuntimeError("tracemalloc is not running; start it first")
+
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+            tracemalloc.Filter(False, "<unknown>")
+        ))
+        entry = {
+            "snapshot": snapshot,
+            "taken_at": datetime.now().isoformat(),
+            "traced_bytes": sum(stat.size for stat in snapshot.statistics("filename"))
+        }
+
+        with self._lock:
+            snapshot_id = self._next_id
+            self._next_id += 1
+            self._snapshots[snapshot_id] = entry
+            while len(self._snapshots) > self.max_snapshots:
+                self._snapshots.popitem(last=False)
+
+        return {"id": snapshot_id, "taken_at": entry["taken_at"], "traced_bytes": entry["traced_bytes"]}
+
+    def _get(self, snapshot_id: int) -> tracemalloc.Snapshot:
+        with self._lock:
+            entry = self._snapshots.get(snapshot_id)
+        if entry is None:
+            raise KeyError(f"Snapshot {snapshot_id} not found")
+        return entry["snapshot"]
+
+    def top(self, snapshot_id: int, group_by: str = "lineno", limit: int = 25) -> List[Dict[str, Any]]:
+        return [_stat_entry(stat) for stat in self._get(snapshot_id).statistics(group_by)[:limit]]
+
+    def diff(self, base_id: int, current_id: int, group_by: str = "lineno", limit: int = 25) -> List[Dict[str, Any]]:
+        """Largest allocation growth between two snapshots"""
+        differences = self._get(current_id).compare_to(self._get(base_id), group_by)
+        return [
+            {**_stat_entry(stat), "size_diff_bytes": stat.size_diff, "count_diff": stat.count_diff}
+            for stat in differences[:limit]
+        ]
+
+def _stat_entry(stat) -> Dict[str, Any]:
+    return {
+        # Frames run oldest to most recent, so the allocating line is last
+        "location": str(stat.traceback[-1]) if len(stat.traceback) else "<unknown>",
+        "traceback": stat.traceback.format()[-10:],
+        "size_bytes": stat.size,
+        "count": stat.count
+    }
+
+class RequestProfileStore:
+    """cProfile results of requests that opted in, kept for later retrieval.
+
+    cProfile hooks the calling thread, so only one request is profiled at
+    a time; coroutines of concurrent requests that run on the loop in the
+    meantime show up in the profile too, and work handed to the thread
+    pool does not. Profile quiet workers for clean results.
+    """
+
+    def __init__(self, max_profiles: Optional[int] = None, top_n: Optional[int] = None):
+        self.max_profiles = max_profiles or int(os.getenv("PROFILE_MAX_STORED", 50))
+        self.top_n = top_n or int(os.getenv("PROFILE_TOP_N", 40))
+        self._lock = threading.Lock()
+        self._profiles: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._active: Optional[Tuple[str, cProfile.Profile]] = None
+
+    def begin(self) -> Optional[str]:
+        """Start profiling and return the profile id, or None if another request is being profiled"""
+        profile = cProfile.Profile()
+        with self._lock:
+            if self._active is not None:
+                return None
+            try:
+                profile.enable()
+            except ValueError:
+                # Another profiler (e.g. a debugger) owns the hook
+                return None
+            profile_id = uuid.uuid4().hex[:12]
+            self._active = (profile_id, profile)
+        return profile_id
+
+    def end(self, profile_id: str, method: str, path: str, status: int, duration: float):
+        with self._lock:
+            if self._active is None or self._active[0] != profile_id:
+                return
+            profile = self._active[1]
+            profile.disable()
+            self._active = None
+
+        output = io.StringIO()
+        stats = pstats.Stats(profile, stream=output)
+        stats.sort_stats("cumulative").print_stats(self.top_n)
+
+        rows = []
+        for (filename, lineno, name), (calls, primitive, own, cumulative, _) in stats.stats.items():
+            rows.append({
+                "function": f"{filename}:{lineno}({name})",
+                "calls": calls,
+                "primitive_calls": primitive,
+                "own_seconds": round(own, 6),
+                "cumulative_seconds": round(cumulative, 6)
+            })
+        rows.sort(key=lambda row: row["cumulative_seconds"], reverse=True)
+
+        entry = {
+            "id": profile_id,
+            "worker_id": os.getenv("WORKER_ID"),
+            "method": method,
+            "path": path,
+            "status": status,
+            "duration_ms": round(duration * 1000, 2),
+            "profiled_at": datetime.now().isoformat(),
+            "functions": rows[:self.top_n],
+            "text": output.getvalue()
+        }
+
+        with self._lock:
+            self._profiles[profile_id] = entry
+            while len(self._profiles) > self.max_profiles:
+                self._profiles.popitem(last=False)
+
+    def get(self, profile_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self._profiles.get(profile_id)
+
+    def list(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            entries = list(self._profiles.values())
+        return [
+            {key: entry[key] for key in ("id", "method", "path", "status", "duration_ms", "profiled_at")}
+            for entry in reversed(entries)
+        ]
+
+# Initialize global profilers
+sampling_profiler = SamplingProfiler()
+allocation_tracker = AllocationTracker()
+request_profiles = RequestProfileStore()
@@ -0,0 +1,109 @@
+import os
+import json
+import base64
+from datetime import datetime
+from typing import Dict, Any, Optional, Tuple
+from cryptography.exceptions import InvalidSignature
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey, Ed25519PublicKey
+
+RECEIPT_FORMAT_VERSION = 1
+
+class ReceiptSigner:
+    """Issues and verifies Ed25519-signed receipt payloads.
+
+    Verification only needs the cached public key set, so store devices can
+    check receipts without talking to Supabase or the blockchain.
+    """
+
+    def __init__(self):
+        self.key_id = os.getenv("RECEIPT_SIGNING_KEY_ID", "k1")
+        signing_key = os.getenv("RECEIPT_SIGNING_KEY")
+
+        if signing_key:
+            self.private_key = Ed25519PrivateKey.from_private_bytes(_b64decode(signing_key))
+        elif os.getenv("ENVIRONMENT") == "production":
+            # An ephemeral key differs per worker and per restart, so issued receipts would stop verifying
+            raise RuntimeError("RECEIPT_SIGNING_KEY must be set in production")
+        else:
+            print("Warning: RECEIPT_SIGNING_KEY not found. Using an ephemeral signing key.")
+            self.private_key = Ed25519PrivateKey.generate()
+
+        # kid -> parsed public key, built once so verification does no parsing
+        self.public_keys: Dict[str, Ed25519PublicKey] = {
+            self.key_id: self.private_key.public_key()
+        }
+        self.load_public_keys(os.getenv("RECEIPT_PUBLIC_KEYS"))
+
+    def load_public_keys(self, keys_json: Optional[str]):
+        """Add trusted public keys from a JSON object of key id -> base64 key"""
+        if not keys_json:
+            return
+
+        for key_id, encoded in json.loads(keys_json).items():
+            self.public_keys[key_id] = Ed25519PublicKey.from_public_bytes(_b64decode(encoded))
+
+    def export_public_keys(self) -> Dict[str, str]:
+        """Public key set for distribution to verifying devices"""
+        return {
+            key_id: _b64encode(key.public_bytes(
+                encoding=serialization.Encoding.Raw,
+                format=serialization.PublicFormat.Raw
+            ))
+            for key_id, key in self.public_keys.items()
+        }
+
+    def sign_receipt(self, receipt_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Return a compact QR payload carrying an embedded signature"""
+        timestamp = receipt_data["timestamp"]
+        if isinstance(timestamp, datetime):
+            timestamp = timestamp.isoformat()
+
+        payload = {
+            "v": RECEIPT_FORMAT_VERSION,
+            "transaction_id": receipt_data["transaction_id"],
+            "amount": round(float(receipt_data["amount"]), 2),
+            "timestamp": timestamp,
+            "store": receipt_data["store"],
+            "kid": self.key_id
+        }
+
+        signature = self.private_key.sign(signing_message(payload))
+        payload["sig"] = _b64encode(signature)
+
+        return payload
+
+    def verify_receipt(self, payload: Dict[str, Any]) -> Tuple[bool, str]:
+        """Check an embedded receipt signature using only local key material"""
+        signature = payload.get("sig")
+        if not signature:
+            return False, "missing_signature"
+
+        public_key = self.public_keys.get(payload.get("kid", self.key_id))
+        if not public_key:
+            return False, "unknown_key"
+
+        try:
+            public_key.verify(_b64decode(signature), signing_message(payload))
+            return True, "signature_valid"
+        except (InvalidSignature, KeyError, ValueError, TypeError):
+            return False, "invalid_signature"
+
+def signing_message(payload: Dict[str, Any]) -> bytes:
+    """Canonical byte string covered by the receipt signature"""
+    return "|".join([
+        str(payload.get("v", RECEIPT_FORMAT_VERSION)),
+        payload["transaction_id"],
+        f"{float(payload['amount']):.2f}",
+        payload["timestamp"],
+        payload["store"]
+    ]).encode()
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+# Initialize global signer
+receipt_signer = ReceiptSigner()
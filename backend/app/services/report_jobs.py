@@ -0,0 +1,409 @@
+import os
+import json
+import time
+import uuid
+import asyncio
+import hashlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, List, Any, Optional, Tuple
+
+from app.services.bulkhead import render_bulkhead
+from app.services.supabase_client import get_fraud_analytics_data, get_report_data_watermark, iter_scored_transactions
+
+ACTIVE_STATUSES = ("queued", "fetching_data", "rendering")
+REPORT_MIN_RISK_SCORE = float(os.getenv("REPORT_MIN_RISK_SCORE", 0.5))
+REPORT_PAGE_SIZE = int(os.getenv("REPORT_PAGE_SIZE", 1000))
+
+# Report types that list individual transactions and may run to
+# thousands of pages; these use the page-by-page ReportLab renderer
+STREAMING_REPORT_TYPES = ("detailed", "user-risk")
+
+def render_report_pdf(
+    reports_dir: str,
+    report_type: str,
+    data: Dict[str, Any],
+    start_date: datetime,
+    end_date: datetime,
+    report_id: str,
+    filters: Optional[Dict[str, Any]] = None
+) -> str:
+    """Process pool entry point: render one report PDF"""
+    # The PDF toolkits are only needed in the render processes, not the API workers
+    if report_type in STREAMING_REPORT_TYPES:
+        from app.services.pdf_stream_renderer import StreamingPDFRenderer
+
+        filters = filters or {}
+        rows = iter_scored_transactions(
+            start_date,
+            end_date,
+            min_risk_score=float(filters.get("min_risk_score", REPORT_MIN_RISK_SCORE)),
+            page_size=REPORT_PAGE_SIZE
+        )
+        return StreamingPDFRenderer(reports_dir).render(
+            report_type=report_type,
+            data=data,
+            rows=rows,
+            start_date=start_date,
+            end_date=end_date,
+            report_id=report_id
+        )
+
+    from app.services.pdf_generator import PDFReportGenerator
+
+    return PDFReportGenerator(reports_dir).generate_report(
+        report_type=report_type,
+        data=data,
+        start_date=start_date,
+        end_date=end_date,
+        report_id=report_id
+    )
+
+def report_cache_key(
+    report_type: str,
+    start_date: datetime,
+    end_date: datetime,
+    filters: Optional[Dict[str, Any]],
+    watermark: str
+) -> str:
+    """Content address of a report: normalized request plus data watermark"""
+    normalized = json.dumps({
+        "report_type": report_type,
+        "start_date": start_date.isoformat(),
+        "end_date": end_date.isoformat(),
+        "filters": filters or {},
+        "watermark": watermark
+    }, sort_keys=True, default=str)
+    return hashlib.sha256(normalized.encode()).hexdigest()
+
+class ReportJobManager:
+    """Runs report generation as background jobs.
+
+    Data is fetched on the event loop (it is I/O bound) and the PDF is
+    rendered in a process pool, so a multi-second render never blocks
+    other requests. Job state is kept in a JSON sidecar next to each PDF,
+    which makes it visible to every API worker and survives restarts.
+
+    Jobs are content-addressed: a request whose normalized parameters and
+    data watermark match an unexpired job reuses it (including one still
+    rendering). A janitor removes expired reports and evicts the least
+    recently used ones once the directory exceeds its disk budget.
+
+    Lookups, listings and stats read an in-memory index of the sidecars.
+    This worker's writes update it directly; other workers' jobs are picked
+    up by a rescan on the cpu-render bulkhead at most every
+    REPORT_INDEX_REFRESH_SECONDS, so the event loop never walks the directory.
+    """
+
+    def __init__(self, reports_dir: Optional[str] = None, max_workers: Optional[int] = None):
+        self.reports_dir = reports_dir or os.getenv("REPORTS_DIR", "reports")
+        self.max_workers = max_workers or int(os.getenv("REPORT_RENDER_WORKERS", 2))
+        self.ttl = timedelta(hours=float(os.getenv("REPORT_TTL_HOURS", 24)))
+        self.disk_quota_bytes = int(float(os.getenv("REPORT_DISK_QUOTA_MB", 500)) * 1024 * 1024)
+        self.janitor_interval = float(os.getenv("REPORT_JANITOR_INTERVAL_SECONDS", 300))
+        # Relative ranges ("last 7 days") are aligned to this bucket so that
+        # requests a few seconds apart address the same report
+        self.time_bucket = int(os.getenv("REPORT_CACHE_TIME_BUCKET_SECONDS", 300))
+        self.index_refresh_interval = float(os.getenv("REPORT_INDEX_REFRESH_SECONDS", 2))
+
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._counters = {"submitted": 0, "cache_hits": 0, "expired": 0, "evicted": 0}
+        self._index: Dict[str, Dict[str, Any]] = {}
+        self._index_refreshed_at: Optional[float] = None
+        self._index_refresh: Optional[asyncio.Future] = None
+        os.makedirs(self.reports_dir, exist_ok=True)
+
+    @property
+    def pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # Spawned, not forked: the API process already runs threads (bulkheads,
+            # ledger writer, loop watchdog) whose locks a fork would copy mid-use
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._pool
+
+    def align_end_date(self, end_date: datetime) -> datetime:
+        """Round a relative range's end down to the cache time bucket"""
+        timestamp = int(end_date.timestamp())
+        return datetime.fromtimestamp(timestamp - timestamp % self.time_bucket)
+
+    async def submit(
+        self,
+        report_type: str,
+        start_date: datetime,
+        end_date: datetime,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Return a matching cached job or create a new one and start it in the background"""
+        self._counters["submitted"] += 1
+
+        cache_key = None
+        watermark = await get_report_data_watermark(start_date, end_date)
+        if watermark is not None:
+            cache_key = report_cache_key(report_type, start_date, end_date, filters, watermark)
+            cached = await self._find_cached(cache_key)
+            if cached:
+                self._counters["cache_hits"] += 1
+                if cached["status"] not in ACTIVE_STATUSES:
+                    self.touch(cached)
+                return {**cached, "cache_hit": True}
+
+        job_id = str(uuid.uuid4())
+        submitted_at = datetime.now()
+
+        job = {
+            "job_id": job_id,
+            "report_type": report_type,
+            "cache_key": cache_key,
+            "status": "queued",
+            "progress": 0.0,
+            "period_start": start_date.isoformat(),
+            "period_end": end_date.isoformat(),
+            "submitted_at": submitted_at.isoformat(),
+            "started_at": None,
+            "completed_at": None,
+            "last_accessed_at": submitted_at.isoformat(),
+            "fetch_ms": None,
+            "render_ms": None,
+            "file_size_bytes": None,
+            "error": None,
+            "download_url": f"/api/report/download/{job_id}",
+            "expires_at": (submitted_at + self.ttl).isoformat()
+        }
+        self._write_job(job)
+
+        task = asyncio.get_event_loop().create_task(self._run(job, start_date, end_date, filters))
+        self._tasks[job_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(job_id, None))
+
+        return {**job, "cache_hit": False}
+
+    async def _run(
+        self,
+        job: Dict[str, Any],
+        start_date: datetime,
+        end_date: datetime,
+        filters: Optional[Dict[str, Any]]
+    ):
+        try:
+            job.update(status="fetching_data", progress=0.1, started_at=datetime.now().isoformat())
+            self._write_job(job)
+
+            started = time.perf_counter()
+            data = await get_fraud_analytics_data(start_date=start_date, end_date=end_date, filters=filters)
+            job["fetch_ms"] = round((time.perf_counter() - started) * 1000, 1)
+
+            job.update(status="rendering", progress=0.4)
+            self._write_job(job)
+
+            started = time.perf_counter()
+            loop = asyncio.get_event_loop()
+            pdf_path = await loop.run_in_executor(
+                self.pool,
+                render_report_pdf,
+                self.reports_dir,
+                job["report_type"],
+                data,
+                start_date,
+                end_date,
+                job["job_id"],
+                filters
+            )
+            job["render_ms"] = round((time.perf_counter() - started) * 1000, 1)
+
+            job.update(
+                status="completed",
+                progress=1.0,
+                completed_at=datetime.now().isoformat(),
+                file_size_bytes=os.path.getsize(pdf_path)
+            )
+
+        except asyncio.CancelledError:
+            # Deleted or shut down mid-run; do not leave the sidecar looking active
+            job.update(status="failed", error="Report job was cancelled", completed_at=datetime.now().isoformat())
+            if os.path.exists(self._job_path(job["job_id"])):
+                self._write_job(job)
+            raise
+
+        except Exception as e:
+            print(f"Report job {job['job_id']} failed: {e}")
+            job.update(status="failed", error=str(e), completed_at=datetime.now().isoformat())
+
+        self._write_job(job)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._job_path(job_id)) as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    async def list(self, limit: int = 20, offset: int = 0) -> Tuple[List[Dict[str, Any]], int]:
+        """One page of jobs, newest first, and the total number of jobs"""
+        jobs = await self._indexed_jobs()
+        jobs.sort(key=lambda job: job["submitted_at"], reverse=True)
+        return jobs[offset:offset + limit], len(jobs)
+
+    def is_expired(self, job: Dict[str, Any]) -> bool:
+        return datetime.fromisoformat(job["expires_at"]) <= datetime.now()
+
+    def touch(self, job: Dict[str, Any]):
+        """Record a download for LRU eviction"""
+        job["last_accessed_at"] = datetime.now().isoformat()
+        self._write_job(job)
+
+    def pdf_path(self, job_id: str) -> str:
+        return os.path.join(self.reports_dir, f"{job_id}.pdf")
+
+    def delete(self, job_id: str) -> bool:
+        """Cancel and remove a job; event loop only"""
+        self._forget(job_id)
+        return self._remove_files(job_id)
+
+    def _forget(self, job_id: str):
+        task = self._tasks.pop(job_id, None)
+        if task:
+            task.cancel()
+        self._index.pop(job_id, None)
+
+    def _remove_files(self, job_id: str) -> bool:
+        deleted = False
+        for path in (self.pdf_path(job_id), self._job_path(job_id)):
+            if os.path.exists(path):
+                os.remove(path)
+                deleted = True
+        return deleted
+
+    def enforce_retention(self) -> Dict[str, Any]:
+        """Delete expired reports, then evict least recently used ones over the disk budget.
+
+        Runs in a worker thread, so it only touches the filesystem; the
+        removed job ids are returned for the event loop to forget.
+        """
+        expired = evicted = 0
+        removed = []
+        retained = []
+
+        for job in self._all_jobs():
+            if self.is_expired(job):
+                # Also clears jobs left active by a worker that died mid-render
+                self._remove_files(job["job_id"])
+                removed.append(job["job_id"])
+                expired += 1
+            elif job["status"] not in ACTIVE_STATUSES:
+                retained.append(job)
+
+        total_bytes = sum(job["file_size_bytes"] or 0 for job in retained)
+        if total_bytes > self.disk_quota_bytes:
+            retained.sort(key=lambda job: job.get("last_accessed_at") or job["submitted_at"])
+            for job in retained:
+                if total_bytes <= self.disk_quota_bytes:
+                    break
+                self._remove_files(job["job_id"])
+                removed.append(job["job_id"])
+                total_bytes -= job["file_size_bytes"] or 0
+                evicted += 1
+
+        return {"expired": expired, "evicted": evicted, "total_bytes": total_bytes, "removed": removed}
+
+    async def run_janitor(self):
+        """Enforce TTL and disk quota at a fixed interval"""
+        loop = asyncio.get_event_loop()
+        while True:
+            try:
+                result = await loop.run_in_executor(None, self.enforce_retention)
+                for job_id in result["removed"]:
+                    self._forget(job_id)
+                self._counters["expired"] += result["expired"]
+                self._counters["evicted"] += result["evicted"]
+                if result["expired"] or result["evicted"]:
+                    print(f"Report janitor removed {result['expired']} expired and {result['evicted']} evicted reports")
+            except Exception as e:
+                print(f"Report janitor error: {e}")
+            await asyncio.sleep(self.janitor_interval)
+
+    async def stats(self) -> Dict[str, Any]:
+        jobs = await self._indexed_jobs()
+        submitted = self._counters["submitted"]
+        return {
+            **self._counters,
+            "hit_rate": self._counters["cache_hits"] / submitted if submitted else 0.0,
+            "jobs": len(jobs),
+            "active_jobs": sum(1 for job in jobs if job["status"] in ACTIVE_STATUSES),
+            "disk_bytes": sum(job["file_size_bytes"] or 0 for job in jobs),
+            "disk_quota_bytes": self.disk_quota_bytes,
+            "index_refreshed_at": datetime.fromtimestamp(self._index_refreshed_at).isoformat() if self._index_refreshed_at else None
+        }
+
+    def shutdown(self):
+        for task in list(self._tasks.values()):
+            task.cancel()
+        if self._pool:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+
+    async def _find_cached(self, cache_key: str) -> Optional[Dict[str, Any]]:
+        # Sidecars are shared, so after a refresh every API worker sees the same cache
+        for job in await self._indexed_jobs():
+            if job.get("cache_key") != cache_key or job["status"] == "failed" or self.is_expired(job):
+                continue
+            if job["status"] == "completed" and not os.path.exists(self.pdf_path(job["job_id"])):
+                continue
+            return job
+        return None
+
+    async def _indexed_jobs(self) -> List[Dict[str, Any]]:
+        """Jobs from the in-memory index, rescanning the sidecars once it is stale"""
+        stale = self._index_refreshed_at is None or time.time() - self._index_refreshed_at >= self.index_refresh_interval
+        if stale:
+            # Concurrent callers share one rescan
+            if self._index_refresh is None:
+                self._index_refresh = asyncio.ensure_future(self._refresh_index())
+            refresh = self._index_refresh
+            try:
+                await asyncio.shield(refresh)
+            except Exception as e:
+                # Serve the last index rather than failing the request
+                print(f"Report index refresh failed: {e}")
+            finally:
+                if self._index_refresh is refresh and refresh.done():
+                    self._index_refresh = None
+        return [dict(job) for job in self._index.values()]
+
+    async def _refresh_index(self):
+        started = time.time()
+        jobs = await render_bulkhead.run(self._all_jobs)
+        index = {job["job_id"]: job for job in jobs}
+        # Jobs this worker is running may have been written during the scan
+        for job_id in self._tasks:
+            if job_id in self._index:
+                index[job_id] = self._index[job_id]
+        self._index = index
+        self._index_refreshed_at = started
+
+    def _all_jobs(self) -> List[Dict[str, Any]]:
+        jobs = []
+        for name in os.listdir(self.reports_dir):
+            if name.endswith(".json"):
+                job = self.get(name[:-len(".json")])
+                if job:
+                    jobs.append(job)
+        return jobs
+
+    def _job_path(self, job_id: str) -> str:
+        return os.path.join(self.reports_dir, f"{job_id}.json")
+
+    def _write_job(self, job: Dict[str, Any]):
+        # Write-then-rename so readers in other workers never see a partial file
+        path = self._job_path(job["job_id"])
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(job, f)
+        os.replace(tmp_path, path)
+        self._index[job["job_id"]] = dict(job)
+
+# Initialize global job manager (process pool starts on first render)
+report_jobs = ReportJobManager()
@@ -0,0 +1,270 @@
+import os
+import re
+import asyncio
+import math
+import heapq
+from collections import Counter, OrderedDict
+from datetime import datetime
+from typing import Dict, List, Any, Optional, Tuple
+
+from app.services.supabase_client import query_blocklist, get_recent_explanations, get_recent_flagged_transactions
+
+Document = Tuple[str, str, Dict[str, Any]]
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9_]+")
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "has", "in",
+    "is", "it", "its", "of", "on", "or", "that", "the", "this", "to", "was",
+    "were", "will", "with", "what", "which", "why", "how", "do", "does", "any"
+}
+
+def tokenize(text: str) -> List[str]:
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOPWORDS]
+
+class BM25Index:
+    """In-process BM25 index over recent fraud data used to ground analyst Q&A.
+
+    Documents are added and replaced incrementally; once ``max_documents``
+    is reached the oldest document is evicted, so the index always covers
+    the most recent activity with bounded memory. Historical documents are
+    seeded behind the live ones, so they are evicted first.
+    """
+
+    def __init__(self, max_documents: Optional[int] = None, k1: float = 1.5, b: float = 0.75):
+        self.max_documents = max_documents or int(os.getenv("RETRIEVAL_INDEX_MAX_DOCUMENTS", 20000))
+        self.k1 = k1
+        self.b = b
+
+        self._documents: OrderedDict = OrderedDict()
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._lengths: Dict[str, int] = {}
+        self._total_length = 0
+        self.bootstrapped = False
+
+    def add(self, doc_id: str, text: str, metadata: Optional[Dict[str, Any]] = None):
+        """Add or replace a document"""
+        if doc_id in self._documents:
+            self.remove(doc_id)
+
+        term_counts = Counter(tokenize(text))
+        length = sum(term_counts.values())
+        if not length:
+            return
+
+        for term, count in term_counts.items():
+            self._postings.setdefault(term, {})[doc_id] = count
+
+        self._documents[doc_id] = {
+            "text": text,
+            "metadata": metadata or {},
+            "terms": list(term_counts),
+            "length": length
+        }
+        self._lengths[doc_id] = length
+        self._total_length += length
+
+        while len(self._documents) > self.max_documents:
+            self.remove(next(iter(self._documents)))
+
+    def seed(self, documents: List[Document]):
+        """Add historical (doc_id, text, metadata) documents, oldest first, behind the live ones.
+
+        Documents already indexed live are newer and kept as they are. Only
+        the newest documents that fit next to the live ones are added.
+        """
+        live = list(self._documents)
+        documents = [document for document in documents if document[0] not in self._documents]
+        room = self.max_documents - len(live)
+        if room <= 0:
+            return
+
+        for doc_id, text, metadata in documents[-room:]:
+            self.add(doc_id, text, metadata)
+        for doc_id in live:
+            self._documents.move_to_end(doc_id)
+
+    def remove(self, doc_id: str):
+        document = self._documents.pop(doc_id, None)
+        if not document:
+            return
+
+        for term in document["terms"]:
+            postings = self._postings.get(term)
+            if postings is None:
+                continue
+            postings.pop(doc_id, None)
+            if not postings:
+                del self._postings[term]
+
+        del self._lengths[doc_id]
+        self._total_length -= document["length"]
+
+    def search(self, query: str, k: int = 5) -> List[Dict[str, Any]]:
+        """Return the top-k documents for a free-text query"""
+        document_count = len(self._documents)
+        if not document_count:
+            return []
+
+        average_length = self._total_length / document_count
+        scores: Dict[str, float] = {}
+
+        query_postings = [
+            self._postings[term] for term in set(tokenize(query)) if term in self._postings
+        ]
+        if not query_postings:
+            return []
+
+        # Terms found in most documents (e.g. "transaction") add little
+        # ranking signal but dominate the work, so skip them when the query
+        # has anything more selective
+        selective = [p for p in query_postings if len(p) <= document_count * 0.5]
+        if selective:
+            query_postings = selective
+
+        # BM25 term score with the length normalization folded into two constants
+        base_norm = self.k1 * (1 - self.b)
+        length_scale = self.k1 * self.b / average_length
+        lengths = self._lengths
+
+        for postings in query_postings:
+            idf = math.log(1 + (document_count - len(postings) + 0.5) / (len(postings) + 0.5))
+            weight = idf * (self.k1 + 1)
+            for doc_id, term_frequency in postings.items():
+                term_score = weight * term_frequency / (term_frequency + base_norm + length_scale * lengths[doc_id])
+                scores[doc_id] = scores.get(doc_id, 0.0) + term_score
+
+        top = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+
+        return [
+            {
+                "doc_id": doc_id,
+                "score": round(score, 4),
+                "text": self._documents[doc_id]["text"],
+                "metadata": self._documents[doc_id]["metadata"]
+            }
+            for doc_id, score in top
+        ]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "documents": len(self._documents),
+            "terms": len(self._postings),
+            "max_documents": self.max_documents,
+            "bootstrapped": self.bootstrapped
+        }
+
+def transaction_document(
+    transaction_id: str,
+    user_id: str,
+    amount: float,
+    location: str,
+    risk_score: float,
+    risk_level: str,
+    flags: List[str]
+) -> Document:
+    return (
+        f"transaction:{transaction_id}",
+        f"Transaction {transaction_id} by user {user_id} for ${amount:.2f} "
+        f"at {location} scored {risk_score:.2f} ({risk_level} risk). "
+        f"Flags: {', '.join(flags) or 'none'}.",
+        {"type": "transaction", "transaction_id": transaction_id, "user_id": user_id}
+    )
+
+def blocked_user_document(user_id: str, reason: str, risk_score: float, blocked_by: str) -> Document:
+    return (
+        f"block:{user_id}",
+        f"User {user_id} was blocked by {blocked_by} with risk score {risk_score:.2f}. Reason: {reason}",
+        {"type": "blocklist", "user_id": user_id}
+    )
+
+def explanation_document(transaction_id: str, risk_score: float, explanation: str, key_factors: List[str]) -> Document:
+    return (
+        f"explanation:{transaction_id}",
+        f"Explanation for transaction {transaction_id} (risk {risk_score:.2f}): {explanation} "
+        f"Key factors: {'; '.join(key_factors)}.",
+        {"type": "explanation", "transaction_id": transaction_id}
+    )
+
+def index_scored_transaction(request, response):
+    """Index a flagged transaction"""
+    if response.risk_level.value == "low" and not response.flags:
+        return
+
+    retrieval_index.add(*transaction_document(
+        response.transaction_id,
+        request.user_id,
+        request.amount,
+        request.location,
+        response.risk_score,
+        response.risk_level.value,
+        response.flags
+    ))
+
+def index_blocked_user(user_id: str, reason: str, risk_score: float, blocked_by: str):
+    """Index a blocklist entry"""
+    retrieval_index.add(*blocked_user_document(user_id, reason, risk_score, blocked_by))
+
+def index_explanation(transaction_id: str, risk_score: float, explanation: str, key_factors: List[str]):
+    """Index a generated fraud explanation"""
+    retrieval_index.add(*explanation_document(transaction_id, risk_score, explanation, key_factors))
+
+def _as_datetime(value) -> datetime:
+    return value if isinstance(value, datetime) else datetime.fromisoformat(value)
+
+async def bootstrap_retrieval_index(limit: int = 1000):
+    """Seed the index from Supabase once, before incremental updates take over.
+
+    Concurrent callers share one load. A failed load raises and leaves the
+    index unbootstrapped, so the next call tries again
+    """
+    global _bootstrap_task
+    if retrieval_index.bootstrapped:
+        return
+    if _bootstrap_task is None or _bootstrap_task.done():
+        _bootstrap_task = asyncio.ensure_future(_load_retrieval_index(limit))
+    await asyncio.shield(_bootstrap_task)
+
+async def _load_retrieval_index(limit: int):
+    blocked_users, explanations, transactions = await asyncio.gather(
+        query_blocklist(limit=limit, status="active"),
+        get_recent_explanations(limit=limit),
+        get_recent_flagged_transactions(limit=limit)
+    )
+
+    # (time, document) pairs from every source, merged oldest first
+    dated = [
+        (blocked_user.blocked_at, blocked_user_document(
+            blocked_user.user_id, blocked_user.reason, blocked_user.risk_score, blocked_user.blocked_by
+        ))
+        for blocked_user in blocked_users
+    ]
+    dated += [
+        (record["generated_at"], explanation_document(
+            record["transaction_id"],
+            float(record.get("risk_score") or 0.0),
+            record["explanation"],
+            record.get("key_factors") or []
+        ))
+        for record in explanations
+    ]
+    dated += [
+        (record["scored_at"], transaction_document(
+            record["transaction_id"],
+            record["user_id"],
+            float(record["amount"]),
+            record.get("location") or "unknown location",
+            float(record["risk_score"]),
+            record["risk_level"],
+            record.get("flags") or []
+        ))
+        for record in transactions
+    ]
+    dated.sort(key=lambda item: _as_datetime(item[0]).timestamp())
+
+    retrieval_index.seed([document for _, document in dated])
+    retrieval_index.bootstrapped = True
+
+# Initialize global index
+retrieval_index = BM25Index()
+_bootstrap_task: Optional[asyncio.Task] = None
@@ -1,10 +1,11 @@
 import os
-from supabase import create_client, Client
 from typing import List, Dict, Any, Optional
 from datetime import datetime
 import asyncio
-from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
+from app.services.container import container
+from app.services.bulkhead import db_bulkhead
+from app.services.metrics import track_external
 from app.models.schemas import (
     TransactionData, ScoreResponse, BlockUserRequest, 
     BlockedUser, UploadResponse
@@ -20,16 +21,24 @@ class SupabaseClient:
         if not self.url or not self.key:
             raise ValueError("Supabase URL and key must be provided")
         
-        self.client: Client = create_client(self.url, self.key)
-        self.executor = ThreadPoolExecutor(max_workers=10)
+        from supabase import create_client
+        self.client = create_client(self.url, self.key)
     
-    async def _run_sync(self, func, *args, **kwargs):
-        """Run synchronous Supabase operations in thread pool"""
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(self.executor, func, *args, **kwargs)
+    async def _run_sync(self, func, *args):
+        """Run synchronous Supabase operations on the db bulkhead"""
+        return await db_bulkhead.run(_call_tracked, func, *args)
 
-# Initialize global client
-supabase_client = SupabaseClient()
+    async def _run_scan(self, func, *args):
+        """Run a multi-query scan on the db bulkhead; its page queries are tracked individually"""
+        return await db_bulkhead.run(func, *args)
+
+def _call_tracked(func, *args):
+    # Timed on the worker thread, so queueing for a thread is not counted as call latency
+    with track_external("supabase", getattr(func, "__name__", "call")):
+        return func(*args)
+
+# Global client, connected on first use
+supabase_client = container.register("supabase", SupabaseClient)
 
 async def save_transactions(transactions: List[Dict[str, Any]], file_id: str) -> bool:
     """Save uploaded transactions to Supabase"""
@@ -76,7 +85,10 @@ async def save_fraud_score(score_response: ScoreResponse) -> bool:
         }
         
         def insert_score():
-            return supabase_client.client.table("fraud_scores").insert(record).execute()
+            # A score for this transaction_id already stored (a retry served by another worker) is left as is
+            return supabase_client.client.table("fraud_scores").upsert(
+                record, on_conflict="transaction_id", ignore_duplicates=True
+            ).execute()
         
         result = await supabase_client._run_sync(insert_score)
         return len(result.data) > 0
@@ -85,6 +97,38 @@ async def save_fraud_score(score_response: ScoreResponse) -> bool:
         print(f"Error saving fraud score: {e}")
         return False
 
+async def save_fraud_scores(scores: List[Dict[str, Any]]) -> bool:
+    """Save many fraud scores (ScoreResponse fields, risk_level as a string) in one request"""
+    if not scores:
+        return True
+    try:
+        scored_at = datetime.now().isoformat()
+        
+        def insert_scores():
+            # Built on the worker thread, large batches would otherwise hold up the event loop
+            records = [
+                {
+                    "transaction_id": score["transaction_id"],
+                    "risk_score": score["risk_score"],
+                    "risk_level": score["risk_level"],
+                    "flags": score["flags"],
+                    "confidence": score["confidence"],
+                    "model_version": score["model_version"],
+                    "scored_at": scored_at
+                }
+                for score in scores
+            ]
+            return supabase_client.client.table("fraud_scores").upsert(
+                records, on_conflict="transaction_id", ignore_duplicates=True
+            ).execute()
+        
+        await supabase_client._run_sync(insert_scores)
+        return True
+        
+    except Exception as e:
+        print(f"Error saving fraud scores: {e}")
+        return False
+
 async def add_to_blocklist(request: BlockUserRequest) -> Dict[str, Any]:
     """Add user to blocklist"""
     try:
@@ -117,39 +161,48 @@ async def get_blocklist(
 ) -> List[BlockedUser]:
     """Get blocklist with optional filtering"""
     try:
-        def query_blocklist():
-            query = supabase_client.client.table("blocklist").select("*")
-            
-            if search:
-                query = query.or_(f"user_id.ilike.%{search}%,reason.ilike.%{search}%")
-            
-            if status:
-                query = query.eq("status", status)
-            
-            return query.range(offset, offset + limit - 1).order("blocked_at", desc=True).execute()
-        
-        result = await supabase_client._run_sync(query_blocklist)
-        
-        blocked_users = []
-        for record in result.data:
-            blocked_user = BlockedUser(
-                id=record["id"],
-                user_id=record["user_id"],
-                device_id=record.get("device_id"),
-                reason=record["reason"],
-                risk_score=record["risk_score"],
-                blocked_by=record["blocked_by"],
-                blocked_at=datetime.fromisoformat(record["blocked_at"]),
-                status=record["status"]
-            )
-            blocked_users.append(blocked_user)
-        
-        return blocked_users
+        return await query_blocklist(limit=limit, offset=offset, search=search, status=status)
         
     except Exception as e:
         print(f"Error getting blocklist: {e}")
         return []
 
+async def query_blocklist(
+    limit: int = 100, 
+    offset: int = 0, 
+    search: str = None, 
+    status: str = None
+) -> List[BlockedUser]:
+    """Get blocklist with optional filtering; raises on failure"""
+    def fetch_blocklist():
+        query = supabase_client.client.table("blocklist").select("*")
+        
+        if search:
+            query = query.or_(f"user_id.ilike.%{search}%,reason.ilike.%{search}%")
+        
+        if status:
+            query = query.eq("status", status)
+        
+        return query.range(offset, offset + limit - 1).order("blocked_at", desc=True).execute()
+    
+    result = await supabase_client._run_sync(fetch_blocklist)
+    
+    blocked_users = []
+    for record in result.data:
+        blocked_user = BlockedUser(
+            id=record["id"],
+            user_id=record["user_id"],
+            device_id=record.get("device_id"),
+            reason=record["reason"],
+            risk_score=record["risk_score"],
+            blocked_by=record["blocked_by"],
+            blocked_at=datetime.fromisoformat(record["blocked_at"]),
+            status=record["status"]
+        )
+        blocked_users.append(blocked_user)
+    
+    return blocked_users
+
 async def remove_from_blocklist(user_id: str, reason: str) -> bool:
     """Remove user from blocklist"""
     try:
@@ -239,6 +292,170 @@ async def get_fraud_analytics_data(
         print(f"Error getting analytics data: {e}")
         return {}
 
+async def get_report_data_watermark(start_date: datetime, end_date: datetime) -> Optional[str]:
+    """Cheap fingerprint of the rows a report over this period would read.
+
+    Combines row count and latest updated_at per source table. Inserts and
+    deletes change the count, and inserts and updates (the updated_at
+    trigger) move the latest updated_at. Returns None if it cannot be
+    computed, in which case callers should not reuse reports.
+    """
+    try:
+        sources = [("transactions", "timestamp"), ("fraud_scores", "scored_at"), ("blocklist", "blocked_at")]
+
+        def query_source(table: str, column: str):
+            return supabase_client.client.table(table).select(
+                "updated_at", count="exact"
+            ).gte(column, start_date.isoformat()).lte(
+                column, end_date.isoformat()
+            ).order("updated_at", desc=True).limit(1).execute()
+
+        results = await asyncio.gather(*[
+            supabase_client._run_sync(query_source, table, column) for table, column in sources
+        ])
+
+        parts = []
+        for (table, _), result in zip(sources, results):
+            updated = result.data[0]["updated_at"] if result.data else ""
+            parts.append(f"{table}:{result.count or 0}@{updated}")
+        return "|".join(parts)
+        
+    except Exception as e:
+        print(f"Error getting report data watermark: {e}")
+        return None
+
+SCORED_TRANSACTION_COLUMNS = [
+    "transaction_id", "user_id", "amount", "timestamp", "location", "device_id",
+    "payment_method", "merchant_category", "risk_score", "risk_level", "flags",
+    "confidence", "model_version", "scored_at"
+]
+
+def iter_keyset_pages(
+    table: str,
+    columns: str,
+    time_column: str,
+    start_date: datetime,
+    end_date: datetime,
+    page_size: int = 1000,
+    apply_filters=None
+):
+    """Yield pages of rows in a time range, ordered by (time_column, id).
+
+    Synchronous generator for worker threads and processes. Each page
+    continues after the last (time_column, id) seen, so every request is
+    an index range scan no matter how deep into the range it is, and only
+    one page is held in memory at a time.
+    """
+    last_time, last_id = None, None
+
+    while True:
+        query = supabase_client.client.table(table).select(
+            f"id, {time_column}, {columns}"
+        ).gte(time_column, start_date.isoformat()).lte(time_column, end_date.isoformat())
+
+        if apply_filters:
+            query = apply_filters(query)
+        if last_time is not None:
+            query = query.or_(
+                f'{time_column}.gt."{last_time}",and({time_column}.eq."{last_time}",id.gt.{last_id})'
+            )
+
+        with track_external("supabase", f"scan_{table}"):
+            rows = query.order(time_column).order("id").limit(page_size).execute().data
+        if not rows:
+            return
+        yield rows
+
+        if len(rows) < page_size:
+            return
+        last_time, last_id = rows[-1][time_column], rows[-1]["id"]
+
+def iter_scored_transactions(
+    start_date: datetime,
+    end_date: datetime,
+    min_risk_score: Optional[float] = None,
+    page_size: int = 1000
+):
+    """Yield fraud scores joined with their transactions, oldest first"""
+    def apply_filters(query):
+        return query.gte("risk_score", min_risk_score) if min_risk_score is not None else query
+
+    for scores in iter_keyset_pages(
+        "fraud_scores",
+        "transaction_id, risk_score, risk_level, flags, confidence, model_version",
+        "scored_at",
+        start_date,
+        end_date,
+        page_size=page_size,
+        apply_filters=apply_filters
+    ):
+        transactions = supabase_client.client.table("transactions").select(
+            "transaction_id, user_id, amount, timestamp, location, device_id, payment_method, merchant_category"
+        ).in_("transaction_id", list({score["transaction_id"] for score in scores})).execute().data
+        by_id = {transaction["transaction_id"]: transaction for transaction in transactions}
+
+        for score in scores:
+            transaction = by_id.get(score["transaction_id"], {})
+            yield {column: score.get(column, transaction.get(column)) for column in SCORED_TRANSACTION_COLUMNS}
+
+async def get_recent_flagged_transactions(limit: int = 1000) -> List[Dict[str, Any]]:
+    """Most recently scored transactions that were not low risk or raised flags, newest first; raises on failure"""
+    def query_flagged():
+        scores = supabase_client.client.table("fraud_scores").select(
+            "transaction_id, risk_score, risk_level, flags, scored_at"
+        ).or_("risk_level.neq.low,flags.neq.{}").order("scored_at", desc=True).limit(limit).execute().data
+        if not scores:
+            return []
+
+        transactions = supabase_client.client.table("transactions").select(
+            "transaction_id, user_id, amount, location"
+        ).in_("transaction_id", [score["transaction_id"] for score in scores]).execute().data
+        by_id = {transaction["transaction_id"]: transaction for transaction in transactions}
+
+        return [{**by_id[score["transaction_id"]], **score} for score in scores if score["transaction_id"] in by_id]
+    
+    return await supabase_client._run_sync(query_flagged)
+
+async def get_dashboard_totals() -> Optional[Dict[str, int]]:
+    """All-time scored transaction count and currently active blocks"""
+    try:
+        def count_transactions():
+            return supabase_client.client.table("fraud_scores").select("id", count="exact").limit(1).execute()
+        
+        def count_active_blocks():
+            return supabase_client.client.table("blocklist").select(
+                "id", count="exact"
+            ).eq("status", "active").limit(1).execute()
+        
+        transaction_result, block_result = await asyncio.gather(
+            supabase_client._run_sync(count_transactions),
+            supabase_client._run_sync(count_active_blocks)
+        )
+        
+        return {
+            "total_transactions": transaction_result.count or 0,
+            "active_blocked_users": block_result.count or 0
+        }
+        
+    except Exception as e:
+        print(f"Error getting dashboard totals: {e}")
+        return None
+
+async def get_transaction(transaction_id: str) -> Optional[Dict[str, Any]]:
+    """Get a stored transaction by its transaction_id"""
+    try:
+        def query_transaction():
+            return supabase_client.client.table("transactions").select(
+                "transaction_id, user_id, amount, timestamp"
+            ).eq("transaction_id", transaction_id).limit(1).execute()
+        
+        result = await supabase_client._run_sync(query_transaction)
+        return result.data[0] if result.data else None
+        
+    except Exception as e:
+        print(f"Error getting transaction: {e}")
+        return None
+
 async def get_receipt_data(
     transaction_id: Optional[str] = None, 
     receipt_hash: Optional[str] = None
@@ -262,4 +479,94 @@ async def get_receipt_data(
         
     except Exception as e:
         print(f"Error getting receipt data: {e}")
-        return None
\ No newline at end of file
+        return None
+
+async def save_receipt(receipt: Dict[str, Any]) -> bool:
+    """Save issued receipt to Supabase"""
+    try:
+        record = {
+            "receipt_hash": receipt["receipt_hash"],
+            "transaction_id": receipt["transaction_id"],
+            "amount": receipt["amount"],
+            "store": receipt["store"],
+            "timestamp": receipt["timestamp"],
+            "signature": receipt.get("signature"),
+            "key_id": receipt.get("key_id")
+        }
+        
+        def insert_receipt():
+            return supabase_client.client.table("receipts").insert(record).execute()
+        
+        result = await supabase_client._run_sync(insert_receipt)
+        return len(result.data) > 0
+        
+    except Exception as e:
+        print(f"Error saving receipt: {e}")
+        return False
+
+async def is_receipt_revoked(transaction_id: str) -> Optional[bool]:
+    """Check whether a receipt has been revoked; None when the status could not be read"""
+    try:
+        def query_revocation():
+            return supabase_client.client.table("receipts").select(
+                "revoked"
+            ).eq("transaction_id", transaction_id).eq("revoked", True).limit(1).execute()
+        
+        result = await supabase_client._run_sync(query_revocation)
+        return len(result.data) > 0
+        
+    except Exception as e:
+        print(f"Error checking receipt revocation: {e}")
+        return None
+
+async def get_explanation(
+    transaction_id: Optional[str] = None,
+    risk_signature: Optional[str] = None,
+    generated_by: Optional[List[str]] = None
+) -> Optional[Dict[str, Any]]:
+    """Get the latest stored explanation for a transaction, or for a risk signature from the given generators"""
+    try:
+        def query_explanation():
+            query = supabase_client.client.table("fraud_explanations").select(
+                "explanation, key_factors, recommendations, generated_by, generated_at"
+            )
+            
+            if transaction_id:
+                query = query.eq("transaction_id", transaction_id)
+            elif risk_signature:
+                # Only signature-scoped text may be shared across transactions
+                query = query.eq("risk_signature", risk_signature).in_("generated_by", list(generated_by or []))
+            else:
+                return None
+            
+            return query.order("generated_at", desc=True).limit(1).execute()
+        
+        result = await supabase_client._run_sync(query_explanation)
+        return result.data[0] if result and result.data else None
+        
+    except Exception as e:
+        print(f"Error getting explanation: {e}")
+        return None
+
+async def save_explanations(records: List[Dict[str, Any]]) -> bool:
+    """Save a batch of generated explanations to Supabase"""
+    try:
+        def insert_explanations():
+            return supabase_client.client.table("fraud_explanations").insert(records).execute()
+        
+        result = await supabase_client._run_sync(insert_explanations)
+        return len(result.data) > 0
+        
+    except Exception as e:
+        print(f"Error saving explanations: {e}")
+        return False
+
+async def get_recent_explanations(limit: int = 1000) -> List[Dict[str, Any]]:
+    """Get the most recently generated explanations; raises on failure"""
+    def query_explanations():
+        return supabase_client.client.table("fraud_explanations").select(
+            "transaction_id, risk_score, explanation, key_factors, generated_at"
+        ).order("generated_at", desc=True).limit(limit).execute()
+    
+    result = await supabase_client._run_sync(query_explanations)
+    return result.data or []
\ No newline at end of file
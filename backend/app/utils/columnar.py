@@ -0,0 +1,202 @@
+import io
+import json
+import warnings
+from datetime import datetime
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+
+ARROW_STREAM_TYPE = "application/vnd.apache.arrow.stream"
+
+STRING_COLUMNS = ("transaction_id", "user_id", "location")
+OPTIONAL_STRING_COLUMNS = ("device_id",)
+REQUIRED_COLUMNS = STRING_COLUMNS + ("amount",)
+KNOWN_COLUMNS = REQUIRED_COLUMNS + OPTIONAL_STRING_COLUMNS + ("timestamp",)
+
+# Row indices listed per column error; the count covers the rest
+MAX_REPORTED_ROWS = 10
+
+class ColumnarValidationError(ValueError):
+    """A columnar batch was malformed; ``errors`` name the column and the offending rows"""
+
+    def __init__(self, errors: List[Dict[str, Any]], status_code: int = 422):
+        super().__init__("; ".join(error["msg"] for error in errors))
+        self.errors = errors
+        self.status_code = status_code
+
+def _error(column: Optional[str], msg: str, rows: Optional[np.ndarray] = None) -> Dict[str, Any]:
+    error: Dict[str, Any] = {"column": column, "msg": msg}
+    if rows is not None:
+        error["rows"] = [int(row) for row in rows[:MAX_REPORTED_ROWS]]
+        error["count"] = int(len(rows))
+    return error
+
+def decode_json_columns(body: bytes) -> Dict[str, Any]:
+    """Columns from a JSON object of parallel arrays"""
+    try:
+        columns = json.loads(body)
+    except ValueError as e:
+        raise ColumnarValidationError([_error(None, f"Invalid JSON: {str(e)}")], status_code=400)
+    if not isinstance(columns, dict):
+        raise ColumnarValidationError([_error(None, "Body must be a JSON object of column arrays")], status_code=400)
+
+    errors = [_error(name, "Column must be an array") for name, values in columns.items() if not isinstance(values, list)]
+    if errors:
+        raise ColumnarValidationError(errors)
+    return columns
+
+def decode_arrow_columns(body: bytes) -> Dict[str, Any]:
+    """Columns from an Arrow IPC stream; numeric and timestamp columns stay NumPy arrays"""
+    import pyarrow as pa
+
+    try:
+        table = pa.ipc.open_stream(body).read_all()
+    except (pa.ArrowInvalid, OSError) as e:
+        raise ColumnarValidationError([_error(None, f"Invalid Arrow IPC stream: {str(e)}")], status_code=400)
+
+    columns = {}
+    for name in table.column_names:
+        column = table.column(name)
+        if pa.types.is_floating(column.type) or pa.types.is_integer(column.type):
+            values = column.to_numpy()
+            columns[name] = values if column.null_count == 0 else np.asarray(column.to_pylist(), dtype=object)
+        elif pa.types.is_timestamp(column.type):
+            # Arrow stores zoned timestamps in UTC, which is what NumPy expects
+            columns[name] = column.cast(pa.timestamp(column.type.unit)).to_numpy()
+        else:
+            columns[name] = column.to_pylist()
+    return columns
+
+def validate_columns(columns: Dict[str, Any], max_rows: int, now: Optional[datetime] = None) -> Dict[str, Any]:
+    """Check a decoded batch column by column and derive the arrays the feature matrix needs.
+
+    Returns the string columns as lists and ``amount``, ``hour`` and
+    ``weekday`` as float64 arrays. All column errors are collected before
+    raising, so a client fixes its batch in one round trip.
+    """
+    missing = [name for name in REQUIRED_COLUMNS if name not in columns]
+    if missing:
+        raise ColumnarValidationError([_error(name, "Missing required column") for name in missing])
+
+    unknown = [name for name in columns if name not in KNOWN_COLUMNS]
+    if unknown:
+        raise ColumnarValidationError([_error(name, "Unknown column") for name in unknown])
+
+    n = len(columns["transaction_id"])
+    if n == 0:
+        raise ColumnarValidationError([_error("transaction_id", "Batch is empty")])
+    if n > max_rows:
+        raise ColumnarValidationError([_error(None, f"Batch has {n} rows, the limit is {max_rows}")], status_code=413)
+
+    errors = [
+        _error(name, f"Column has {len(values)} values, expected {n}")
+        for name, values in columns.items()
+        if len(values) != n
+    ]
+    if errors:
+        raise ColumnarValidationError(errors)
+
+    batch: Dict[str, Any] = {"rows": n}
+    for name in STRING_COLUMNS + OPTIONAL_STRING_COLUMNS:
+        values = columns.get(name)
+        if values is None:
+            batch[name] = [None] * n
+            continue
+        # One type per row, compared as a whole column
+        kinds = np.fromiter(map(type, values), dtype=object, count=n)
+        invalid = kinds != str
+        if name in OPTIONAL_STRING_COLUMNS:
+            invalid &= kinds != type(None)
+        rows = np.flatnonzero(invalid)
+        if len(rows):
+            errors.append(_error(name, "Expected strings" + (" or null" if name in OPTIONAL_STRING_COLUMNS else ""), rows))
+        batch[name] = list(values)
+
+    amounts = _float_column(columns["amount"], errors)
+    if amounts is not None:
+        rows = np.flatnonzero(~np.isfinite(amounts))
+        if len(rows):
+            errors.append(_error("amount", "Expected finite numbers", rows))
+        batch["amount"] = amounts
+
+    timestamps = _timestamp_column(columns.get("timestamp"), n, now or datetime.now(), errors)
+    if timestamps is not None:
+        days = timestamps.astype("datetime64[D]")
+        batch["timestamp"] = timestamps
+        batch["hour"] = ((timestamps - days) // np.timedelta64(1, "h")).astype(np.float64)
+        # 1970-01-01 was a Thursday (weekday 3)
+        batch["weekday"] = ((days.astype(np.int64) + 3) % 7).astype(np.float64)
+
+    if errors:
+        raise ColumnarValidationError(errors)
+    return batch
+
+def _float_column(values, errors: List[Dict[str, Any]]) -> Optional[np.ndarray]:
+    if isinstance(values, np.ndarray) and values.dtype.kind in "fiu":
+        return values.astype(np.float64, copy=False)
+
+    values = np.asarray(values, dtype=object)
+    kinds = np.fromiter(map(type, values), dtype=object, count=len(values))
+    rows = np.flatnonzero((kinds != float) & (kinds != int))
+    if len(rows):
+        errors.append(_error("amount", "Expected numbers", rows))
+        return None
+    return values.astype(np.float64)
+
+def _timestamp_column(values, n: int, now: datetime, errors: List[Dict[str, Any]]) -> Optional[np.ndarray]:
+    """Timestamps as datetime64[us]; missing values default to ``now`` like ScoreRequest scoring"""
+    if values is None:
+        return np.full(n, np.datetime64(now, "us"))
+
+    if isinstance(values, np.ndarray) and values.dtype.kind == "M":
+        timestamps = values.astype("datetime64[us]")
+    else:
+        values = np.asarray(values, dtype=object)
+        kinds = np.fromiter(map(type, values), dtype=object, count=n)
+        rows = np.flatnonzero((kinds != str) & (kinds != type(None)))
+        if len(rows):
+            errors.append(_error("timestamp", "Expected ISO 8601 strings or null", rows))
+            return None
+        try:
+            with warnings.catch_warnings():
+                # Offsets are applied, giving UTC; NumPy warns that this is deprecated
+                warnings.simplefilter("ignore", DeprecationWarning)
+                timestamps = values.astype("datetime64[us]")
+        except ValueError:
+            rows = np.flatnonzero([not _parses(value) for value in values])
+            errors.append(_error("timestamp", "Expected ISO 8601 strings or null", rows))
+            return None
+
+    timestamps[np.isnat(timestamps)] = np.datetime64(now, "us")
+    return timestamps
+
+def _parses(value: Optional[str]) -> bool:
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", DeprecationWarning)
+            np.datetime64(value, "us")
+        return True
+    except ValueError:
+        return False
+
+def encode_json_results(results: Dict[str, Any]) -> bytes:
+    return json.dumps(results).encode()
+
+def encode_arrow_results(results: Dict[str, Any]) -> bytes:
+    """Results as an Arrow IPC stream; the model version travels as schema metadata"""
+    import pyarrow as pa
+
+    table = pa.table(
+        {
+            "transaction_id": pa.array(results["transaction_id"], type=pa.string()),
+            "risk_score": pa.array(results["risk_score"], type=pa.float64()),
+            "risk_level": pa.array(results["risk_level"], type=pa.string()),
+            "flags": pa.array(results["flags"], type=pa.list_(pa.string())),
+            "confidence": pa.array(results["confidence"], type=pa.float64())
+        },
+        metadata={"model_version": results["model_version"]}
+    )
+    sink = io.BytesIO()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue()
@@ -0,0 +1,10 @@
+from datetime import datetime, timezone
+
+def as_utc(value: datetime) -> datetime:
+    """Timezone-aware UTC datetime; naive values are taken to be UTC already"""
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+def utc_now() -> datetime:
+    return datetime.now(timezone.utc)
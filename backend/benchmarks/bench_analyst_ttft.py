@@ -0,0 +1,60 @@
+"""
+Compare time-to-first-byte of the blocking analyst endpoint with
+time-to-first-token of the SSE endpoint.
+
+Without a Groq account, run the API against the local fake server:
+  python benchmarks/fake_groq_server.py --port 8765
+  GROQ_API_KEY=fake GROQ_BASE_URL=http://127.0.0.1:8765 uvicorn app.main:app
+
+Usage: python benchmarks/bench_analyst_ttft.py [--base-url URL] [--runs N]
+"""
+import argparse
+import statistics
+import time
+import requests
+
+QUESTION = "What patterns usually indicate card testing fraud?"
+
+def measure_blocking(base_url: str) -> float:
+    started = time.perf_counter()
+    response = requests.post(f"{base_url}/api/explain/ask", json={"question": QUESTION})
+    response.raise_for_status()
+    # The whole answer arrives at once, so first byte == full response
+    return time.perf_counter() - started
+
+def measure_streaming(base_url: str) -> tuple:
+    started = time.perf_counter()
+    first_token = None
+
+    with requests.post(f"{base_url}/api/explain/ask/stream", json={"question": QUESTION}, stream=True) as response:
+        response.raise_for_status()
+        for line in response.iter_lines():
+            if first_token is None and line.startswith(b"data:"):
+                first_token = time.perf_counter() - started
+
+    return first_token, time.perf_counter() - started
+
+def summarize(label: str, samples: list):
+    samples = sorted(samples)
+    p95 = samples[min(int(len(samples) * 0.95), len(samples) - 1)]
+    print(f"{label:<28} p50={statistics.median(samples) * 1000:8.1f} ms  p95={p95 * 1000:8.1f} ms")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    blocking, first_tokens, totals = [], [], []
+    for _ in range(args.runs):
+        blocking.append(measure_blocking(args.base_url))
+        first_token, total = measure_streaming(args.base_url)
+        first_tokens.append(first_token)
+        totals.append(total)
+
+    summarize("blocking /ask (first byte)", blocking)
+    summarize("SSE /ask/stream (first token)", first_tokens)
+    summarize("SSE /ask/stream (complete)", totals)
+
+if __name__ == "__main__":
+    main()
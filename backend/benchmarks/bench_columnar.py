@@ -0,0 +1,130 @@
+"""
+Compare batch scoring through POST /api/score/batch (a list of ScoreRequest
+objects) with POST /api/score/columnar (parallel arrays as JSON or Arrow IPC).
+
+Requests go through the app in-process. Supabase is unreachable unless
+SUPABASE_URL points at a real project, so persistence fails fast and is
+mostly excluded. For every size the request validation and response
+encoding steps are also timed on their own, since they are what the
+columnar format removes. /api/score/batch calls the model once per row,
+so it only runs end to end up to --batch-max-rows.
+
+Usage:
+  SUPABASE_URL=http://localhost:1 SUPABASE_ANON_KEY=a.b.c \
+    python benchmarks/bench_columnar.py [--rows 10000 100000] [--batch-max-rows 10000]
+"""
+import argparse
+import io
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+ARROW_STREAM_TYPE = "application/vnd.apache.arrow.stream"
+LOCATIONS = ["Bentonville, AR", "New York, NY", "Austin, TX", "Seattle, WA"]
+
+def synthetic_columns(count: int) -> dict:
+    random.seed(7)
+    started = datetime(2024, 1, 1)
+    return {
+        "transaction_id": [f"txn_{index:09d}" for index in range(count)],
+        "user_id": [f"user_{random.randint(1, 100000):06d}" for _ in range(count)],
+        "amount": [round(random.uniform(5, 5000), 2) for _ in range(count)],
+        "location": [random.choice(LOCATIONS) for _ in range(count)],
+        "device_id": [f"dev_{random.randint(1, 200000)}" for _ in range(count)],
+        "timestamp": [(started + timedelta(seconds=index * 3)).isoformat() for index in range(count)]
+    }
+
+def to_rows(columns: dict) -> list:
+    names = list(columns)
+    return [dict(zip(names, values)) for values in zip(*columns.values())]
+
+def to_arrow(columns: dict) -> bytes:
+    import pyarrow as pa
+
+    table = pa.table({
+        **columns,
+        "timestamp": pa.array([datetime.fromisoformat(value) for value in columns["timestamp"]], type=pa.timestamp("us"))
+    })
+    sink = io.BytesIO()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue()
+
+def timed(func, *args) -> tuple:
+    started = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - started, result
+
+def wire_costs(rows_body: bytes, columns_body: bytes) -> dict:
+    """Request validation and response encoding alone, row objects vs columns"""
+    from fastapi.encoders import jsonable_encoder
+    from pydantic import TypeAdapter
+    from typing import List
+
+    from app.models.schemas import ScoreRequest
+    from app.routes.score import decode_and_validate_columns, score_batch, score_columns
+    from app.utils.columnar import encode_json_results
+
+    validate_rows, requests = timed(TypeAdapter(List[ScoreRequest]).validate_json, rows_body)
+    validate_columns, batch = timed(decode_and_validate_columns, columns_body, False)
+
+    responses = score_batch(requests)
+    encode_rows, _ = timed(lambda: json.dumps(jsonable_encoder({"results": responses, "total_processed": len(responses)})))
+    encode_columns, _ = timed(encode_json_results, score_columns(batch))
+
+    return {
+        "validate_rows": validate_rows,
+        "validate_columns": validate_columns,
+        "encode_rows": encode_rows,
+        "encode_columns": encode_columns
+    }
+
+def post(client, path: str, body: bytes, content_type: str) -> tuple:
+    started = time.perf_counter()
+    response = client.post(path, content=body, headers={"content-type": content_type}, timeout=None)
+    elapsed = time.perf_counter() - started
+    if response.status_code != 200:
+        raise SystemExit(f"{path} answered {response.status_code}: {response.text[:200]}")
+    return elapsed, len(response.content)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--batch-max-rows", type=int, default=10000)
+    args = parser.parse_args()
+
+    os.environ.setdefault("ADMISSION_ENABLED", "false")
+    os.environ.setdefault("SCORE_COLUMNAR_MAX_ROWS", str(max(args.rows)))
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    client = TestClient(app)
+    print(f"{'rows':>8}  {'endpoint':<27} {'seconds':>8} {'rows/s':>9} {'request':>9} {'response':>9}")
+    for count in args.rows:
+        columns = synthetic_columns(count)
+        rows_body = json.dumps(to_rows(columns)).encode()
+        columns_body = json.dumps(columns).encode()
+        arrow_body = to_arrow(columns)
+
+        runs = [("columnar (json)", "/api/score/columnar", columns_body, "application/json"),
+                ("columnar (arrow)", "/api/score/columnar", arrow_body, ARROW_STREAM_TYPE)]
+        if count <= args.batch_max_rows:
+            runs.insert(0, ("batch (List[ScoreRequest])", "/api/score/batch", rows_body, "application/json"))
+        for name, path, body, content_type in runs:
+            elapsed, response_bytes = post(client, path, body, content_type)
+            print(f"{count:>8}  {name:<27} {elapsed:>8.2f} {count / elapsed:>9.0f} "
+                  f"{len(body) / 1e6:>7.1f}MB {response_bytes / 1e6:>7.1f}MB")
+        if count > args.batch_max_rows:
+            print(f"{count:>8}  batch (List[ScoreRequest]) skipped, above --batch-max-rows")
+
+        costs = wire_costs(rows_body, columns_body)
+        print(f"{count:>8}  validate: rows {costs['validate_rows']:.3f}s, columns {costs['validate_columns']:.3f}s; "
+              f"encode: rows {costs['encode_rows']:.3f}s, columns {costs['encode_columns']:.3f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Measure export throughput.
+
+--offline encodes synthetic rows through the CSV/NDJSON/Parquet writers
+(no database), isolating encoder cost and peak memory. Without it, the
+running API's GET /api/export is streamed end to end.
+
+Usage:
+  python benchmarks/bench_export.py --offline [--rows 100000 500000]
+  python benchmarks/bench_export.py [--base-url URL] [--start-date 2024-01-01]
+"""
+import argparse
+import os
+import random
+import resource
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+FORMATS = ["csv", "ndjson", "parquet"]
+FLAGS = ["unusual_amount", "new_device", "high_velocity", "location_anomaly"]
+
+def synthetic_rows(count: int):
+    random.seed(7)
+    started = datetime(2024, 1, 1)
+    for index in range(count):
+        risk_score = round(random.random(), 2)
+        timestamp = (started + timedelta(seconds=index * 3)).isoformat() + "+00:00"
+        yield {
+            "transaction_id": f"txn_{index:09d}",
+            "user_id": f"user_{random.randint(1, 100000):06d}",
+            "amount": round(random.uniform(5, 5000), 2),
+            "timestamp": timestamp,
+            "location": "Bentonville, AR",
+            "device_id": f"dev_{random.randint(1, 200000)}",
+            "payment_method": "credit_card",
+            "merchant_category": "grocery",
+            "risk_score": risk_score,
+            "risk_level": "high" if risk_score >= 0.8 else "medium" if risk_score >= 0.5 else "low",
+            "flags": random.sample(FLAGS, random.randint(0, 2)),
+            "confidence": 0.9,
+            "model_version": "v1.0",
+            "scored_at": timestamp
+        }
+
+def encode_offline(export_format: str, rows: int) -> tuple:
+    from app.services.exporter import iter_csv, iter_ndjson, iter_parquet
+
+    encoder = {"csv": iter_csv, "ndjson": iter_ndjson, "parquet": iter_parquet}[export_format]
+    started = time.perf_counter()
+    total_bytes = sum(len(chunk) for chunk in encoder(synthetic_rows(rows)))
+    elapsed = time.perf_counter() - started
+    return elapsed, total_bytes, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def stream_endpoint(base_url: str, export_format: str, params: dict) -> tuple:
+    started = time.perf_counter()
+    total_bytes = 0
+    with requests.get(f"{base_url}/api/export", params={**params, "format": export_format}, stream=True) as response:
+        response.raise_for_status()
+        for chunk in response.iter_content(chunk_size=65536):
+            total_bytes += len(chunk)
+    return time.perf_counter() - started, total_bytes
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--offline", action="store_true")
+    parser.add_argument("--rows", type=int, nargs="+", default=[100000, 500000])
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--start-date")
+    parser.add_argument("--end-date")
+    args = parser.parse_args()
+
+    if args.offline:
+        print(f"{'format':<8} {'rows':>8} {'seconds':>8} {'rows/s':>9} {'MB/s':>7} {'output MB':>10} {'peak RSS MB':>12}")
+        for rows in args.rows:
+            for export_format in FORMATS:
+                # Fresh process per case so peak RSS is attributable to it
+                with ProcessPoolExecutor(max_workers=1) as pool:
+                    elapsed, total_bytes, peak_rss_mb = pool.submit(encode_offline, export_format, rows).result()
+                print(f"{export_format:<8} {rows:>8} {elapsed:>8.2f} {rows / elapsed:>9.0f} "
+                      f"{total_bytes / 1e6 / elapsed:>7.1f} {total_bytes / 1e6:>10.1f} {peak_rss_mb:>12.1f}")
+        return
+
+    params = {key: value for key, value in (("start_date", args.start_date), ("end_date", args.end_date)) if value}
+    print(f"{'format':<8} {'seconds':>8} {'MB':>8} {'MB/s':>7}")
+    for export_format in FORMATS:
+        elapsed, total_bytes = stream_endpoint(args.base_url, export_format, params)
+        print(f"{export_format:<8} {elapsed:>8.2f} {total_bytes / 1e6:>8.1f} {total_bytes / 1e6 / elapsed:>7.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Compare the xhtml2pdf HTML path with the page-by-page ReportLab renderer
+for transaction-listing reports of increasing size.
+
+Each case runs in a fresh process so peak RSS is attributable to it.
+
+Usage: python benchmarks/bench_report_render.py [--rows 1000 5000 20000] [--html-max-rows 5000]
+"""
+import argparse
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+FLAGS = ["unusual_amount", "new_device", "high_velocity", "location_anomaly"]
+LOCATIONS = ["Bentonville, AR", "Dallas, TX", "Chicago, IL", "Newark, NJ", "Seattle, WA"]
+
+SUMMARY_DATA = {
+    "transaction_stats": {"total_transactions": 250000, "fraud_detected": 1250, "fraud_rate": 0.5},
+    "risk_distribution": {"high_risk": 1250, "medium_risk": 4100, "low_risk": 244650},
+    "blocklist_stats": {"users_blocked": 340},
+    "top_flags": ["Unusual amount", "New device"]
+}
+
+def synthetic_rows(count: int):
+    random.seed(7)
+    started = datetime(2024, 1, 1)
+    for index in range(count):
+        risk_score = random.uniform(0.5, 1.0)
+        yield {
+            "transaction_id": f"txn_{index:08d}",
+            "user_id": f"user_{random.randint(1, 50000):06d}",
+            "amount": round(random.uniform(5, 5000), 2),
+            "location": random.choice(LOCATIONS),
+            "risk_score": risk_score,
+            "risk_level": "high" if risk_score >= 0.8 else "medium",
+            "flags": random.sample(FLAGS, random.randint(0, 3)),
+            "scored_at": (started + timedelta(seconds=index * 7)).isoformat()
+        }
+
+def render_html(rows: int, reports_dir: str) -> float:
+    from xhtml2pdf import pisa
+    from app.services.pdf_generator import PDFReportGenerator
+    from app.services.pdf_stream_renderer import format_cell, TRANSACTION_COLUMNS
+
+    started = time.perf_counter()
+    generator = PDFReportGenerator(reports_dir)
+    html = generator._generate_detailed_report(SUMMARY_DATA, datetime(2024, 1, 1), datetime(2024, 1, 8))
+    header = "".join(f"<th>{title}</th>" for title, _, _, _ in TRANSACTION_COLUMNS)
+    body = "".join(
+        "<tr>" + "".join(f"<td>{format_cell(key, row.get(key))}</td>" for _, key, _, _ in TRANSACTION_COLUMNS) + "</tr>"
+        for row in synthetic_rows(rows)
+    )
+    html = html.replace('<div class="footer">', f"<table><tr>{header}</tr>{body}</table>" + '<div class="footer">')
+
+    with open(os.path.join(reports_dir, "html.pdf"), "w+b") as pdf_file:
+        pisa.CreatePDF(html, dest=pdf_file)
+    return time.perf_counter() - started
+
+def render_streaming(rows: int, reports_dir: str) -> float:
+    from app.services.pdf_stream_renderer import StreamingPDFRenderer
+
+    started = time.perf_counter()
+    StreamingPDFRenderer(reports_dir).render(
+        "detailed", SUMMARY_DATA, synthetic_rows(rows), datetime(2024, 1, 1), datetime(2024, 1, 8), "streaming"
+    )
+    return time.perf_counter() - started
+
+def run_case(renderer: str, rows: int) -> tuple:
+    with tempfile.TemporaryDirectory() as reports_dir:
+        elapsed = (render_html if renderer == "html" else render_streaming)(rows, reports_dir)
+        size = os.path.getsize(os.path.join(reports_dir, f"{renderer}.pdf"))
+    peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return elapsed, peak_rss_mb, size
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 5000, 20000, 50000])
+    parser.add_argument("--html-max-rows", type=int, default=5000, help="skip the HTML path above this size")
+    args = parser.parse_args()
+
+    print(f"{'renderer':<10} {'rows':>8} {'seconds':>9} {'rows/s':>9} {'peak RSS MB':>12} {'PDF MB':>8}")
+    for rows in args.rows:
+        for renderer in ("html", "streaming"):
+            if renderer == "html" and rows > args.html_max_rows:
+                continue
+            with ProcessPoolExecutor(max_workers=1) as pool:
+                elapsed, peak_rss_mb, size = pool.submit(run_case, renderer, rows).result()
+            print(f"{renderer:<10} {rows:>8} {elapsed:>9.2f} {rows / elapsed:>9.0f} {peak_rss_mb:>12.1f} {size / 1e6:>8.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Measure worker cold start.
+
+For each run a fresh interpreter is timed importing app.main (and the
+heavy libraries that import pulled in), then a fresh uvicorn process is
+started and timed until it accepts connections and until /health/ready
+reports the warmup done (builds without that endpoint count as ready once
+listening), followed by the first POST /api/score.
+
+SUPABASE_URL / SUPABASE_ANON_KEY are only needed for the server part; a
+placeholder URL works, scores then just fail to persist.
+
+Usage:
+  python benchmarks/bench_startup.py [--runs 5] [--port 8799] [--warmup all|none]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import requests
+
+BACKEND_DIR = os.path.join(os.path.dirname(__file__), "..")
+HEAVY_MODULES = ["shap", "sklearn", "pandas", "web3", "groq", "supabase", "xhtml2pdf", "reportlab"]
+
+IMPORT_PROBE = f"""
+import sys, time
+started = time.perf_counter()
+import app.main
+elapsed = time.perf_counter() - started
+print(elapsed, ",".join(name for name in {HEAVY_MODULES!r} if name in sys.modules))
+"""
+
+SCORE_REQUEST = {
+    "transaction_id": "bench_startup_txn",
+    "user_id": "bench_user",
+    "amount": 125.5,
+    "location": "Bentonville, AR",
+    "device_id": "bench_device",
+    "payment_method": "credit_card",
+    "merchant_category": "grocery"
+}
+
+def measure_import(env: dict) -> tuple:
+    output = subprocess.run(
+        [sys.executable, "-W", "ignore", "-c", IMPORT_PROBE],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True
+    ).stdout.strip().splitlines()[-1]
+    elapsed, modules = output.split(" ", 1) if " " in output else (output, "")
+    return float(elapsed), modules
+
+def wait_for(url: str, started: float, timeout: float, ok_statuses: tuple = (200,)) -> float:
+    while time.perf_counter() - started < timeout:
+        try:
+            if requests.get(url, timeout=1).status_code in ok_statuses:
+                return time.perf_counter() - started
+        except requests.ConnectionError:
+            pass
+        time.sleep(0.01)
+    raise TimeoutError(f"{url} not ready after {timeout}s")
+
+def measure_server(env: dict, port: int, timeout: float) -> tuple:
+    base_url = f"http://127.0.0.1:{port}"
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-W", "ignore", "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        listening = wait_for(f"{base_url}/health", started, timeout)
+        ready = wait_for(f"{base_url}/health/ready", started, timeout, ok_statuses=(200, 404))
+
+        request_started = time.perf_counter()
+        requests.post(f"{base_url}/api/score", json=SCORE_REQUEST, timeout=timeout).raise_for_status()
+        first_score = time.perf_counter() - request_started
+        return listening, ready, first_score
+    finally:
+        server.terminate()
+        server.wait()
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--port", type=int, default=8799)
+    parser.add_argument("--warmup", default=None, help="SERVICE_WARMUP for the server runs")
+    parser.add_argument("--timeout", type=float, default=120)
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env.setdefault("SUPABASE_URL", "http://127.0.0.1:1")
+    env.setdefault("SUPABASE_ANON_KEY", "bench.placeholder.key")
+    if args.warmup is not None:
+        env["SERVICE_WARMUP"] = args.warmup
+
+    imports, listening, first_scores, ready = [], [], [], []
+    for _ in range(args.runs):
+        elapsed, modules = measure_import(env)
+        imports.append(elapsed)
+
+        server_listening, server_ready, first_score = measure_server(env, args.port, args.timeout)
+        listening.append(server_listening)
+        first_scores.append(first_score)
+        ready.append(server_ready)
+
+    print(f"heavy modules imported by app.main: {modules or 'none'}")
+    print(f"{'stage':<28} {'median s':>9} {'min s':>7} {'max s':>7}")
+    for name, values in (
+        ("import app.main", imports),
+        ("process start -> listening", listening),
+        ("process start -> ready", ready),
+        ("first /api/score", first_scores)
+    ):
+        print(f"{name:<28} {statistics.median(values):>9.3f} {min(values):>7.3f} {max(values):>7.3f}")
+
+if __name__ == "__main__":
+    main()
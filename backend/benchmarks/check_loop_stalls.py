@@ -0,0 +1,97 @@
+"""
+Fail when a route blocks the event loop.
+
+Starts the app in-process (TestClient, so startup hooks and the loop
+monitor run), exercises a set of routes and wraps each one in
+loop_monitor.assert_no_stalls(). Prints the blocking stack for every
+route that stalled the loop longer than --max-ms and exits non-zero, so
+it can run as a CI step. No database is needed: a placeholder Supabase
+URL makes persistence fail fast, which the routes tolerate.
+
+Usage:
+  python benchmarks/check_loop_stalls.py [--max-ms 100] [--upload-rows 2000]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+os.environ.setdefault("SUPABASE_URL", "http://127.0.0.1:1")
+os.environ.setdefault("SUPABASE_ANON_KEY", "check.placeholder.key")
+
+SCORE_REQUEST = {
+    "transaction_id": "stall_check_txn",
+    "user_id": "stall_check_user",
+    "amount": 2450.0,
+    "location": "Bentonville, AR",
+    "device_id": "stall_check_device",
+    "payment_method": "credit_card",
+    "merchant_category": "electronics"
+}
+
+def upload_csv(rows: int) -> bytes:
+    lines = ["transaction_id,user_id,amount,timestamp,location,device_id,payment_method,merchant_category"]
+    lines += [
+        f"txn_{index},user_{index % 500},{(index % 997) + 0.5},2024-01-01 10:00:00,\"Dallas, TX\",dev_{index},card,grocery"
+        for index in range(rows)
+    ]
+    return "\n".join(lines).encode()
+
+def scenarios(upload_rows: int):
+    explanation = {**SCORE_REQUEST, "risk_score": 0.92, "flags": ["Large transaction amount"], "transaction_data": SCORE_REQUEST}
+    return [
+        ("POST /api/score", lambda client: client.post("/api/score", json=SCORE_REQUEST)),
+        ("POST /api/score/batch", lambda client: client.post(
+            "/api/score/batch", json=[{**SCORE_REQUEST, "transaction_id": f"stall_check_{index}"} for index in range(200)]
+        )),
+        ("POST /api/score/columnar", lambda client: client.post("/api/score/columnar", json={
+            "transaction_id": [f"stall_check_columnar_{index}" for index in range(5000)],
+            "user_id": [SCORE_REQUEST["user_id"]] * 5000,
+            "amount": [SCORE_REQUEST["amount"]] * 5000,
+            "location": [SCORE_REQUEST["location"]] * 5000
+        })),
+        ("POST /api/explain", lambda client: client.post("/api/explain", json=explanation)),
+        ("GET /api/dashboard", lambda client: client.get("/api/dashboard")),
+        ("GET /api/blockchain/logs", lambda client: client.get("/api/blockchain/logs")),
+        ("POST /api/upload", lambda client: client.post(
+            "/api/upload", files={"file": ("transactions.csv", upload_csv(upload_rows), "text/csv")}
+        ))
+    ]
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--max-ms", type=float, default=100)
+    parser.add_argument("--upload-rows", type=int, default=2000)
+    args = parser.parse_args()
+
+    os.environ.setdefault("LOOP_STALL_THRESHOLD_MS", str(min(args.max_ms, 100)))
+
+    from fastapi.testclient import TestClient
+    from app.main import app
+    from app.services.container import container
+    from app.services.loop_monitor import loop_monitor
+
+    failures = []
+    with TestClient(app) as client:
+        # Startup warmup builds the model in threads; wait so it is not charged to a route
+        while not container.warmed_up:
+            time.sleep(0.05)
+
+        for name, call in scenarios(args.upload_rows):
+            try:
+                with loop_monitor.assert_no_stalls(args.max_ms):
+                    status = call(client).status_code
+                print(f"ok    {name} ({status})")
+            except AssertionError as e:
+                print(f"FAIL  {name}")
+                failures.append((name, str(e)))
+
+    for name, details in failures:
+        print(f"\n--- {name} ---\n{details}")
+
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Local stand-in for the Groq chat completions API, for benchmarks and tests.
+
+Answers /openai/v1/chat/completions with a fixed answer, streamed or not,
+after a configurable delay. Point the backend at it with GROQ_BASE_URL.
+
+Environment:
+  FAKE_GROQ_FIRST_TOKEN_MS  delay before the first token (default 300)
+  FAKE_GROQ_TOKEN_MS        delay between streamed tokens (default 20)
+  FAKE_GROQ_TOKENS          number of tokens in the answer (default 60)
+  FAKE_GROQ_FAIL_AFTER      drop the stream after this many tokens (default off)
+  FAKE_GROQ_STATUS          answer every request with this status instead (default off)
+
+Usage:
+  python benchmarks/fake_groq_server.py [--port 8765]
+  GROQ_API_KEY=fake GROQ_BASE_URL=http://127.0.0.1:8765 uvicorn app.main:app
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+FIRST_TOKEN_SECONDS = float(os.getenv("FAKE_GROQ_FIRST_TOKEN_MS", 300)) / 1000
+TOKEN_SECONDS = float(os.getenv("FAKE_GROQ_TOKEN_MS", 20)) / 1000
+TOKENS = int(os.getenv("FAKE_GROQ_TOKENS", 60))
+FAIL_AFTER = int(os.getenv("FAKE_GROQ_FAIL_AFTER", 0)) or None
+STATUS = int(os.getenv("FAKE_GROQ_STATUS", 0)) or None
+
+app = FastAPI()
+
+def _tokens() -> list:
+    return [f"word{index} " for index in range(TOKENS)]
+
+def _chunk(content: str, model: str, finish_reason=None) -> str:
+    payload = {
+        "id": "chatcmpl-fake",
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "delta": {"content": content}, "finish_reason": finish_reason}]
+    }
+    return f"data: {json.dumps(payload)}\n\n"
+
+@app.post("/openai/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    model = body.get("model", "fake")
+
+    if STATUS:
+        return JSONResponse(status_code=STATUS, content={"error": {"message": "fake upstream error"}})
+
+    if body.get("stream"):
+        async def events():
+            await asyncio.sleep(FIRST_TOKEN_SECONDS)
+            for index, token in enumerate(_tokens()):
+                if FAIL_AFTER is not None and index >= FAIL_AFTER:
+                    # Ends the response without a [DONE] marker or finish_reason
+                    raise RuntimeError("fake upstream dropped the stream")
+                if index:
+                    await asyncio.sleep(TOKEN_SECONDS)
+                yield _chunk(token, model)
+            yield _chunk("", model, finish_reason="stop")
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    await asyncio.sleep(FIRST_TOKEN_SECONDS + TOKEN_SECONDS * (TOKENS - 1))
+    return {
+        "id": "chatcmpl-fake",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": "".join(_tokens())},
+            "finish_reason": "stop"
+        }],
+        "usage": {"prompt_tokens": 100, "completion_tokens": TOKENS, "total_tokens": 100 + TOKENS}
+    }
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
@@ -1,25 +1,259 @@
 import uvicorn
 import os
+import gc
+import time
+import random
+import signal
+import socket
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
+def run_development(host: str, port: int):
+    """Single process, auto-reload only when explicitly in development"""
+    reload = os.getenv("RELOAD", "").lower() in ("1", "true") or os.getenv("ENVIRONMENT") == "development"
+
+    uvicorn.run(
+        "app.main:app",
+        host=host,
+        port=port,
+        reload=reload,
+        log_level="info"
+    )
+
+def worker_memory(pid: int) -> dict:
+    """RSS, PSS and shared/private split for a process, in MB (Linux only)"""
+    fields = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 3 and parts[0].endswith(":") and parts[2] == "kB":
+                    fields[parts[0][:-1]] = int(parts[1]) / 1024
+    except OSError:
+        return {}
+
+    return {
+        "rss": fields.get("Rss", 0.0),
+        "pss": fields.get("Pss", 0.0),
+        "shared": fields.get("Shared_Clean", 0.0) + fields.get("Shared_Dirty", 0.0),
+        "private": fields.get("Private_Clean", 0.0) + fields.get("Private_Dirty", 0.0)
+    }
+
+def print_memory_report(workers: dict):
+    """Per-worker memory; total PSS is the real footprint, total RSS double counts shared pages"""
+    print(f"{'worker':>6} {'pid':>8} {'RSS MB':>8} {'PSS MB':>8} {'shared MB':>10} {'private MB':>11}")
+    totals = {"rss": 0.0, "pss": 0.0}
+
+    for pid, worker_id in sorted(workers.items(), key=lambda item: item[1]):
+        memory = worker_memory(pid)
+        if not memory:
+            continue
+        totals["rss"] += memory["rss"]
+        totals["pss"] += memory["pss"]
+        print(f"{worker_id:>6} {pid:>8} {memory['rss']:>8.1f} {memory['pss']:>8.1f} {memory['shared']:>10.1f} {memory['private']:>11.1f}")
+
+    parent = worker_memory(os.getpid())
+    print(f"{'parent':>6} {os.getpid():>8} {parent.get('rss', 0):>8.1f} {parent.get('pss', 0):>8.1f}")
+    print(f"Workers total: RSS {totals['rss']:.1f} MB, PSS {totals['pss']:.1f} MB")
+
+def serve_worker(worker_id: int, sock: socket.socket, app):
+    """Child process entry point: run one uvicorn server on the inherited socket"""
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGUSR1, signal.SIG_DFL)
+    os.environ["WORKER_ID"] = str(worker_id)
+
+    # Forked workers inherit the parent's RNG state
+    random.seed()
+    try:
+        import numpy as np
+        np.random.seed()
+    except ImportError:
+        pass
+
+    if app is None:
+        from app.main import app
+
+    # The audit ledger is a single-writer hash chain, so each worker appends to
+    # its own; reads, /ledger/head and /ledger/verify cover every worker's chain
+    from app.services.audit_ledger import audit_ledger
+    audit_ledger.directory = os.path.join(audit_ledger.root, f"worker-{worker_id}")
+
+    limit_concurrency = int(os.getenv("LIMIT_CONCURRENCY", 0)) or None
+    limit_max_requests = int(os.getenv("LIMIT_MAX_REQUESTS", 0)) or None
+
+    config = uvicorn.Config(
+        app,
+        loop="uvloop",
+        http="httptools",
+        log_level=os.getenv("LOG_LEVEL", "info"),
+        access_log=os.getenv("ACCESS_LOG", "false").lower() in ("1", "true"),
+        limit_concurrency=limit_concurrency,
+        limit_max_requests=limit_max_requests,
+        timeout_keep_alive=int(os.getenv("KEEPALIVE_TIMEOUT", 5)),
+        timeout_graceful_shutdown=int(os.getenv("GRACEFUL_TIMEOUT", 30))
+    )
+    uvicorn.Server(config).run(sockets=[sock])
+
+def run_production(host: str, port: int):
+    """Pre-fork server: load the app once, then fork WEB_CONCURRENCY workers sharing it copy-on-write.
+
+    Workers that exit (crash or LIMIT_MAX_REQUESTS) are replaced. A worker
+    that keeps crashing is restarted with exponential backoff
+    (WORKER_RESTART_BACKOFF doubling up to WORKER_RESTART_BACKOFF_MAX) and
+    given up on after WORKER_MAX_CRASHES crashes in a row; staying up for
+    WORKER_STABLE_SECONDS resets its count. SIGTERM or
+    SIGINT is forwarded to every worker, which drains in-flight requests and
+    runs the app's shutdown hooks (flushing write-behind buffers) before
+    exiting; stragglers are killed after GRACEFUL_TIMEOUT.
+    """
+    worker_count = int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 1))
+    graceful_timeout = float(os.getenv("GRACEFUL_TIMEOUT", 30))
+    memory_report_delay = float(os.getenv("MEMORY_REPORT_DELAY", 15))
+    restart_backoff = float(os.getenv("WORKER_RESTART_BACKOFF", 1))
+    restart_backoff_max = float(os.getenv("WORKER_RESTART_BACKOFF_MAX", 30))
+    max_crashes = int(os.getenv("WORKER_MAX_CRASHES", 5))
+    stable_seconds = float(os.getenv("WORKER_STABLE_SECONDS", 60))
+
+    app = None
+    if os.getenv("PRELOAD_APP", "true").lower() in ("1", "true"):
+        started = time.perf_counter()
+        from app.main import app
+        from app.services.container import container
+
+        # Fork-safe services (no sockets or threads yet) can be built once here and
+        # shared; the rest are built by each worker's startup warmup
+        container.preload(container.names(os.getenv("PRELOAD_SERVICES", "ml_engine")))
+        print(f"Preloaded app in {time.perf_counter() - started:.2f}s")
+
+        # Move everything loaded so far out of the GC's reach; otherwise the
+        # first collection in each worker writes to every object header and
+        # un-shares those pages
+        gc.collect()
+        gc.freeze()
+
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(int(os.getenv("BACKLOG", 2048)))
+    sock.set_inheritable(True)
+
+    workers = {}
+    started_at = {}
+    crashes = {}
+    # worker_id -> monotonic time of its delayed restart
+    restarts = {}
+    state = {"shutting_down": False, "report_memory": False}
+
+    def spawn(worker_id: int):
+        pid = os.fork()
+        if pid == 0:
+            exit_code = 0
+            try:
+                serve_worker(worker_id, sock, app)
+            except BaseException as e:
+                print(f"Worker {worker_id} failed: {e}")
+                exit_code = 1
+            finally:
+                os._exit(exit_code)
+        workers[pid] = worker_id
+        started_at[worker_id] = time.monotonic()
+        return pid
+
+    def schedule_restart(worker_id: int, pid: int, exit_code: int):
+        if time.monotonic() - started_at[worker_id] >= stable_seconds:
+            crashes[worker_id] = 0
+        if exit_code == 0:
+            # Recycled after LIMIT_MAX_REQUESTS
+            print(f"Worker {worker_id} (pid {pid}) exited, restarting")
+            spawn(worker_id)
+            return
+
+        crashes[worker_id] = crashes.get(worker_id, 0) + 1
+        if crashes[worker_id] >= max_crashes:
+            print(f"Worker {worker_id} (pid {pid}) crashed {crashes[worker_id]} times in a row with status {exit_code}, not restarting")
+            return
+
+        delay = min(restart_backoff * 2 ** (crashes[worker_id] - 1), restart_backoff_max)
+        print(f"Worker {worker_id} (pid {pid}) exited with status {exit_code}, restarting in {delay:.1f}s")
+        restarts[worker_id] = time.monotonic() + delay
+
+    def handle_shutdown(signum, frame):
+        if not state["shutting_down"]:
+            print(f"Received {signal.Signals(signum).name}, stopping {len(workers)} workers...")
+            state["shutting_down"] = True
+            state["kill_at"] = time.monotonic() + graceful_timeout
+            for pid in list(workers):
+                try:
+                    os.kill(pid, signal.SIGTERM)
+                except ProcessLookupError:
+                    pass
+
+    def handle_memory_report(signum, frame):
+        state["report_memory"] = True
+
+    signal.signal(signal.SIGTERM, handle_shutdown)
+    signal.signal(signal.SIGINT, handle_shutdown)
+    signal.signal(signal.SIGUSR1, handle_memory_report)
+
+    for worker_id in range(worker_count):
+        spawn(worker_id)
+    print(f"Started {worker_count} workers (send SIGUSR1 to {os.getpid()} for a memory report)")
+
+    report_at = time.monotonic() + memory_report_delay if memory_report_delay > 0 else None
+
+    while workers or (restarts and not state["shutting_down"]):
+        try:
+            pid, status = os.waitpid(-1, os.WNOHANG) if workers else (0, 0)
+        except ChildProcessError:
+            break
+
+        if pid:
+            worker_id = workers.pop(pid, None)
+            if worker_id is not None and not state["shutting_down"]:
+                schedule_restart(worker_id, pid, os.waitstatus_to_exitcode(status))
+            continue
+
+        if not state["shutting_down"]:
+            now = time.monotonic()
+            for worker_id, restart_at in list(restarts.items()):
+                if now >= restart_at:
+                    del restarts[worker_id]
+                    spawn(worker_id)
+
+        if state["shutting_down"] and time.monotonic() >= state["kill_at"]:
+            for pid in list(workers):
+                print(f"Worker {workers[pid]} (pid {pid}) did not stop in time, killing")
+                try:
+                    os.kill(pid, signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+            state["kill_at"] = float("inf")
+
+        if state["report_memory"] or (report_at and time.monotonic() >= report_at):
+            print_memory_report(workers)
+            state["report_memory"] = False
+            report_at = None
+
+        time.sleep(0.2)
+
+    sock.close()
+    print("All workers stopped")
+
 if __name__ == "__main__":
     # Get configuration from environment
     host = os.getenv("HOST", "0.0.0.0")
     port = int(os.getenv("PORT", 8000))
-    reload = os.getenv("ENVIRONMENT", "development") == "development"
-    
+    environment = os.getenv("ENVIRONMENT", "development")
+
     print(f"Starting Walmart AI Fraud Prevention Platform API...")
-    print(f"Environment: {os.getenv('ENVIRONMENT', 'development')}")
+    print(f"Environment: {environment}")
     print(f"Server: http://{host}:{port}")
     print(f"Docs: http://{host}:{port}/docs")
-    
-    uvicorn.run(
-        "app.main:app",
-        host=host,
-        port=port,
-        reload=reload,
-        log_level="info"
-    )
\ No newline at end of file
+
+    if environment == "production":
+        run_production(host, port)
+    else:
+        run_development(host, port)
@@ -0,0 +1,146 @@
+"""
+AsyncLLMClient against the local fake Groq server (benchmarks/fake_groq_server.py).
+
+Run from backend/: python -m pytest -q tests
+"""
+import asyncio
+import os
+import socket
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "benchmarks"))
+
+import fake_groq_server
+from app.services.llm_client import AsyncLLMClient, CircuitOpenError, _is_retryable
+
+MESSAGES = [{"role": "user", "content": "Why was this transaction flagged?"}]
+
+@pytest.fixture(scope="module")
+def base_url():
+    import uvicorn
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    server = uvicorn.Server(uvicorn.Config(fake_groq_server.app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    yield f"http://127.0.0.1:{port}"
+    server.should_exit = True
+    thread.join()
+
+@pytest.fixture(autouse=True)
+def fake_upstream(monkeypatch):
+    """Fast, healthy upstream unless a test says otherwise"""
+    monkeypatch.setattr(fake_groq_server, "FIRST_TOKEN_SECONDS", 0.01)
+    monkeypatch.setattr(fake_groq_server, "TOKEN_SECONDS", 0.0)
+    monkeypatch.setattr(fake_groq_server, "TOKENS", 5)
+    monkeypatch.setattr(fake_groq_server, "FAIL_AFTER", None)
+    monkeypatch.setattr(fake_groq_server, "STATUS", None)
+    return fake_groq_server
+
+def make_client(base_url: str, **kwargs) -> AsyncLLMClient:
+    client = AsyncLLMClient(api_key="fake", base_url=base_url, deadline=kwargs.pop("deadline", 5.0), **kwargs)
+    client.backoff_base = 0.01
+    return client
+
+async def collect(stream) -> list:
+    return [token async for token in stream]
+
+def test_chat_returns_content_and_counts_tokens(base_url):
+    client = make_client(base_url)
+    content = asyncio.run(client.chat(MESSAGES, model="fake", temperature=0.3, max_tokens=50))
+
+    assert content == "word0 word1 word2 word3 word4"
+    stats = client.stats()
+    assert stats["successes"] == 1
+    assert stats["prompt_tokens"] == 100
+    assert stats["completion_tokens"] == 5
+
+def test_stream_chat_relays_tokens_in_order(base_url):
+    client = make_client(base_url)
+    tokens = asyncio.run(collect(client.stream_chat(MESSAGES, model="fake", temperature=0.3, max_tokens=50)))
+
+    assert tokens == [f"word{index} " for index in range(5)]
+    assert client.stats()["stream_chunks"] == 5
+
+def test_stream_chat_raises_when_upstream_drops(base_url, fake_upstream):
+    fake_upstream.FAIL_AFTER = 2
+    client = make_client(base_url)
+    received = []
+
+    async def consume():
+        async for token in client.stream_chat(MESSAGES, model="fake", temperature=0.3, max_tokens=50):
+            received.append(token)
+
+    with pytest.raises(Exception):
+        asyncio.run(consume())
+    assert received == ["word0 ", "word1 "]
+    assert client.stats()["failures"] == 1
+
+def test_server_errors_are_retried(base_url, fake_upstream):
+    fake_upstream.STATUS = 503
+    client = make_client(base_url, max_retries=2)
+
+    with pytest.raises(Exception) as error:
+        asyncio.run(client.chat(MESSAGES, model="fake", temperature=0.3, max_tokens=50))
+    assert error.value.status_code == 503
+    assert client.stats()["retries"] == 2
+
+def test_client_errors_are_not_retried(base_url, fake_upstream):
+    fake_upstream.STATUS = 400
+    client = make_client(base_url, max_retries=2)
+
+    with pytest.raises(Exception):
+        asyncio.run(client.chat(MESSAGES, model="fake", temperature=0.3, max_tokens=50))
+    assert client.stats()["retries"] == 0
+
+def test_only_transport_and_upstream_errors_are_retryable():
+    import httpx
+    from groq import APIConnectionError
+
+    request = httpx.Request("POST", "http://fake/openai/v1/chat/completions")
+    assert _is_retryable(APIConnectionError(request=request))
+    assert _is_retryable(asyncio.TimeoutError())
+    assert not _is_retryable(TypeError("bad argument"))
+    assert not _is_retryable(KeyError("choices"))
+
+def test_slow_upstream_opens_the_breaker(base_url, fake_upstream, monkeypatch):
+    fake_upstream.FIRST_TOKEN_SECONDS = 0.2
+    monkeypatch.setenv("LLM_SLOW_CALL_SECONDS", "0.1")
+    monkeypatch.setenv("LLM_BREAKER_FAILURES", "2")
+    client = make_client(base_url)
+
+    async def run():
+        for _ in range(2):
+            await client.chat(MESSAGES, model="fake", temperature=0.3, max_tokens=50)
+        with pytest.raises(CircuitOpenError):
+            await client.chat(MESSAGES, model="fake", temperature=0.3, max_tokens=50)
+
+    asyncio.run(run())
+    assert client.breaker.state == "open"
+    assert client.stats()["short_circuited"] == 1
+
+def test_waiting_for_a_slot_does_not_count_as_slow(base_url, fake_upstream, monkeypatch):
+    fake_upstream.FIRST_TOKEN_SECONDS = 0.2
+    monkeypatch.setenv("LLM_SLOW_CALL_SECONDS", "0.35")
+    monkeypatch.setenv("LLM_BREAKER_FAILURES", "1")
+    client = make_client(base_url, max_concurrency=1)
+
+    async def run():
+        # The second call queues behind the first for ~0.2s, then takes ~0.2s upstream
+        await asyncio.gather(*[
+            client.chat(MESSAGES, model="fake", temperature=0.3, max_tokens=50) for _ in range(2)
+        ])
+
+    asyncio.run(run())
+    assert client.breaker.state == "closed"
+    assert client.breaker.consecutive_failures == 0
@@ -64,6 +64,9 @@ CREATE TABLE IF NOT EXISTS receipts (
     timestamp TIMESTAMPTZ NOT NULL,
     verified BOOLEAN DEFAULT FALSE,
     blockchain_hash VARCHAR(255),
+    signature VARCHAR(128),
+    key_id VARCHAR(64),
+    revoked BOOLEAN DEFAULT FALSE,
     verification_count INTEGER DEFAULT 0,
     created_at TIMESTAMPTZ DEFAULT NOW(),
     updated_at TIMESTAMPTZ DEFAULT NOW()
@@ -89,6 +92,8 @@ CREATE TABLE IF NOT EXISTS fraud_scores (
 CREATE TABLE IF NOT EXISTS fraud_explanations (
     id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
     transaction_id VARCHAR(255) NOT NULL,
+    risk_signature VARCHAR(64),
+    risk_score DECIMAL(3,2),
     explanation TEXT NOT NULL,
     key_factors TEXT[],
     recommendations TEXT[],
@@ -114,10 +119,42 @@ CREATE INDEX IF NOT EXISTS idx_fraud_logs_timestamp ON fraud_logs(timestamp);
 CREATE INDEX IF NOT EXISTS idx_receipts_hash ON receipts(receipt_hash);
 CREATE INDEX IF NOT EXISTS idx_receipts_transaction_id ON receipts(transaction_id);
 CREATE INDEX IF NOT EXISTS idx_receipts_verified ON receipts(verified);
-
-CREATE INDEX IF NOT EXISTS idx_fraud_scores_transaction_id ON fraud_scores(transaction_id);
+CREATE INDEX IF NOT EXISTS idx_receipts_revoked ON receipts(transaction_id) WHERE revoked;
+
+-- One score per transaction: retried /api/score calls are ignored on insert.
+-- Remove duplicates left by earlier versions (keeping the first score) so the index can be built.
+DELETE FROM fraud_scores a USING fraud_scores b
+WHERE a.transaction_id = b.transaction_id AND (a.scored_at, a.id) > (b.scored_at, b.id);
+DROP INDEX IF EXISTS idx_fraud_scores_transaction_id;
+CREATE UNIQUE INDEX IF NOT EXISTS idx_fraud_scores_transaction_id_unique ON fraud_scores(transaction_id);
 CREATE INDEX IF NOT EXISTS idx_fraud_scores_risk_level ON fraud_scores(risk_level);
 CREATE INDEX IF NOT EXISTS idx_fraud_scores_scored_at ON fraud_scores(scored_at);
+CREATE INDEX IF NOT EXISTS idx_fraud_scores_scored_at_id ON fraud_scores(scored_at, id);
+
+-- Report caching fingerprints each period by row count and latest updated_at,
+-- so updates must move updated_at on every table a report reads
+ALTER TABLE fraud_scores ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ DEFAULT NOW();
+ALTER TABLE blocklist ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ DEFAULT NOW();
+
+CREATE OR REPLACE FUNCTION set_updated_at() RETURNS TRIGGER AS $$
+BEGIN
+    NEW.updated_at = NOW();
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_transactions_updated_at ON transactions;
+CREATE TRIGGER trg_transactions_updated_at BEFORE UPDATE ON transactions
+    FOR EACH ROW EXECUTE FUNCTION set_updated_at();
+DROP TRIGGER IF EXISTS trg_fraud_scores_updated_at ON fraud_scores;
+CREATE TRIGGER trg_fraud_scores_updated_at BEFORE UPDATE ON fraud_scores
+    FOR EACH ROW EXECUTE FUNCTION set_updated_at();
+DROP TRIGGER IF EXISTS trg_blocklist_updated_at ON blocklist;
+CREATE TRIGGER trg_blocklist_updated_at BEFORE UPDATE ON blocklist
+    FOR EACH ROW EXECUTE FUNCTION set_updated_at();
+
+CREATE INDEX IF NOT EXISTS idx_fraud_explanations_transaction_id ON fraud_explanations(transaction_id, generated_at DESC);
+CREATE INDEX IF NOT EXISTS idx_fraud_explanations_risk_signature ON fraud_explanations(risk_signature, generated_at DESC);
 
 -- Insert sample data for testing
 INSERT INTO transactions (transaction_id, user_id, amount, timestamp, location, device_id, payment_method, merchant_category, risk_score, flagged) VALUES